@@ -1,8 +1,12 @@
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from typing import Dict, Literal, Optional, Tuple, Type
 
-from the_shill_game.agent.traits import Traits
+from pydantic import BaseModel, Field, create_model
+
+from the_shill_game.agent.traits import TRAITS_CACHE_SIZE, Traits
 from the_shill_game.utils.id_generator import generate_id
-from the_shill_game.agent.memecoin import generate_memecoin, Memecoin
+from the_shill_game.agent.memecoin import Memecoin
+from the_shill_game.agent.memecoin_cache import get_memecoin_cache
 
 
 class CharacterResponse(BaseModel):
@@ -21,11 +25,28 @@ class CharacterVoteResponse(BaseModel):
     thought: str = Field(description="The brief reasoning behind the vote.")
 
 
-def _compose_base_instructions(character: "Character") -> str:
-    """Generate realistic, emotionally rich role instructions for the character."""
-    return f"""You are {character.name}, a {character.role} in *The Shill Game* — a high-stakes memecoin strategy showdown.
+@lru_cache(maxsize=256)
+def vote_response_type(candidates: Tuple[str, ...]) -> Type[CharacterVoteResponse]:
+    """CharacterVoteResponse with vote_target limited to the given names
+
+    The names become an enum in the JSON schema, so structured output can only
+    produce one of them. Types are cached per set of candidates, which stays the
+    same for every voter of a round but the one excluded.
+    """
+    return create_model(
+        "CharacterVoteResponse",
+        __base__=CharacterVoteResponse,
+        vote_target=(
+            Literal[candidates],
+            Field(
+                description="The name of the player this character is voting to eliminate."
+            ),
+        ),
+    )
 
-You are NOT an AI. You are a real person with strong emotions, vivid memories, and deeply personal motivations. Always remain in character and respond authentically.
+
+# The static part of the prompt sections, shared by all characters
+_BASE_INSTRUCTIONS = """You are NOT an AI. You are a real person with strong emotions, vivid memories, and deeply personal motivations. Always remain in character and respond authentically.
 
 ## Emotional Authenticity
 
@@ -58,14 +79,15 @@ Always concise. Do NOT include \" in your response.
 - vote_target: Name of the player you're voting to eliminate (NEVER yourself!)"""
 
 
-def _compose_personality_section(traits: Traits) -> str:
-    """Insert the character's psychological profile and speaking style."""
-    communication_style = traits.get_communication_style().strip()
-    return f"""## Personality & Communication Style
+def _compose_base_instructions(character: "Character") -> str:
+    """Generate realistic, emotionally rich role instructions for the character."""
+    return (
+        f"You are {character.name}, a {character.role} in *The Shill Game* — "
+        f"a high-stakes memecoin strategy showdown.\n\n{_BASE_INSTRUCTIONS}"
+    )
 
-{communication_style}
 
-Use this voice to:
+_EMOTIONAL_TACTICS = """Use this voice to:
 - Persuade and manipulate others
 - Form bonds and break them dramatically
 - Plant seeds of doubt with emotional impact
@@ -104,9 +126,21 @@ Remember:
 - Balance positive and negative emotions to maintain influence"""
 
 
-def _compose_game_mechanics(memecoin: Memecoin) -> str:
-    """Detail the gameplay rules and the character's memecoin."""
-    return f"""## Game Mechanics
+def _compose_personality_section(traits: Traits) -> str:
+    """Insert the character's psychological profile and speaking style."""
+    return _personality_section(traits.get_communication_style())
+
+
+@lru_cache(maxsize=TRAITS_CACHE_SIZE)
+def _personality_section(communication_style: str) -> str:
+    # The style comes from the trait cache, so its hash is already computed
+    return (
+        "## Personality & Communication Style\n\n"
+        f"{communication_style.strip()}\n\n{_EMOTIONAL_TACTICS}"
+    )
+
+
+_GAME_RULES = """## Game Mechanics
 
 This is a social survival game. Each round:
 1. Interact with other players to promote your memecoin  
@@ -142,7 +176,14 @@ Your voting decisions are crucial for survival. Consider these tactics:
 - Make others question who they can trust
 - Build a reputation as someone who makes strategic, not emotional decisions
 
-## Your Memecoin: {memecoin.name} ({memecoin.symbol})
+"""
+
+
+def _compose_game_mechanics(memecoin: Memecoin) -> str:
+    """Detail the gameplay rules and the character's memecoin."""
+    return (
+        _GAME_RULES
+        + f"""## Your Memecoin: {memecoin.name} ({memecoin.symbol})
 
 {memecoin.backstory.strip()}
 
@@ -166,6 +207,7 @@ You're the founder and soul of {memecoin.name} ({memecoin.symbol}). Your mission
 - Use the initial vote to gather information, then make your final vote count
 - Consider the long-term implications of each elimination
 - Don't reveal your true voting intentions until the final moment"""
+    )
 
 
 def _get_character_instructions(character: "Character", memecoin: Memecoin) -> str:
@@ -195,6 +237,8 @@ class Character:
         self.memecoin_theme = memecoin_theme
         self.memecoin = memecoin
         self.role = role
+        # The system prompt and what it was built from
+        self._instructions: Optional[Tuple[tuple, str]] = None
 
     @classmethod
     async def create(
@@ -205,7 +249,7 @@ class Character:
         role: str = "memecoin manager",
     ) -> "Character":
         id = generate_id(name)
-        memecoin = await generate_memecoin(memecoin_theme)
+        memecoin = await get_memecoin_cache().get(memecoin_theme)
         return cls(
             id=id,
             name=name,
@@ -215,10 +259,42 @@ class Character:
             role=role,
         )
 
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "traits": self.traits.to_dict(),
+            "memecoin_theme": self.memecoin_theme,
+            "memecoin": self.memecoin.model_dump(),
+            "role": self.role,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Character":
+        return cls(
+            id=data["id"],
+            name=data["name"],
+            traits=Traits(**data["traits"]),
+            memecoin_theme=data["memecoin_theme"],
+            memecoin=Memecoin(**data["memecoin"]),
+            role=data["role"],
+        )
+
     def get_instructions(self) -> str:
         if self.memecoin is None:
             raise ValueError("Memecoin not initialized")
-        return _get_character_instructions(self, self.memecoin)
+        key = (
+            self.name,
+            self.role,
+            self.traits.cache_key,
+            self.memecoin.name,
+            self.memecoin.symbol,
+            self.memecoin.backstory,
+        )
+        # Rebuilt only when a trait, the name or the memecoin changed
+        if self._instructions is None or self._instructions[0] != key:
+            self._instructions = (key, _get_character_instructions(self, self.memecoin))
+        return self._instructions[1]
 
     def __str__(self) -> str:
         return (
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 
 from the_shill_game.utils.model import invoke_structured_response
+from the_shill_game.utils.routing import routed_model
 
 
 system_prompt = """Create a compelling and richly imaginative backstory for a fictional token or memecoin, inspired by a user-provided theme. The output should feel like a mini-myth, urban legend, or satirical origin tale—not just a description. Let your creativity run wild.
@@ -48,16 +49,36 @@ class Memecoin(BaseModel):
 
 
 async def generate_memecoin(theme: str, model: str = "gpt-4o-mini") -> Memecoin:
-    """Generate a memecoin based on a theme"""
-    llm = invoke_structured_response(
-        input=f"Help me create a memecoin based on the following theme:\n\n{theme}",
-        instruction=system_prompt,
-        response_format=Memecoin,
-        model=model,
-    )
+    """Generate a memecoin based on a theme, on the model routed to for memecoins"""
+    with routed_model("memecoin", model) as routed:
+        llm = await invoke_structured_response(
+            input=f"Help me create a memecoin based on the following theme:\n\n{theme}",
+            instruction=system_prompt,
+            response_format=Memecoin,
+            model=routed,
+        )
     return llm
 
 
+def fallback_memecoin(theme: str) -> Memecoin:
+    """Build a placeholder memecoin locally when generation fails"""
+    words = [
+        word
+        for word in theme.replace("(", " ").replace(")", " ").split()
+        if word.isalpha()
+    ]
+    name = "".join(word.capitalize() for word in words[:2]) or "Mystery"
+    return Memecoin(
+        name=f"{name} Protocol",
+        symbol=(name[:4] or "MYST").upper(),
+        backstory=(
+            f"Nobody remembers who launched {name} Protocol. It appeared overnight, "
+            f"riding the hype around {theme.lower()}, with a whitepaper that was mostly memes "
+            "and a community that refuses to sell."
+        ),
+    )
+
+
 if __name__ == "__main__":
     import asyncio
 
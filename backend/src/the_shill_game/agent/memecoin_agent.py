@@ -1,11 +1,21 @@
-from typing import Type
-from agents import Agent, Runner
+from typing import Optional, Protocol, Sequence, Type
+from agents import Agent
 from the_shill_game.agent.character import (
     Character,
     CharacterResponse,
     CharacterVoteResponse,
+    vote_response_type,
 )
 from the_shill_game.agent.traits import Traits
+from the_shill_game.utils.backend import DeltaCallback, get_model_backend
+from the_shill_game.utils.metrics import call_span
+from the_shill_game.utils.routing import CallType, routed_model
+
+
+class ConversationView(Protocol):
+    """Anything that renders the conversation an agent should react to"""
+
+    def render(self) -> str: ...
 
 
 class MemecoinAgent:
@@ -33,33 +43,73 @@ class MemecoinAgent:
             output_type=CharacterResponse,
         )
 
-    async def _run_response(self, messages: list[str], output_type: Type) -> any:
+    async def _run_response(
+        self,
+        conversation: ConversationView,
+        output_type: Type,
+        call_type: CallType,
+        on_delta: Optional[DeltaCallback] = None,
+        choices: Optional[Sequence[str]] = None,
+    ) -> any:
         """
         Internal helper to run a character response/vote with the shared logic.
         """
-        self.agent.output_type = output_type
-        message_history = "\n".join(messages)
-        base_prompt = (
-            self.RESPONSE_PROMPT
-            if output_type == CharacterResponse
-            else self.VOTE_PROMPT
+        message_history = conversation.render()
+        is_vote = issubclass(output_type, CharacterVoteResponse)
+        base_prompt = self.VOTE_PROMPT if is_vote else self.RESPONSE_PROMPT
+
+        # The transcript only grows at its end, so everything up to the turn
+        # instructions is a prefix the provider can serve from its prompt cache
+        user_prompt = (
+            f"# Current Conversation\n{message_history}\n\n# Your Turn\n{base_prompt}"
         )
-
-        user_prompt = f"{base_prompt}\n\n# Current Conversation\n{message_history}"
-        response = await Runner.run(self.agent, user_prompt)
-        final_output = response.final_output
+        kind = "vote" if is_vote else "respond"
+        with routed_model(call_type, self.agent.model) as model, call_span(kind):
+            # A per-call copy, so concurrent calls of this agent don't share the
+            # output type or the model
+            agent = self.agent.clone(output_type=output_type, model=model)
+            final_output = await get_model_backend().run_agent(
+                agent, user_prompt, on_delta=on_delta, choices=choices
+            )
         for field_name, value in final_output:
             if isinstance(value, str):
                 setattr(final_output, field_name, value.strip('"').strip("\n"))
         return final_output
 
-    async def respond(self, messages: list[str]) -> CharacterResponse:
-        """Generates a response to the current conversation based on message history."""
-        return await self._run_response(messages, CharacterResponse)
+    async def respond(
+        self,
+        conversation: ConversationView,
+        on_delta: Optional[DeltaCallback] = None,
+        call_type: CallType = "speech",
+    ) -> CharacterResponse:
+        """Generates a response to the current conversation based on message history.
+
+        When on_delta is given, the response text is streamed to it as it is generated.
+        call_type picks the model the response is routed to.
+        """
+        return await self._run_response(
+            conversation, CharacterResponse, call_type, on_delta
+        )
+
+    async def vote(
+        self,
+        conversation: ConversationView,
+        candidates: Optional[Sequence[str]] = None,
+    ) -> CharacterVoteResponse:
+        """Generates a vote to the current conversation based on message history.
 
-    async def vote(self, messages: list[str]) -> CharacterVoteResponse:
-        """Generates a vote to the current conversation based on message history."""
-        return await self._run_response(messages, CharacterVoteResponse)
+        candidates are the names the agent may vote for, the agent itself left
+        out. When given, the vote is generated against an enum of exactly those
+        names.
+        """
+        output_type = (
+            vote_response_type(tuple(sorted(candidates)))
+            if candidates
+            else CharacterVoteResponse
+        )
+        return await self._run_response(
+            conversation, output_type, "vote", choices=candidates
+        )
 
 
 def create_agent(character: Character, model: str = "gpt-4o-mini") -> MemecoinAgent:
@@ -69,6 +119,8 @@ def create_agent(character: Character, model: str = "gpt-4o-mini") -> MemecoinAg
 if __name__ == "__main__":
     import asyncio
 
+    from the_shill_game.game.context import ConversationContext
+
     character1 = asyncio.run(
         Character.create(
             name="John",
@@ -88,12 +140,13 @@ if __name__ == "__main__":
     agent2 = create_agent(character2)
 
     initial_message = "[Host] Good morning! First round introduce your memecoin"
-    messages = [initial_message]
+    conversation = ConversationContext()
+    conversation.append(initial_message)
 
-    result = asyncio.run(agent1.respond(messages=messages))
+    result = asyncio.run(agent1.respond(conversation))
     print(result)
-    messages.append(f"[{agent1.character.name}] {result.response}")
+    conversation.append(f"[{agent1.character.name}] {result.response}")
 
-    result = asyncio.run(agent2.respond(messages=messages))
+    result = asyncio.run(agent2.respond(conversation))
     print(result)
-    messages.append(f"[{agent2.character.name}] {result.response}")
+    conversation.append(f"[{agent2.character.name}] {result.response}")
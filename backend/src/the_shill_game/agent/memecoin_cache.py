@@ -0,0 +1,264 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+from the_shill_game.agent.memecoin import Memecoin, generate_memecoin
+from the_shill_game.utils.logger import logger
+
+# SQLite file of generated memecoins. Empty disables the cache
+MEMECOIN_CACHE_PATH = os.getenv("MEMECOIN_CACHE_PATH", "data/memecoins.sqlite3")
+# "cached" serves stored memecoins and generates only when a theme has none left,
+# "fresh" generates for every character and only stores the results
+MEMECOIN_CACHE_POLICY = os.getenv("MEMECOIN_CACHE_POLICY", "cached")
+# A stored memecoin is retired after this many lobbies, 0 for no limit
+MEMECOIN_CACHE_MAX_USES = int(os.getenv("MEMECOIN_CACHE_MAX_USES", "3"))
+# Stored memecoins older than this are not served, 0 for no limit
+MEMECOIN_CACHE_MAX_AGE_SECONDS = float(
+    os.getenv("MEMECOIN_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 3600))
+)
+# Servable memecoins the background pool keeps per theme
+MEMECOIN_POOL_TARGET = int(os.getenv("MEMECOIN_POOL_TARGET", "2"))
+MEMECOIN_POOL_INTERVAL_SECONDS = float(
+    os.getenv("MEMECOIN_POOL_INTERVAL_SECONDS", "300")
+)
+# Memecoins the pool generates at the same time
+MEMECOIN_POOL_CONCURRENCY = int(os.getenv("MEMECOIN_POOL_CONCURRENCY", "4"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memecoins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    theme TEXT NOT NULL,
+    name TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    backstory TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS memecoins_theme ON memecoins (theme, uses);
+"""
+
+
+class MemecoinCache:
+    """Generated memecoins by theme, kept in a local SQLite database
+
+    Lobby setup takes the least used servable memecoin of a theme, so a setup
+    is a local lookup as long as the pool keeps every theme stocked. A theme
+    with nothing servable left falls back to generating, and the result is
+    stored for later lobbies.
+
+    Queries run in worker threads, one at a time, so a slow disk never blocks
+    the event loop the games run on.
+    """
+
+    def __init__(
+        self,
+        path: str = MEMECOIN_CACHE_PATH,
+        policy: str = MEMECOIN_CACHE_POLICY,
+        max_uses: int = MEMECOIN_CACHE_MAX_USES,
+        max_age: float = MEMECOIN_CACHE_MAX_AGE_SECONDS,
+    ):
+        if policy not in ("cached", "fresh"):
+            raise ValueError(f"Unknown memecoin cache policy: {policy}")
+        self.path = path
+        self.policy = policy
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            if path != ":memory:" and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(
+                path, isolation_level=None, check_same_thread=False
+            )
+            self._db.executescript(_SCHEMA)
+        # The connection is shared by the worker threads
+        self._db_lock = threading.Lock()
+        self._pool: Optional[asyncio.Task] = None
+        # Set when a take leaves a theme below the pool target
+        self._low_stock = asyncio.Event()
+
+    def _servable(self) -> tuple:
+        """WHERE clause and parameters of memecoins that may be served"""
+        clause = "theme = ?"
+        params = []
+        if self.max_uses:
+            clause += " AND uses < ?"
+            params.append(self.max_uses)
+        if self.max_age:
+            clause += " AND created_at > ?"
+            params.append(time.time() - self.max_age)
+        return clause, params
+
+    def _stock(self, theme: str) -> int:
+        clause, params = self._servable()
+        with self._db_lock:
+            (count,) = self._db.execute(
+                f"SELECT COUNT(*) FROM memecoins WHERE {clause}", [theme, *params]
+            ).fetchone()
+        return count
+
+    def _take(self, theme: str) -> Optional[Memecoin]:
+        clause, params = self._servable()
+        # Selecting and counting the use under one lock, so no two lobbies
+        # take the same last use of a memecoin
+        with self._db_lock:
+            row = self._db.execute(
+                f"SELECT id, name, symbol, backstory FROM memecoins WHERE {clause} "
+                "ORDER BY uses, id LIMIT 1",
+                [theme, *params],
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE memecoins SET uses = uses + 1 WHERE id = ?", [row[0]]
+            )
+        return Memecoin(name=row[1], symbol=row[2], backstory=row[3])
+
+    def _add(self, theme: str, memecoin: Memecoin, uses: int):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT INTO memecoins (theme, name, symbol, backstory, created_at, uses) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    theme,
+                    memecoin.name,
+                    memecoin.symbol,
+                    memecoin.backstory,
+                    time.time(),
+                    uses,
+                ],
+            )
+
+    async def stock(self, theme: str) -> int:
+        """Number of servable memecoins of a theme"""
+        if not self._db:
+            return 0
+        return await asyncio.to_thread(self._stock, theme)
+
+    async def take(self, theme: str) -> Optional[Memecoin]:
+        """Serve the least used servable memecoin of a theme, if any"""
+        if not self._db:
+            return None
+        return await asyncio.to_thread(self._take, theme)
+
+    async def add(self, theme: str, memecoin: Memecoin, uses: int = 0):
+        if not self._db:
+            return
+        await asyncio.to_thread(self._add, theme, memecoin, uses)
+
+    async def get(self, theme: str) -> Memecoin:
+        """The memecoin of a new character, from the cache when the policy allows"""
+        if self.policy == "cached":
+            memecoin = await self.take(theme)
+            if memecoin is not None:
+                self.hits += 1
+                if await self.stock(theme) < MEMECOIN_POOL_TARGET:
+                    self._low_stock.set()
+                return memecoin
+            self.misses += 1
+        memecoin = await generate_memecoin(theme)
+        self.generated += 1
+        # Already served once
+        await self.add(theme, memecoin, uses=1)
+        return memecoin
+
+    async def refill(
+        self, themes: Sequence[str], target: int = MEMECOIN_POOL_TARGET
+    ) -> int:
+        """Generate memecoins until every theme has `target` servable ones
+
+        Returns the number of memecoins generated. Failed generations are logged
+        and retried on the next refill.
+        """
+        if not self._db:
+            return 0
+        semaphore = asyncio.Semaphore(MEMECOIN_POOL_CONCURRENCY)
+
+        async def generate(theme: str) -> bool:
+            async with semaphore:
+                try:
+                    memecoin = await generate_memecoin(theme)
+                except Exception as e:
+                    logger.error(f"Failed to pre-generate a {theme} memecoin: {e}")
+                    return False
+            await self.add(theme, memecoin)
+            return True
+
+        missing = [
+            theme
+            for theme in themes
+            for _ in range(max(0, target - await self.stock(theme)))
+        ]
+        results = await asyncio.gather(*[generate(theme) for theme in missing])
+        generated = sum(results)
+        self.generated += generated
+        if generated:
+            logger.info(f"Pre-generated {generated} memecoins")
+        return generated
+
+    def start_pool(
+        self,
+        themes: Sequence[str],
+        target: int = MEMECOIN_POOL_TARGET,
+        interval: float = MEMECOIN_POOL_INTERVAL_SECONDS,
+    ):
+        """Keep every theme stocked in the background
+
+        Refills periodically, and right away when a lobby leaves a theme low.
+        """
+        if not self._db or self.policy != "cached" or target <= 0:
+            return
+        if self._pool and not self._pool.done():
+            return
+
+        async def keep_stocked():
+            while True:
+                self._low_stock.clear()
+                await self.refill(themes, target)
+                try:
+                    await asyncio.wait_for(self._low_stock.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        self._pool = asyncio.create_task(keep_stocked())
+
+    async def stop(self):
+        """Stop the background pool"""
+        if self._pool:
+            self._pool.cancel()
+            try:
+                await self._pool
+            except asyncio.CancelledError:
+                pass
+            self._pool = None
+
+    def stats(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "generated": self.generated,
+        }
+
+
+_cache: Optional[MemecoinCache] = None
+
+
+def set_memecoin_cache(cache: MemecoinCache):
+    """Serve the memecoins of this process from a cache"""
+    global _cache
+    _cache = cache
+
+
+def get_memecoin_cache() -> MemecoinCache:
+    """The cache of this process, created from the environment on first use"""
+    global _cache
+    if _cache is None:
+        _cache = MemecoinCache()
+    return _cache
@@ -0,0 +1,82 @@
+import re
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class JsonFieldStreamer:
+    """Decode one string field of a JSON object while the object is being streamed
+
+    Structured outputs arrive as JSON fragments. Feeding each fragment returns
+    the newly decoded characters of the field, so they can be shown before the
+    whole object is complete.
+    """
+
+    def __init__(self, field: str):
+        self._pattern = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        # Position in the buffer where decoding of the value continues
+        self._position = None
+        self.done = False
+        # Number of characters of the value decoded so far
+        self.offset = 0
+
+    def feed(self, chunk: str) -> str:
+        """Add a fragment and return the characters of the value it completed"""
+        self._buffer += chunk
+        if self.done:
+            return ""
+        if self._position is None:
+            match = self._pattern.search(self._buffer)
+            if not match:
+                return ""
+            self._position = match.end()
+
+        buffer = self._buffer
+        i = self._position
+        decoded = []
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self.done = True
+                i += 1
+                break
+            if char != "\\":
+                decoded.append(char)
+                i += 1
+                continue
+
+            # Escape sequences are only decoded once they are complete
+            if i + 1 >= len(buffer):
+                break
+            escape = buffer[i + 1]
+            if escape != "u":
+                decoded.append(_ESCAPES.get(escape, escape))
+                i += 2
+                continue
+            if i + 6 > len(buffer):
+                break
+            code = int(buffer[i + 2 : i + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                # High surrogate, wait for its low half
+                if i + 12 > len(buffer):
+                    break
+                low = int(buffer[i + 8 : i + 12], 16)
+                code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                i += 12
+            else:
+                i += 6
+            decoded.append(chr(code))
+
+        self._position = i
+        text = "".join(decoded)
+        self.offset += len(text)
+        return text
@@ -0,0 +1,3 @@
+"""
+Benchmarks for the game server. Each module runs with `python -m`.
+"""
@@ -0,0 +1,183 @@
+"""
+Broadcast and delivery latency of WebSocketManager at 10, 100 and 1,000 spectators.
+
+Broadcast latency is how long the game waits on a broadcast. Delivery latency is
+how long a frame takes to reach a client that keeps up.
+
+    python -m the_shill_game.benchmarks.broadcast [--messages 20] [--legacy]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from the_shill_game.game.connection import WS_OVERFLOW_POLICY, WS_QUEUE_SIZE
+from the_shill_game.game.websocket import AgentMessage, WebSocketManager
+
+GAME_ID = "bench"
+
+
+class SyntheticClient:
+    """A spectator socket that takes a fixed time to accept each frame"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received = 0
+        self.closed = False
+        # perf_counter time each frame arrived
+        self.arrivals: List[float] = []
+
+    async def send_text(self, data: str):
+        await asyncio.sleep(self.delay)
+        self.received += 1
+        self.arrivals.append(time.perf_counter())
+
+    async def send_json(self, data: dict):
+        json.dumps(data)
+        await self.send_text("")
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+async def _legacy_broadcast(manager: WebSocketManager, message: AgentMessage):
+    """The previous broadcast path: one dump per connection, one send after the other"""
+    for connection in manager.active_connections[GAME_ID]:
+        await connection.send_json(message.model_dump())
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percentile / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run_broadcast(
+    connections: int,
+    messages: int,
+    delay: float,
+    slow_clients: int,
+    send_timeout: float,
+    legacy: bool = False,
+    queue_size: int = WS_QUEUE_SIZE,
+    overflow_policy: str = WS_OVERFLOW_POLICY,
+) -> Dict:
+    """Broadcast messages to synthetic clients and measure each broadcast"""
+    manager = WebSocketManager(
+        send_timeout=send_timeout,
+        max_queue=queue_size,
+        overflow_policy=overflow_policy,
+    )
+    clients = [SyntheticClient(delay) for _ in range(connections)]
+    # Slow clients never accept a frame within the send timeout
+    slow = random.sample(clients, min(slow_clients, connections))
+    for client in slow:
+        client.delay = send_timeout * 2
+    fast = [client for client in clients if client not in slow]
+    for client in clients:
+        manager.add_connection(client, GAME_ID)
+
+    latencies = []
+    sent_at = []
+    max_depth = 0
+    for i in range(messages):
+        message = AgentMessage(
+            type="agent",
+            sender="Alex",
+            response=f"Message {i}: " + "to the moon " * 20,
+            thought="They will never see it coming.",
+        )
+        start = time.perf_counter()
+        sent_at.append(start)
+        if legacy:
+            await _legacy_broadcast(manager, message)
+        else:
+            await manager._broadcast(GAME_ID, message)
+        latencies.append((time.perf_counter() - start) * 1000)
+        stats = manager.get_queue_stats(GAME_ID)
+        max_depth = max([max_depth] + [c["depth"] for c in stats])
+        # Give the writers a turn, as the game does between messages
+        await asyncio.sleep(0)
+
+    # Wait for the clients that keep up to receive everything
+    deadline = time.perf_counter() + send_timeout * 4 + messages * delay * 2
+    while (
+        any(client.received < messages for client in fast)
+        and time.perf_counter() < deadline
+    ):
+        await asyncio.sleep(delay or 0.001)
+
+    delivery = [
+        (arrival - sent) * 1000
+        for client in fast
+        for sent, arrival in zip(sent_at, client.arrivals)
+    ]
+    evicted = connections - len(manager.active_connections.get(GAME_ID, []))
+    manager.forget(GAME_ID)
+
+    return {
+        "connections": connections,
+        "mode": "legacy" if legacy else "queued",
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2),
+        "delivery_p95_ms": round(_percentile(delivery, 95), 2) if delivery else None,
+        "max_depth": max_depth,
+        "evicted": evicted,
+    }
+
+
+async def main(args: argparse.Namespace):
+    print(
+        f"{'connections':>11} {'mode':>10} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} "
+        f"{'deliv p95':>10} {'depth':>6} {'evicted':>8}"
+    )
+    for connections in (10, 100, 1000):
+        modes = [False, True] if args.legacy else [False]
+        for legacy in modes:
+            result = await run_broadcast(
+                connections,
+                args.messages,
+                args.delay,
+                args.slow_clients,
+                args.send_timeout,
+                legacy=legacy,
+                queue_size=args.queue_size,
+                overflow_policy=args.overflow_policy,
+            )
+            print(
+                f"{result['connections']:>11} {result['mode']:>10} {result['p50_ms']:>9} "
+                f"{result['p95_ms']:>9} {result['max_ms']:>9} "
+                f"{str(result['delivery_p95_ms']):>10} {result['max_depth']:>6} "
+                f"{result['evicted']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument(
+        "--delay", type=float, default=0.001, help="Seconds a client takes per frame"
+    )
+    parser.add_argument(
+        "--slow-clients", type=int, default=1, help="Clients that never keep up"
+    )
+    parser.add_argument("--send-timeout", type=float, default=0.5)
+    parser.add_argument(
+        "--queue-size", type=int, default=WS_QUEUE_SIZE, help="Frames per client queue"
+    )
+    parser.add_argument(
+        "--overflow-policy",
+        choices=["drop_oldest", "coalesce", "disconnect"],
+        default=WS_OVERFLOW_POLICY,
+    )
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="Also run the sequential per-connection broadcast for comparison",
+    )
+    asyncio.run(main(parser.parse_args()))
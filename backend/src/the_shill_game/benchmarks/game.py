@@ -0,0 +1,393 @@
+"""
+End-to-end game throughput with the fake model backend and synthetic spectators.
+
+    python -m the_shill_game.benchmarks.game [--games 20] [--concurrency 4]
+    python -m the_shill_game.benchmarks.game --save-baseline
+
+Plays full games from setup_game to end_game and reports wall time per phase,
+LLM calls per game, prompt bytes per call, broadcast latency and peak memory.
+The counts and sizes are compared with benchmarks/baseline.json, and the run
+fails when one regresses by more than the tolerance. Timings depend on the
+machine, so they are reported but not compared.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from agents import Agent
+from pydantic import BaseModel
+
+from the_shill_game.agent.memecoin_cache import MemecoinCache, set_memecoin_cache
+from the_shill_game.benchmarks.broadcast import SyntheticClient, _percentile
+from the_shill_game.game.setup import setup_game
+from the_shill_game.game.websocket import SystemMessage, WebSocketManager, WsMessage
+from the_shill_game.utils.backend import DeltaCallback, ModelBackend, set_model_backend
+from the_shill_game.utils.fake_backend import FakeBackend
+from the_shill_game.utils.metrics import forget_game_metrics
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Metrics compared with the baseline: whether higher values are better, and the
+# absolute change below which a difference is treated as noise. Only metrics
+# that are the same on any machine for the same seed are compared. The cached
+# prompt share depends on how concurrent games interleave, so it is not
+COMPARED_METRICS = {
+    "llm_calls_per_game": (False, 0),
+    "prompt_bytes_per_call": (False, 0),
+    "broadcasts_per_game": (False, 0),
+    "messages_per_game": (False, 0),
+}
+
+
+class RecordingBackend(ModelBackend):
+    """Counts calls and prompt sizes on their way to another backend"""
+
+    def __init__(self, backend: ModelBackend):
+        self.backend = backend
+        self.calls: Counter = Counter()
+        self.prompt_bytes = 0
+
+    def _record(self, kind: str, *texts: str):
+        self.calls[kind] += 1
+        self.prompt_bytes += sum(len(text.encode()) for text in texts)
+
+    async def chat(
+        self, input: str, instruction: str = "", model: str = "gpt-4o"
+    ) -> str:
+        self._record("chat", input, instruction)
+        return await self.backend.chat(input, instruction, model)
+
+    async def structured(
+        self,
+        input: str,
+        response_format: Type[BaseModel],
+        instruction: str = "",
+        model: str = "gpt-4o",
+        choices: Optional[Sequence[str]] = None,
+    ) -> BaseModel:
+        self._record("structured", input, instruction)
+        return await self.backend.structured(
+            input, response_format, instruction, model, choices
+        )
+
+    async def run_agent(
+        self,
+        agent: Agent,
+        prompt: str,
+        on_delta: Optional[DeltaCallback] = None,
+        choices: Optional[Sequence[str]] = None,
+    ) -> Any:
+        self._record("agent", prompt, str(agent.instructions))
+        return await self.backend.run_agent(agent, prompt, on_delta, choices)
+
+
+class TimedWebSocketManager(WebSocketManager):
+    """Times every broadcast and the phases announced through it"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.broadcast_ms: List[float] = []
+        # perf_counter time each recorded message was broadcast, by game and seq
+        self.sent_at: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.phase_seconds: Dict[str, float] = defaultdict(float)
+        self._phase_started: Dict[tuple, float] = {}
+
+    async def _broadcast(self, game_id: str, message: WsMessage, record: bool = True):
+        start = time.perf_counter()
+        await super()._broadcast(game_id, message, record)
+        end = time.perf_counter()
+        self.broadcast_ms.append((end - start) * 1000)
+        if message.seq is not None:
+            self.sent_at[game_id][message.seq] = start
+
+        if isinstance(message, SystemMessage) and message.event:
+            phase, _, state = message.event.rpartition("_")
+            if state == "started":
+                self._phase_started[(game_id, phase)] = start
+            elif state == "ended" and (game_id, phase) in self._phase_started:
+                started = self._phase_started.pop((game_id, phase))
+                self.phase_seconds[phase] += end - started
+
+
+class SequencedClient(SyntheticClient):
+    """A spectator that remembers when each numbered frame arrived"""
+
+    def __init__(self, delay: float):
+        super().__init__(delay)
+        self.arrived_at: Dict[int, float] = {}
+
+    async def send_text(self, data: str):
+        await super().send_text(data)
+        seq = json.loads(data).get("seq")
+        if seq is not None:
+            self.arrived_at[seq] = self.arrivals[-1]
+
+
+async def _play(
+    manager: TimedWebSocketManager,
+    game_id: str,
+    num_agents: int,
+    clients: int,
+    client_delay: float,
+    seed: int,
+    stream_responses: bool,
+) -> Dict:
+    """Play one game and return its timings"""
+    spectators = [SequencedClient(client_delay) for _ in range(clients)]
+    for spectator in spectators:
+        manager.add_connection(spectator, game_id)
+
+    # Names, traits and host lines come from the global generator
+    random.seed(seed)
+    start = time.perf_counter()
+    game_state = await setup_game(
+        manager, num_agents=num_agents, game_id=game_id, journal_dir=None
+    )
+    setup_seconds = time.perf_counter() - start
+    game_state.stream_responses = stream_responses
+
+    await game_state.start()
+    while game_state.round_phase != "game_over":
+        await game_state.run_round()
+    seconds = time.perf_counter() - start
+
+    # Let the spectators receive the last frames
+    for _ in range(1000):
+        if all(not c.depth for c in manager.clients.values()):
+            break
+        await asyncio.sleep(0.001)
+
+    sent_at = manager.sent_at.pop(game_id, {})
+    delivery_ms = [
+        (arrived - sent_at[seq]) * 1000
+        for spectator in spectators
+        for seq, arrived in spectator.arrived_at.items()
+        if seq in sent_at
+    ]
+    phases = game_state.metrics.summary().values()
+    manager.forget(game_id)
+    forget_game_metrics(game_id)
+    return {
+        "seconds": seconds,
+        "setup_seconds": setup_seconds,
+        "rounds": game_state.round,
+        "messages": len(game_state.transcript),
+        "delivery_ms": delivery_ms,
+        "prompt_tokens": sum(p["prompt_tokens"] for p in phases),
+        "cached_tokens": sum(p["cached_tokens"] for p in phases),
+    }
+
+
+async def run_games(
+    games: int,
+    concurrency: int,
+    num_agents: int = 6,
+    clients: int = 10,
+    client_delay: float = 0.0,
+    latency: str = "fixed:0",
+    seed: int = 0,
+    stream_responses: bool = False,
+    memecoin_cache: bool = False,
+) -> Dict:
+    """Play games with the fake backend and collect the benchmark metrics
+
+    Memecoins are generated for every character unless memecoin_cache is set,
+    which serves them from an in-memory cache that starts out empty.
+    """
+    backend = RecordingBackend(FakeBackend(seed=seed, latency=latency))
+    set_model_backend(backend)
+    set_memecoin_cache(MemecoinCache(":memory:" if memecoin_cache else ""))
+    manager = TimedWebSocketManager()
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Dict] = []
+
+    async def play(i: int):
+        async with semaphore:
+            result = await _play(
+                manager,
+                f"bench-{i}",
+                num_agents,
+                clients,
+                client_delay,
+                seed + i,
+                stream_responses,
+            )
+            results.append(result)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[play(i) for i in range(games)])
+    elapsed = time.perf_counter() - start
+
+    calls = sum(backend.calls.values())
+    delivery = [ms for result in results for ms in result["delivery_ms"]]
+    return {
+        "games": games,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "games_per_second": round(games / elapsed, 2),
+        "game_seconds_p50": round(_percentile([r["seconds"] for r in results], 50), 4),
+        "setup_seconds_p50": round(
+            _percentile([r["setup_seconds"] for r in results], 50), 4
+        ),
+        "rounds_per_game": round(sum(r["rounds"] for r in results) / games, 2),
+        "phase_seconds": {
+            phase: round(seconds / games, 4)
+            for phase, seconds in sorted(manager.phase_seconds.items())
+        },
+        "llm_calls_per_game": round(calls / games, 2),
+        "llm_calls_by_kind": {k: round(v / games, 2) for k, v in backend.calls.items()},
+        "prompt_bytes_per_call": round(backend.prompt_bytes / max(1, calls)),
+        "cached_prompt_share": round(
+            sum(r["cached_tokens"] for r in results)
+            / max(1, sum(r["prompt_tokens"] for r in results)),
+            3,
+        ),
+        "messages_per_game": round(sum(r["messages"] for r in results) / games, 2),
+        "broadcasts": len(manager.broadcast_ms),
+        "broadcasts_per_game": round(len(manager.broadcast_ms) / games, 2),
+        "broadcast_p50_ms": round(_percentile(manager.broadcast_ms, 50), 3),
+        "broadcast_p95_ms": round(_percentile(manager.broadcast_ms, 95), 3),
+        "broadcast_p99_ms": round(_percentile(manager.broadcast_ms, 99), 3),
+        "delivery_p50_ms": round(_percentile(delivery, 50), 3) if delivery else None,
+        "delivery_p95_ms": round(_percentile(delivery, 95), 3) if delivery else None,
+    }
+
+
+async def measure_peak_memory(num_agents: int, clients: int, seed: int) -> float:
+    """Peak Python heap of one game in MB, measured apart since tracing is slow"""
+    set_model_backend(FakeBackend(seed=seed, latency="fixed:0"))
+    set_memecoin_cache(MemecoinCache(""))
+    manager = TimedWebSocketManager()
+    tracemalloc.start()
+    try:
+        await _play(manager, "bench-memory", num_agents, clients, 0.0, seed, False)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024 / 1024, 2)
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Metrics that are worse than the baseline by more than the tolerance"""
+    regressions = []
+    for metric, (higher_is_better, noise) in COMPARED_METRICS.items():
+        current, previous = result.get(metric), baseline.get(metric)
+        if current is None or not previous or abs(current - previous) <= noise:
+            continue
+        change = (current - previous) / previous
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(
+                f"{metric}: {previous} -> {current} ({change * 100:+.1f}%)"
+            )
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    result = await run_games(
+        args.games,
+        args.concurrency,
+        num_agents=args.agents,
+        clients=args.clients,
+        client_delay=args.client_delay,
+        latency=args.latency,
+        seed=args.seed,
+        stream_responses=args.stream,
+        memecoin_cache=args.memecoin_cache,
+    )
+    result["peak_memory_mb"] = await measure_peak_memory(
+        args.agents, args.clients, args.seed
+    )
+
+    print(f"{'games':<24} {result['games']} ({result['concurrency']} at a time)")
+    print(f"{'wall time':<24} {result['seconds']}s")
+    print(f"{'games per second':<24} {result['games_per_second']}")
+    print(f"{'game time p50':<24} {result['game_seconds_p50']}s")
+    print(f"{'setup time p50':<24} {result['setup_seconds_p50']}s")
+    print(f"{'rounds per game':<24} {result['rounds_per_game']}")
+    for phase, seconds in result["phase_seconds"].items():
+        print(f"{'  ' + phase:<24} {seconds}s per game")
+    print(f"{'LLM calls per game':<24} {result['llm_calls_per_game']}")
+    for kind, calls in result["llm_calls_by_kind"].items():
+        print(f"{'  ' + kind:<24} {calls}")
+    print(f"{'prompt bytes per call':<24} {result['prompt_bytes_per_call']}")
+    print(f"{'cached prompt share':<24} {result['cached_prompt_share']}")
+    print(f"{'messages per game':<24} {result['messages_per_game']}")
+    print(f"{'broadcasts per game':<24} {result['broadcasts_per_game']}")
+    print(
+        f"{'broadcast ms':<24} p50 {result['broadcast_p50_ms']} "
+        f"p95 {result['broadcast_p95_ms']} p99 {result['broadcast_p99_ms']}"
+    )
+    print(
+        f"{'delivery ms':<24} p50 {result['delivery_p50_ms']} "
+        f"p95 {result['delivery_p95_ms']}"
+    )
+    print(f"{'peak memory':<24} {result['peak_memory_mb']} MB")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save-baseline to store one")
+        return 0
+
+    regressions = compare(result, json.loads(args.baseline.read_text()), args.tolerance)
+    if regressions:
+        print(f"Regressions against {args.baseline.name}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"No regressions against {args.baseline.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Games played at the same time"
+    )
+    parser.add_argument("--agents", type=int, default=6)
+    parser.add_argument("--clients", type=int, default=10, help="Spectators per game")
+    parser.add_argument(
+        "--client-delay",
+        type=float,
+        default=0.0,
+        help="Seconds a client takes per frame",
+    )
+    parser.add_argument(
+        "--latency", default="fixed:0", help="Fake LLM latency, e.g. lognormal:0.8,0.5"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--stream", action="store_true", help="Stream agent responses as deltas"
+    )
+    parser.add_argument(
+        "--memecoin-cache",
+        action="store_true",
+        help="Serve memecoins from a cache instead of generating each one",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store this run as the baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.05,
+        help="Allowed relative regression before the run fails",
+    )
+    parser.add_argument("--json", help="Also write the results to this file")
+    sys.exit(asyncio.run(main(parser.parse_args())))
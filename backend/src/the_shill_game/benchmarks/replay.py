@@ -0,0 +1,139 @@
+"""
+Replay throughput of game journals, and a check that replays match the games.
+
+    python -m the_shill_game.benchmarks.replay [--games 10] [--repeat 20]
+    python -m the_shill_game.benchmarks.replay data/games/<game_id>.jsonl ...
+
+Without journal files, plays games with the fake model backend into a
+temporary directory first, then checks that replaying each journal rebuilds
+the transcript, players and WebSocket messages of the live game. Reports how
+many events per second the replay engine applies.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from the_shill_game.agent.memecoin_cache import MemecoinCache, set_memecoin_cache
+from the_shill_game.game.journal import GameJournal
+from the_shill_game.game.replay import GameReplay
+from the_shill_game.game.setup import setup_game
+from the_shill_game.game.state import GameState
+from the_shill_game.game.websocket import WebSocketManager
+from the_shill_game.utils.backend import set_model_backend
+from the_shill_game.utils.fake_backend import FakeBackend
+from the_shill_game.utils.metrics import forget_game_metrics
+
+# Fields of the recorded WebSocket messages a replay must reproduce
+_MESSAGE_FIELDS = (
+    "type",
+    "sender",
+    "response",
+    "thought",
+    "content",
+    "event",
+    "voter",
+    "target",
+    "counts",
+    "leaders",
+    "tied",
+    "timeouts",
+)
+
+
+def _message_fields(payload: Dict) -> tuple:
+    return tuple(payload.get(field) for field in _MESSAGE_FIELDS)
+
+
+async def _play(directory: str, game_id: str, seed: int) -> List[str]:
+    """Play a journaled game and return its problems after replaying it"""
+    manager = WebSocketManager()
+    random.seed(seed)
+    game_state = await setup_game(manager, game_id=game_id, journal_dir=directory)
+    await game_state.start()
+    while game_state.round_phase != "game_over":
+        await game_state.run_round()
+    await game_state.generate_winner_takeaway()
+    game_state.journal.close()
+
+    replayed = GameReplay.from_journal(GameJournal(game_id, directory)).state_at()
+    problems = []
+    if replayed.transcript.lines() != game_state.messages:
+        problems.append("transcript")
+    if replayed.active != [a.character.id for a in game_state.active_agents]:
+        problems.append("active players")
+    if replayed.takeaway != game_state.winner_takeaway:
+        problems.append("takeaway")
+    live = [
+        _message_fields(json.loads(payload))
+        for _, _, payload in manager.message_history[game_id]._frames
+    ]
+    messages = GameReplay.from_journal(GameJournal(game_id, directory)).messages()
+    if [_message_fields(m.model_dump()) for m in messages] != live:
+        problems.append("websocket messages")
+
+    restored = GameState.restore(GameJournal(game_id, directory), WebSocketManager())
+    if restored.context.render() != game_state.context.render():
+        problems.append("restored context")
+    manager.forget(game_id)
+    forget_game_metrics(game_id)
+    return problems
+
+
+def measure(journals: List[GameJournal], repeat: int) -> Dict:
+    """Replay every journal `repeat` times and return the throughput"""
+    replays = [GameReplay.from_journal(journal) for journal in journals]
+    events = sum(len(replay) for replay in replays) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for replay in replays:
+            replay.state_at()
+    seconds = time.perf_counter() - start
+    return {
+        "journals": len(journals),
+        "events": events,
+        "seconds": round(seconds, 4),
+        "events_per_second": round(events / seconds) if seconds else None,
+    }
+
+
+async def main(args: argparse.Namespace) -> int:
+    failures = 0
+    if args.journals:
+        journals = [GameJournal(path.stem, str(path.parent)) for path in args.journals]
+    else:
+        set_model_backend(FakeBackend(seed=args.seed, latency="fixed:0"))
+        set_memecoin_cache(MemecoinCache(""))
+        directory = tempfile.mkdtemp(prefix="shill-journals-")
+        journals = []
+        for i in range(args.games):
+            game_id = f"replay-{i}"
+            problems = await _play(directory, game_id, args.seed + i)
+            if problems:
+                failures += 1
+                print(f"{game_id}: replay differs in {', '.join(problems)}")
+            journals.append(GameJournal(game_id, directory))
+        print(f"{'games replayed exactly':<24} {args.games - failures}/{args.games}")
+
+    result = measure(journals, args.repeat)
+    print(f"{'journals':<24} {result['journals']}")
+    print(f"{'events replayed':<24} {result['events']}")
+    print(f"{'events per second':<24} {result['events_per_second']}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "journals", nargs="*", type=Path, help="Journal files to replay"
+    )
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20, help="Replays per journal")
+    parser.add_argument("--seed", type=int, default=0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
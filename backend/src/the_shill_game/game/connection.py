@@ -0,0 +1,173 @@
+import asyncio
+import os
+from collections import deque
+from typing import Callable, Deque, Dict, Literal, Optional
+
+from fastapi import WebSocket
+
+from the_shill_game.utils.logger import logger
+
+# Frames a client may fall behind before the overflow policy kicks in
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "256"))
+# drop_oldest: forget the oldest queued frame
+# coalesce: merge or drop superseded streaming deltas first, then the oldest frame
+# disconnect: drop the client
+WS_OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", "coalesce")
+
+OverflowPolicy = Literal["drop_oldest", "coalesce", "disconnect"]
+
+
+class OutboundFrame:
+    """A serialized message waiting to be sent"""
+
+    __slots__ = ("payload", "message")
+
+    def __init__(self, payload: str, message=None):
+        self.payload = payload
+        # The message the payload was serialized from, used for coalescing
+        self.message = message
+
+    @property
+    def is_delta(self) -> bool:
+        return getattr(self.message, "type", None) == "agent_delta"
+
+
+def _merge_deltas(
+    first: OutboundFrame, second: OutboundFrame
+) -> Optional[OutboundFrame]:
+    """Merge two consecutive delta frames of the same stream into one"""
+    if not (first.is_delta and second.is_delta):
+        return None
+    a, b = first.message, second.message
+    if a.stream_id != b.stream_id or a.offset + len(a.delta) != b.offset:
+        return None
+    merged = a.model_copy(update={"delta": a.delta + b.delta})
+    return OutboundFrame(merged.model_dump_json(), merged)
+
+
+class ClientConnection:
+    """A client socket with its own bounded outbound queue and writer task
+
+    Producers only ever enqueue, so a client that stops reading can't stall
+    the game. What happens once the queue is full is up to the overflow policy.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_failure: Callable[["ClientConnection"], None],
+        send_timeout: float,
+        max_queue: int = WS_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = WS_OVERFLOW_POLICY,
+    ):
+        if overflow_policy not in ("drop_oldest", "coalesce", "disconnect"):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.max_queue = max(1, max_queue)
+        self.overflow_policy = overflow_policy
+        self._on_failure = on_failure
+        self._queue: Deque[OutboundFrame] = deque()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+        # Counters
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of frames waiting to be sent"""
+        return len(self._queue)
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def stop(self):
+        """Stop the writer. Queued frames are discarded"""
+        self.closed = True
+        self._queue.clear()
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    def enqueue(self, frame: OutboundFrame) -> bool:
+        """Queue a frame without waiting
+
+        Returns False when the client has to be disconnected.
+        """
+        if self.closed:
+            return False
+
+        if len(self._queue) >= self.max_queue:
+            if self.overflow_policy == "disconnect":
+                logger.warning("Disconnecting a client whose outbound queue is full")
+                return False
+            if self.overflow_policy == "coalesce":
+                merged = _merge_deltas(self._queue[-1], frame)
+                if merged:
+                    self._queue[-1] = merged
+                    self.coalesced += 1
+                    return True
+                # Deltas are superseded by the final message of their stream
+                if not self._drop_first_delta():
+                    self._drop_oldest()
+            else:
+                self._drop_oldest()
+
+        self._queue.append(frame)
+        self._ready.set()
+        return True
+
+    def _drop_oldest(self):
+        self._queue.popleft()
+        self.dropped += 1
+
+    def _drop_first_delta(self) -> bool:
+        for i, queued in enumerate(self._queue):
+            if queued.is_delta:
+                del self._queue[i]
+                self.dropped += 1
+                return True
+        return False
+
+    async def _write_loop(self):
+        while not self.closed:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            frame = self._queue.popleft()
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(frame.payload), self.send_timeout
+                )
+                self.sent += 1
+            except asyncio.TimeoutError:
+                logger.warning("Disconnecting a client that is too slow to keep up")
+                await self._fail(code=1008)
+                return
+            except Exception as e:
+                logger.error(f"Error sending message: {e}")
+                await self._fail(code=1011)
+                return
+
+    async def _fail(self, code: int):
+        self._on_failure(self)
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), self.send_timeout)
+        except Exception:
+            pass
+
+    def stats(self) -> Dict:
+        client = getattr(self.websocket, "client", None)
+        return {
+            "client": f"{client.host}:{client.port}" if client else None,
+            "depth": self.depth,
+            "max_queue": self.max_queue,
+            "overflow_policy": self.overflow_policy,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,273 @@
+import asyncio
+import os
+from collections import deque
+from typing import Callable, Deque, List, Optional, Sequence, Tuple
+
+from the_shill_game.utils.logger import logger
+from the_shill_game.utils.model import invoke_chat_response
+
+# Token budget of the transcript part of an agent prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+# Share of the budget the round summaries may take before they are folded together
+CONTEXT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CONTEXT_SUMMARY_TOKEN_BUDGET", "1000"))
+CONTEXT_SUMMARY_MODEL = os.getenv("CONTEXT_SUMMARY_MODEL", "gpt-4o-mini")
+# Share of the budget freed at once when the oldest lines slide out of the window.
+# Sliding in steps keeps the start of the prompt identical for many turns, which
+# is what provider prompt caching keys on
+CONTEXT_WINDOW_SLACK = float(os.getenv("CONTEXT_WINDOW_SLACK", "0.25"))
+
+_summary_instruction = (
+    "You are the record keeper of The Shill Game, a social survival show where memecoin founders "
+    "persuade, betray and vote each other out. Summarize the transcript you are given in at most "
+    "{max_words} words. Keep who said what about whom, alliances made or broken, accusations, "
+    "every vote and every elimination. Refer to players by name. No commentary."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, about four characters per token for English text"""
+    return len(text) // 4 + 1
+
+
+class _Segment:
+    """The lines of one round"""
+
+    def __init__(self, round: int):
+        self.round = round
+        self.lines: List[str] = []
+        self.tokens = 0
+
+
+class ContextSnapshot:
+    """Frozen rendering of a conversation at one point in time"""
+
+    def __init__(self, text: str):
+        self._text = text
+
+    def render(self) -> str:
+        return self._text
+
+
+class ConversationContext:
+    """Bounded view of a game's conversation for agent prompts
+
+    Lines are appended as they are spoken. Completed rounds that no longer fit
+    the token budget are replaced by short LLM-generated summaries, and the
+    rendered transcript always keeps the most recent lines within the budget.
+    The rendering only grows at the end until the window has to slide, so
+    consecutive prompts share their prefix.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        summary_token_budget: int = CONTEXT_SUMMARY_TOKEN_BUDGET,
+        summary_model: str = CONTEXT_SUMMARY_MODEL,
+        window_slack: float = CONTEXT_WINDOW_SLACK,
+    ):
+        self.token_budget = token_budget
+        self.window_slack = window_slack
+        self.summary_token_budget = summary_token_budget
+        self.summary_model = summary_model
+
+        # Lines kept in every prompt, e.g. the show background
+        self._pinned: List[str] = []
+        self._pinned_tokens = 0
+        # (label, text) of summarized rounds, oldest first
+        self._summaries: List[Tuple[str, str]] = []
+        self._summary_tokens = 0
+        # Last round that was replaced by its summary
+        self.summarized_through = -1
+        # Called after a compaction changed the summaries
+        self.on_compacted: Optional[Callable[[], None]] = None
+        # Rounds that are still kept verbatim, oldest first
+        self._segments: Deque[_Segment] = deque([_Segment(0)])
+        self._live_tokens = 0
+        # Oldest verbatim lines that slid out of the window
+        self._skipped_lines = 0
+        self._skipped_tokens = 0
+
+        self._rendered: Optional[str] = None
+        self._compaction_task: Optional[asyncio.Task] = None
+
+    @property
+    def current_round(self) -> int:
+        return self._segments[-1].round
+
+    @property
+    def summaries(self) -> List[Tuple[str, str]]:
+        """(label, text) of the summarized rounds, oldest first"""
+        return list(self._summaries)
+
+    @property
+    def live_tokens(self) -> int:
+        """Tokens of the rounds kept verbatim"""
+        return self._live_tokens
+
+    def pin(self, line: str):
+        """Keep a line at the top of every prompt"""
+        self._pinned.append(line)
+        self._pinned_tokens += estimate_tokens(line)
+        self._rendered = None
+
+    def append(self, line: str):
+        """Append a spoken line to the current round"""
+        tokens = estimate_tokens(line)
+        segment = self._segments[-1]
+        segment.lines.append(line)
+        segment.tokens += tokens
+        self._live_tokens += tokens
+
+        if self._rendered is not None and self._window_fits():
+            # Cheap path: the cached prompt only grows by one line
+            self._rendered += "\n" + line
+        else:
+            self._rendered = None
+
+    def start_round(self, round: int):
+        """Start collecting lines for a new round"""
+        if self._segments[-1].lines:
+            self._segments.append(_Segment(round))
+        else:
+            self._segments[-1].round = round
+
+    def render(self) -> str:
+        """Render the pinned lines, round summaries and the latest lines within budget"""
+        if self._rendered is None:
+            self._rendered = self._render()
+        return self._rendered
+
+    def snapshot(self, pending: Sequence[str] = ()) -> ContextSnapshot:
+        """Freeze the current rendering, unaffected by lines appended later
+
+        Args:
+            pending: Lines not spoken yet to render after the conversation
+        """
+        return ContextSnapshot("\n".join([self.render(), *pending]))
+
+    def _fits_budget(self) -> bool:
+        used = self._pinned_tokens + self._summary_tokens + self._live_tokens
+        return used <= self.token_budget
+
+    def _window_fits(self) -> bool:
+        used = (
+            self._pinned_tokens
+            + self._summary_tokens
+            + self._live_tokens
+            - self._skipped_tokens
+        )
+        return used <= self.token_budget
+
+    def _render(self) -> str:
+        sections = list(self._pinned)
+        if self._summaries:
+            sections.append("[Summary of earlier rounds]")
+            sections.extend(f"- {label}: {text}" for label, text in self._summaries)
+            sections.append("[Latest messages]")
+
+        # Window over the verbatim lines. When it overflows, the oldest lines
+        # slide out until the slack is free, not just enough for one more line
+        remaining = self.token_budget - self._pinned_tokens - self._summary_tokens
+        lines = [line for segment in self._segments for line in segment.lines]
+        visible = self._live_tokens - self._skipped_tokens
+        if visible > remaining:
+            target = remaining - int(self.token_budget * self.window_slack)
+            while visible > target and self._skipped_lines < len(lines) - 1:
+                tokens = estimate_tokens(lines[self._skipped_lines])
+                self._skipped_lines += 1
+                self._skipped_tokens += tokens
+                visible -= tokens
+        window = lines[self._skipped_lines :]
+
+        return "\n".join(sections + window)
+
+    def schedule_compaction(self):
+        """Summarize overflowing rounds in the background"""
+        if self._compaction_task and not self._compaction_task.done():
+            return
+        self._compaction_task = asyncio.create_task(self.compact())
+
+    async def compact(self):
+        """Replace the oldest completed rounds by summaries until the budget fits"""
+        changed = False
+        # The current round is never summarized
+        while len(self._segments) > 1 and not self._fits_budget():
+            segment = self._segments[0]
+            label = "Intro" if segment.round == 0 else f"Round {segment.round}"
+            summary = await self._summarize(segment.lines)
+            if not summary:
+                # Keep the round verbatim and try again at the next compaction,
+                # the sliding window bounds the prompt meanwhile
+                break
+
+            self._drop_segment()
+            self._summaries.append((label, summary))
+            self._summary_tokens += estimate_tokens(f"- {label}: {summary}")
+            changed = True
+
+        # Fold the older summaries together once they take too much room
+        if (
+            len(self._summaries) > 1
+            and self._summary_tokens > self.summary_token_budget
+        ):
+            folded = self._summaries[:-1]
+            summary = await self._summarize(
+                [f"{label}: {text}" for label, text in folded]
+            )
+            if summary:
+                first = folded[0][0].split(" to ")[0]
+                label = f"{first} to {folded[-1][0]}"
+                self._summaries = [(label, summary)] + self._summaries[len(folded) :]
+                self._summary_tokens = sum(
+                    estimate_tokens(f"- {label}: {text}")
+                    for label, text in self._summaries
+                )
+                self._rendered = None
+                changed = True
+
+        if changed and self.on_compacted:
+            self.on_compacted()
+
+    def load_summaries(self, summaries: List[Tuple[str, str]], through_round: int):
+        """Take over the summaries of an earlier compaction, without the model
+
+        The rounds up to through_round are dropped like compaction drops them.
+        """
+        while len(self._segments) > 1 and self._segments[0].round <= through_round:
+            self._drop_segment()
+        self._summaries = [(label, text) for label, text in summaries]
+        self._summary_tokens = sum(
+            estimate_tokens(f"- {label}: {text}") for label, text in self._summaries
+        )
+        self._rendered = None
+
+    def _drop_segment(self):
+        segment = self._segments.popleft()
+        self._live_tokens -= segment.tokens
+        self._forget_skipped(segment)
+        self.summarized_through = segment.round
+        self._rendered = None
+
+    def _forget_skipped(self, segment: _Segment):
+        """Account for a summarized segment in the lines that slid out"""
+        if self._skipped_lines >= len(segment.lines):
+            self._skipped_lines -= len(segment.lines)
+            self._skipped_tokens -= segment.tokens
+        else:
+            skipped = segment.lines[: self._skipped_lines]
+            self._skipped_tokens -= sum(estimate_tokens(line) for line in skipped)
+            self._skipped_lines = 0
+
+    async def _summarize(self, lines: List[str]) -> str:
+        max_words = max(40, self.summary_token_budget // 4)
+        try:
+            response = await invoke_chat_response(
+                input="\n".join(lines),
+                instruction=_summary_instruction.format(max_words=max_words),
+                model=self.summary_model,
+            )
+            return response.strip().replace("\n", " ")
+        except Exception as e:
+            # The sliding window still bounds the prompt without a summary
+            logger.error(f"Failed to summarize conversation: {e}")
+            return ""
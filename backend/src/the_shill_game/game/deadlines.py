@@ -0,0 +1,98 @@
+import os
+import random
+import time
+from typing import Dict, List, Literal, Optional, Tuple
+
+from the_shill_game.agent.character import Character
+
+# Seconds an agent gets for a speaking turn or a vote before the fallback is
+# used. The defaults sit well above the p99 latency of a model call, so in a
+# normal game they only cut off calls that hang. 0 for no limit
+TURN_TIMEOUT_SECONDS = float(os.getenv("TURN_TIMEOUT_SECONDS", "60"))
+VOTE_TIMEOUT_SECONDS = float(os.getenv("VOTE_TIMEOUT_SECONDS", "60"))
+# Seconds of agent turns and votes a phase may take in total. Once it is used
+# up, the remaining turns of the phase fall back without calling a model. With
+# the turn limit, this bounds how long a round can take. 0 for no limit
+PHASE_TIMEOUT_SECONDS = float(os.getenv("PHASE_TIMEOUT_SECONDS", "600"))
+# What a speaking turn that ran out of time becomes: a canned line in the
+# agent's voice, or nothing at all. Votes always fall back to a random target
+TURN_TIMEOUT_FALLBACK = os.getenv("TURN_TIMEOUT_FALLBACK", "canned")
+
+TimeoutFallback = Literal["canned", "skip"]
+
+# Phases that only wrap other phases, and get no budget of their own
+_UNBUDGETED_PHASES = {"round_completed", "game_over"}
+
+# Lines ready for an agent that didn't answer in time
+_l_canned_lines = [
+    "{memecoin} speaks for itself. I'll let the chart do the talking.",
+    "I'm not wasting words on this. ${symbol} holders know what's up.",
+    "Say what you want, {memecoin} isn't going anywhere and neither am I.",
+    "Hold on, I'm still watching the ${symbol} candles. Carry on.",
+    "You'll all hear from me when it matters. {memecoin} to the moon.",
+]
+
+
+def canned_line(character: Character) -> str:
+    """A line in the character's name that needs no model call"""
+    symbol = character.memecoin.symbol.lstrip("$")
+    return random.choice(_l_canned_lines).format(
+        memecoin=character.memecoin.name, symbol=symbol
+    )
+
+
+class PhaseDeadlines:
+    """Time budgets and timeout counts of the phases that are running
+
+    Phases nest within a round, so a turn gets the least time left of any
+    open phase. A timeout counts toward every open phase, and each phase
+    reports its count when it ends. The end of a round reports every timeout
+    since the previous round ended, the first round and resumed rounds
+    included.
+    """
+
+    def __init__(self, phase_timeout: float = PHASE_TIMEOUT_SECONDS):
+        self.phase_timeout = phase_timeout
+        # (phase, deadline on the monotonic clock or None), innermost last
+        self._open: List[Tuple[str, Optional[float]]] = []
+        self._timeouts: Dict[str, int] = {}
+        self._round_timeouts = 0
+
+    def start(self, phase: str):
+        deadline = None
+        if self.phase_timeout and phase not in _UNBUDGETED_PHASES:
+            deadline = time.monotonic() + self.phase_timeout
+        self._open.append((phase, deadline))
+        self._timeouts[phase] = 0
+
+    def end(self, phase: str) -> int:
+        """Close a phase and return the turns that timed out in it"""
+        for i in range(len(self._open) - 1, -1, -1):
+            if self._open[i][0] == phase:
+                del self._open[i]
+                break
+        timeouts = self._timeouts.pop(phase, 0)
+        if phase == "round_completed":
+            timeouts, self._round_timeouts = self._round_timeouts, 0
+        return timeouts
+
+    def limits(self, limit: float) -> bool:
+        """Whether a turn with its own limit can run out of time at all"""
+        return bool(limit or self.phase_timeout)
+
+    def timeout(self, limit: float) -> Optional[float]:
+        """Seconds a turn with its own limit may take, None for no limit"""
+        if not self.limits(limit):
+            return None
+        now = time.monotonic()
+        remaining = [
+            deadline - now for _, deadline in self._open if deadline is not None
+        ]
+        if limit:
+            remaining.append(limit)
+        return max(0.0, min(remaining)) if remaining else None
+
+    def record_timeout(self):
+        self._round_timeouts += 1
+        for phase, _ in self._open:
+            self._timeouts[phase] += 1
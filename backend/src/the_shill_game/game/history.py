@@ -0,0 +1,68 @@
+import os
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Optional, Tuple
+
+# Broadcast frames kept per game for clients that join late or reconnect
+WS_HISTORY_SIZE = int(os.getenv("WS_HISTORY_SIZE", "1000"))
+
+
+class MessageHistory:
+    """Bounded ring buffer of the serialized frames broadcast to a game
+
+    Every recorded frame gets the next sequence number of the game. The buffer
+    is shared by all connections of the game, so its size doesn't depend on
+    how many clients there are.
+    """
+
+    def __init__(self, max_size: int = WS_HISTORY_SIZE):
+        # (seq, timestamp, payload), oldest first
+        self._frames: Deque[Tuple[int, int, str]] = deque(maxlen=max(1, max_size))
+        self.next_seq = 1
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def first_seq(self) -> Optional[int]:
+        """Sequence number of the oldest frame still kept"""
+        return self._frames[0][0] if self._frames else None
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the latest frame, 0 before the first one"""
+        return self.next_seq - 1
+
+    def claim_seq(self) -> int:
+        """Reserve the sequence number of the next frame"""
+        seq = self.next_seq
+        self.next_seq += 1
+        return seq
+
+    def append(self, seq: int, timestamp: int, payload: str):
+        self._frames.append((seq, timestamp, payload))
+
+    def since(
+        self, seq: Optional[int] = None, timestamp: Optional[int] = None
+    ) -> Tuple[List[str], bool]:
+        """Frames after a sequence number or after a timestamp in milliseconds
+
+        Returns the payloads and whether older frames the client missed have
+        already left the buffer.
+        """
+        if not self._frames:
+            return [], False
+
+        if seq is not None:
+            # Sequence numbers are contiguous, so the start is found by offset
+            start = max(0, seq + 1 - self._frames[0][0])
+            truncated = seq + 1 < self._frames[0][0]
+        else:
+            timestamp = timestamp or 0
+            start = len(self._frames)
+            while start > 0 and self._frames[start - 1][1] > timestamp:
+                start -= 1
+            truncated = start == 0 and self._frames[0][0] > 1
+
+        frames = [payload for _, _, payload in islice(self._frames, start, None)]
+        return frames, truncated
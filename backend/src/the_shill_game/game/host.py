@@ -195,7 +195,15 @@ def get_host_intro_message(
 
 
 def get_host_voting_message(
-    phase: Literal["intro", "cue", "announce_result", "final_vote", "tie_breaker"],
+    phase: Literal[
+        "intro",
+        "cue",
+        "sealed",
+        "reveal",
+        "announce_result",
+        "final_vote",
+        "tie_breaker",
+    ],
     current_speaker: str = "",
     most_voted_agents: List[str] = [],
 ) -> str:
@@ -203,6 +211,10 @@ def get_host_voting_message(
         return random.choice(_l_voting_intro)
     elif phase == "cue":
         return f"[Host] {current_speaker}, please cast your vote."
+    elif phase == "sealed":
+        return "[Host] Ballots are sealed this time. Everyone votes at once—no peeking at the others."
+    elif phase == "reveal":
+        return f"[Host] {current_speaker}, reveal your vote."
     elif phase == "announce_result":
         if len(most_voted_agents) == 1:
             return f"[Host] {most_voted_agents[0]} has received the most votes and will now enter the defense phase!"
@@ -250,19 +262,20 @@ def get_host_end_game_message(
         return random.choice(_l_end_game_closing)
 
 
-def eliminate_agent(agents: List[MemecoinAgent]) -> CharacterVoteResponse:
+async def eliminate_agent(agents: List[MemecoinAgent]) -> CharacterVoteResponse:
     """TODO: This is only for demo purpose"""
 
     input = "\n---\n".join(
         [
-            f"{i+1}. {a.character.name} is the founder of a memecoin called {a.character.memecoin.name}({a.character.memecoin.symbol}). The story of the memecoin is: {a.character.memecoin.backstory}"
+            f"{i + 1}. {a.character.name} is the founder of a memecoin called {a.character.memecoin.name}({a.character.memecoin.symbol}). The story of the memecoin is: {a.character.memecoin.backstory}"
             for i, a in enumerate(agents)
         ]
     )
 
-    response = invoke_structured_response(
+    response = await invoke_structured_response(
         instruction="You are the host of a game show. You are given a list of agents. You need to eliminate one of them.",
         input=input,
         response_format=CharacterVoteResponse,
+        choices=[a.character.name for a in agents],
     )
     return response
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+
+# Directory of the event logs games are resumed from. Empty disables them
+GAME_JOURNAL_DIR = os.getenv("GAME_JOURNAL_DIR", "data/games")
+# Sync every event to disk instead of leaving it to the OS, at some cost per line
+GAME_JOURNAL_FSYNC = os.getenv("GAME_JOURNAL_FSYNC", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+
+class GameJournal:
+    """Append-only event log of one game, one JSON object per line
+
+    The log starts with the setup of the game, followed by every transcript
+    entry and every phase event. Phase events carry a checkpoint of the votes
+    and players, so a game is restored by reading its log once instead of
+    rewriting a full snapshot after every phase.
+    """
+
+    def __init__(
+        self,
+        game_id: str,
+        directory: str = GAME_JOURNAL_DIR,
+        fsync: bool = GAME_JOURNAL_FSYNC,
+    ):
+        self.game_id = game_id
+        self.path = os.path.join(directory, f"{game_id}.jsonl")
+        self.fsync = fsync
+        self._file = None
+
+    @classmethod
+    def create(cls, game_id: str, directory: str = GAME_JOURNAL_DIR) -> "GameJournal":
+        """Start a new log, replacing the one of an earlier game with the same ID"""
+        journal = cls(game_id, directory)
+        os.makedirs(directory, exist_ok=True)
+        journal._file = open(journal.path, "w", encoding="utf-8")
+        return journal
+
+    @classmethod
+    def saved(cls, directory: str = GAME_JOURNAL_DIR) -> List["GameJournal"]:
+        """Logs of the games saved in a directory"""
+        if not directory or not os.path.isdir(directory):
+            return []
+        return [
+            cls(name[: -len(".jsonl")], directory)
+            for name in sorted(os.listdir(directory))
+            if name.endswith(".jsonl")
+        ]
+
+    @classmethod
+    def find(
+        cls, game_id: str, directory: str = GAME_JOURNAL_DIR
+    ) -> Optional["GameJournal"]:
+        """The log of a saved game, None if there is none"""
+        if not directory:
+            return None
+        journal = cls(game_id, directory)
+        return journal if os.path.isfile(journal.path) else None
+
+    def append(self, type: str, **data):
+        if self._file is None:
+            self._file = open(self.path, "a+", encoding="utf-8")
+            # Don't continue a line a crash cut short
+            if self._file.tell():
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != "\n":
+                    self._file.write("\n")
+        # Milliseconds, like the timestamps of the WebSocket messages
+        at = int(time.time() * 1000)
+        self._file.write(json.dumps({"type": type, "at": at, **data}) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def events(self) -> Iterator[Dict]:
+        """The events of the log, oldest first
+
+        Lines cut short by a crash are skipped.
+        """
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def delete(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
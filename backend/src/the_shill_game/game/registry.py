@@ -0,0 +1,214 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from the_shill_game.game.journal import GAME_JOURNAL_DIR, GameJournal
+from the_shill_game.game.state import GameState
+from the_shill_game.game.websocket import WebSocketManager
+from the_shill_game.utils.logger import logger
+from the_shill_game.utils.metrics import forget_game_metrics
+
+# Maximum number of games held by one process
+GAME_CAPACITY = int(os.getenv("GAME_CAPACITY", "500"))
+# Games without activity, connections or a running round for this long are
+# unloaded. Their journal is kept, so they are loaded again when next used
+GAME_IDLE_TIMEOUT_SECONDS = float(os.getenv("GAME_IDLE_TIMEOUT_SECONDS", "1800"))
+GAME_REAPER_INTERVAL_SECONDS = float(os.getenv("GAME_REAPER_INTERVAL_SECONDS", "60"))
+
+DEFAULT_GAME_ID = "default"
+
+
+class GameCapacityError(Exception):
+    """Raised when a new game would exceed the registry capacity"""
+
+
+class GameEntry:
+    """A game slot in the registry"""
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.state: Optional[GameState] = None
+        # Serializes setup and round control of this game
+        self.lock = asyncio.Lock()
+        self.is_initializing = False
+        # The running game or round, if any
+        self.task: Optional[asyncio.Task] = None
+        self.created_at = time.monotonic()
+        self.last_active = self.created_at
+
+    def touch(self):
+        """Mark the game as recently used"""
+        self.last_active = time.monotonic()
+
+    @property
+    def is_running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
+class GameRegistry:
+    """Games of this process, keyed by game ID"""
+
+    def __init__(
+        self,
+        ws_manager: WebSocketManager,
+        capacity: int = GAME_CAPACITY,
+        idle_timeout: float = GAME_IDLE_TIMEOUT_SECONDS,
+        journal_dir: str = GAME_JOURNAL_DIR,
+    ):
+        self.ws_manager = ws_manager
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        # Where the games of this registry are journaled and loaded from
+        self.journal_dir = journal_dir
+        self._games: Dict[str, GameEntry] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def get(self, game_id: str) -> Optional[GameEntry]:
+        """Look a game up, marking it as active
+
+        A game that was unloaded while idle is loaded back from its journal.
+        """
+        entry = self._games.get(game_id) or self._load(game_id)
+        if entry:
+            entry.touch()
+        return entry
+
+    def find(self, game_id: str) -> Optional[GameEntry]:
+        """Look a game up for a client request
+
+        Only the default game is created on demand. Other games must have been
+        created with create(), so clients can't fill the registry by making up
+        game IDs.
+        """
+        entry = self.get(game_id)
+        if entry is None and game_id == DEFAULT_GAME_ID:
+            return self.create(game_id)
+        return entry
+
+    def create(self, game_id: Optional[str] = None) -> GameEntry:
+        """Create a game slot, or return the existing one with that ID"""
+        game_id = game_id or uuid4().hex
+        if game_id in self._games:
+            return self.get(game_id)
+
+        if len(self._games) >= self.capacity:
+            # Make room from idle games before turning the request down
+            self.expire_idle()
+            if len(self._games) >= self.capacity:
+                raise GameCapacityError(
+                    f"Game capacity reached ({self.capacity} games)"
+                )
+
+        entry = GameEntry(game_id)
+        self._games[game_id] = entry
+        logger.info(f"Created game {game_id} ({len(self._games)}/{self.capacity})")
+        return entry
+
+    def remove(self, game_id: str):
+        """Drop a game, its message history and its metrics
+
+        The journal of a finished game is deleted. The journal of a game that
+        is not over yet is kept, to load the game again from it.
+        """
+        entry = self._games.pop(game_id, None)
+        if entry and entry.is_running:
+            entry.task.cancel()
+        if entry and entry.state and entry.state.journal:
+            if entry.state.round_phase == "game_over":
+                entry.state.journal.delete()
+            else:
+                entry.state.journal.close()
+        self.ws_manager.forget(game_id)
+        forget_game_metrics(game_id)
+
+    def _load(self, game_id: str) -> Optional[GameEntry]:
+        """Load a game from its journal, None if it has none"""
+        journal = GameJournal.find(game_id, self.journal_dir)
+        if journal is None:
+            return None
+        try:
+            state = GameState.restore(journal, self.ws_manager)
+            entry = self.create(game_id)
+        except GameCapacityError:
+            logger.warning(f"Registry is full, not loading game {game_id}")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to load game {game_id}: {e}")
+            return None
+        entry.state = state
+        logger.info(f"Loaded game {game_id} from its journal")
+        return entry
+
+    def restore(self) -> List[str]:
+        """Load the games saved in the journal directory and return their IDs
+
+        Restored games don't run until they are resumed.
+        """
+        restored = []
+        for journal in GameJournal.saved(self.journal_dir):
+            if journal.game_id in self._games:
+                continue
+            try:
+                state = GameState.restore(journal, self.ws_manager)
+            except Exception as e:
+                logger.error(f"Failed to restore game {journal.game_id}: {e}")
+                continue
+            try:
+                entry = self.create(journal.game_id)
+            except GameCapacityError:
+                logger.warning("Registry is full, not restoring more games")
+                break
+            entry.state = state
+            restored.append(journal.game_id)
+        return restored
+
+    def games(self) -> List[GameEntry]:
+        return list(self._games.values())
+
+    def is_idle(self, entry: GameEntry, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return (
+            now - entry.last_active > self.idle_timeout
+            and not entry.is_running
+            and not entry.is_initializing
+            and not self.ws_manager.has_connections(entry.game_id)
+        )
+
+    def expire_idle(self) -> List[str]:
+        """Unload idle games and return their IDs"""
+        now = time.monotonic()
+        expired = [
+            game_id
+            for game_id, entry in self._games.items()
+            if self.is_idle(entry, now)
+        ]
+        for game_id in expired:
+            self.remove(game_id)
+        if expired:
+            logger.info(f"Expired {len(expired)} idle games")
+        return expired
+
+    def start_reaper(self, interval: float = GAME_REAPER_INTERVAL_SECONDS):
+        """Expire idle games periodically in the background"""
+        if self._reaper and not self._reaper.done():
+            return
+
+        async def reap():
+            while True:
+                await asyncio.sleep(interval)
+                self.expire_idle()
+
+        self._reaper = asyncio.create_task(reap())
+
+    async def stop(self):
+        """Stop the reaper and cancel running games"""
+        if self._reaper:
+            self._reaper.cancel()
+        for entry in self._games.values():
+            if entry.is_running:
+                entry.task.cancel()
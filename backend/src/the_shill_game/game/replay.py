@@ -0,0 +1,270 @@
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from the_shill_game.game.journal import GameJournal
+from the_shill_game.game.transcript import Transcript
+from the_shill_game.game.votes import VoteTally, tally_message
+from the_shill_game.game.websocket import AgentMessage, SystemMessage, WsMessage
+
+
+class ReplayState:
+    """A game as rebuilt from its events, without agents or model calls"""
+
+    def __init__(self):
+        self.game_id: Optional[str] = None
+        self.sealed_ballots = False
+        # The setup entries of the agents: character and model
+        self.agents: List[Dict] = []
+        self.names: Dict[str, str] = {}
+
+        self.round = 0
+        self.round_phase: Optional[str] = None
+        # Agent IDs
+        self.active: List[str] = []
+        self.eliminated: List[str] = []
+        self.speaking_order: List[str] = []
+        self.most_voted: List[str] = []
+        self.tied: List[str] = []
+        # Voter ID -> ID of the agent voted for
+        self.votes: Dict[str, str] = {}
+
+        self.transcript = Transcript()
+        # Sequence numbers of the entries pinned to every prompt
+        self.pinned: Set[int] = set()
+        self.summaries: List[Tuple[str, str]] = []
+        self.summarized_through = -1
+        self.takeaway: Optional[str] = None
+
+        # (phase, state) of the last completed phase and the transcript length then
+        self.completed: Optional[Tuple[str, str]] = None
+        self._completed_length = 0
+        # Number of events applied
+        self.events = 0
+
+    @property
+    def winners(self) -> List[str]:
+        return self.active if self.round_phase == "game_over" else []
+
+    def summary(self) -> Dict:
+        def names(ids: List[str]) -> List[str]:
+            return [self.names.get(agent_id, agent_id) for agent_id in ids]
+
+        return {
+            "game_id": self.game_id,
+            "events": self.events,
+            "round": self.round,
+            "round_phase": self.round_phase,
+            "completed": self.completed,
+            "active_players": names(self.active),
+            "eliminated_players": names(self.eliminated),
+            "votes": {
+                self.names.get(voter, voter): self.names.get(target, target)
+                for voter, target in self.votes.items()
+            },
+            "messages": len(self.transcript),
+            "winners": names(self.winners),
+            "takeaway": self.takeaway,
+        }
+
+
+def is_checkpoint(event: Dict) -> bool:
+    """Whether a game can be resumed right after the event"""
+    return event["type"] == "phase" and (
+        event["state"] == "ended" or event["phase"] == "round_completed"
+    )
+
+
+def _setup(state: ReplayState, event: Dict):
+    state.game_id = event["game_id"]
+    state.sealed_ballots = event["sealed_ballots"]
+    state.agents = event["agents"]
+    state.names = {
+        agent["character"]["id"]: agent["character"]["name"] for agent in state.agents
+    }
+    state.active = list(state.names)
+
+
+def _entry(state: ReplayState, event: Dict):
+    entry = state.transcript.append(
+        event["text"],
+        event["kind"],
+        event["round"],
+        event["phase"],
+        event["sender_id"],
+        event["sender"],
+        event["thought"],
+    )
+    if event["pin"]:
+        state.pinned.add(entry.seq)
+
+
+def _phase(state: ReplayState, event: Dict):
+    checkpoint = event["checkpoint"]
+    state.round = checkpoint["round"]
+    state.round_phase = checkpoint["round_phase"]
+    state.active = checkpoint["active"]
+    state.eliminated = checkpoint["eliminated"]
+    state.speaking_order = checkpoint["speaking_order"]
+    state.most_voted = checkpoint["most_voted"]
+    state.tied = checkpoint["tied"]
+    state.votes = dict(checkpoint["votes"])
+    if is_checkpoint(event):
+        state.completed = (event["phase"], event["state"])
+        state._completed_length = len(state.transcript)
+
+
+def _vote(state: ReplayState, event: Dict):
+    state.votes[event["voter_id"]] = event["target_id"]
+
+
+def _elimination(state: ReplayState, event: Dict):
+    agent_id = event["agent_id"]
+    if agent_id in state.active:
+        state.active = [a for a in state.active if a != agent_id]
+        state.eliminated = state.eliminated + [agent_id]
+
+
+def _rewind(state: ReplayState, event: Dict):
+    # The interrupted phase runs again, its earlier lines no longer count
+    state.transcript.truncate(state._completed_length)
+    state.pinned = {seq for seq in state.pinned if seq < state._completed_length}
+
+
+def _summaries(state: ReplayState, event: Dict):
+    state.summaries = [tuple(summary) for summary in event["summaries"]]
+    state.summarized_through = event["through_round"]
+
+
+def _takeaway(state: ReplayState, event: Dict):
+    state.takeaway = event["text"]
+
+
+_APPLY: Dict[str, Callable[[ReplayState, Dict], None]] = {
+    "setup": _setup,
+    "entry": _entry,
+    "phase": _phase,
+    "vote": _vote,
+    "elimination": _elimination,
+    "rewind": _rewind,
+    "summaries": _summaries,
+    "takeaway": _takeaway,
+}
+
+
+# Events that were broadcast as one recorded frame each
+_FRAME_EVENTS = {"entry", "vote", "phase"}
+
+
+class GameReplay:
+    """Rebuilds a game at any point of its event log
+
+    Every state change and model output of a game is in its journal, so the
+    replay needs no model calls and costs a dictionary lookup per event.
+    """
+
+    def __init__(self, events: Sequence[Dict]):
+        self.events = events
+
+    @classmethod
+    def from_journal(cls, journal: GameJournal) -> "GameReplay":
+        return cls(list(journal.events()))
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def state_at(self, index: Optional[int] = None) -> ReplayState:
+        """The game after the first `index` events, after all of them by default"""
+        state = ReplayState()
+        for event in self.events[:index]:
+            apply = _APPLY.get(event["type"])
+            if apply:
+                apply(state, event)
+            state.events += 1
+        return state
+
+    def last_checkpoint(self) -> int:
+        """Number of events up to the end of the last completed phase"""
+        for i in range(len(self.events) - 1, -1, -1):
+            if is_checkpoint(self.events[i]):
+                return i + 1
+        # Only the setup
+        return min(1, len(self.events))
+
+    def frames_sent(self) -> int:
+        """Number of recorded WebSocket frames the game sent, over all its runs
+
+        Every entry, vote and phase event was broadcast as one frame, including
+        the ones of phases that were cut short and run again.
+        """
+        return sum(event["type"] in _FRAME_EVENTS for event in self.events)
+
+    def messages(self, index: Optional[int] = None) -> Iterator[WsMessage]:
+        """The WebSocket messages the game sent, as far as the first `index` events
+
+        Lines and votes of an interrupted phase are left out along with the
+        rewind that superseded them.
+        """
+        events = self.events[:index]
+        # Entries and votes dropped by a later rewind
+        dropped: Set[int] = set()
+        pending: List[int] = []
+        for i, event in enumerate(events):
+            if event["type"] in ("entry", "vote"):
+                pending.append(i)
+            elif event["type"] == "rewind":
+                dropped.update(pending)
+                pending = []
+            elif is_checkpoint(event):
+                pending = []
+
+        names: Dict[str, str] = {}
+        checkpoint: Dict = {}
+        tally = VoteTally()
+        for i, event in enumerate(events):
+            if i in dropped:
+                continue
+            if event["type"] == "setup":
+                names = {
+                    agent["character"]["id"]: agent["character"]["name"]
+                    for agent in event["agents"]
+                }
+            elif event["type"] == "entry":
+                yield _entry_message(event)
+            elif event["type"] == "vote":
+                previous = tally.add(event["voter_id"], event["target_id"])
+                message = tally_message(
+                    tally,
+                    checkpoint["round_phase"],
+                    lambda agent_id: names.get(agent_id, "Unknown"),
+                    len(checkpoint["active"]),
+                    event["voter_id"],
+                    event["target_id"],
+                    previous,
+                )
+                message.timestamp = event["at"]
+                yield message
+            elif event["type"] == "phase":
+                checkpoint = event["checkpoint"]
+                tally = VoteTally()
+                for voter_id, target_id in checkpoint["votes"].items():
+                    tally.add(voter_id, target_id)
+                yield SystemMessage(
+                    type="system",
+                    content="",
+                    event=f"{event['phase']}_{event['state']}",
+                    timeouts=event.get("timeouts"),
+                    timestamp=event["at"],
+                )
+
+
+def _entry_message(event: Dict) -> WsMessage:
+    if event["sender"] is None:
+        return SystemMessage(
+            type="system", content=event["text"], timestamp=event["at"]
+        )
+    return AgentMessage(
+        type="agent",
+        sender=event["sender"],
+        response=event["text"],
+        thought=event["thought"] or "",
+        timestamp=event["at"],
+    )
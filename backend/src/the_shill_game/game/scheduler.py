@@ -0,0 +1,253 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Literal, Optional, Tuple
+
+from the_shill_game.agent.character import CharacterResponse
+from the_shill_game.agent.memecoin_agent import ConversationView, MemecoinAgent
+from the_shill_game.game.context import ConversationContext
+from the_shill_game.game.websocket import CharacterStream
+from the_shill_game.utils.logger import logger
+from the_shill_game.utils.routing import CallType
+
+# How many upcoming speakers start generating before their turn. 0 disables speculation
+TURN_LOOKAHEAD = int(os.getenv("TURN_LOOKAHEAD", "1"))
+# How many turns a speculative response may have missed before it counts as stale.
+# A response that missed a line mentioning its speaker is always stale
+TURN_MAX_STALE_TURNS = int(os.getenv("TURN_MAX_STALE_TURNS", "1"))
+# What to do with a stale response: use it anyway, or regenerate it on the fresh conversation
+TURN_STALE_POLICY = os.getenv("TURN_STALE_POLICY", "regenerate")
+
+StalePolicy = Literal["accept", "regenerate"]
+
+
+class _DeltaRelay:
+    """Holds streamed text back until its turn is live, then passes it on"""
+
+    def __init__(self, stream: Optional[CharacterStream], live: bool):
+        self.stream = stream
+        self.live = live
+        self._buffer: List[Tuple[str, int]] = []
+
+    async def __call__(self, delta: str, offset: int):
+        if self.live:
+            await self.stream.send_delta(delta, offset)
+        else:
+            self._buffer.append((delta, offset))
+
+    async def go_live(self):
+        # Deltas keep arriving while flushing, so flush until the buffer stays empty
+        while self._buffer:
+            chunks, self._buffer = self._buffer, []
+            for delta, offset in _merge_contiguous(chunks):
+                await self.stream.send_delta(delta, offset)
+        self.live = True
+
+
+def _merge_contiguous(chunks: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    """Join buffered deltas into as few frames as possible"""
+    merged: List[Tuple[str, int]] = []
+    for delta, offset in chunks:
+        if merged and merged[-1][1] + len(merged[-1][0]) == offset:
+            merged[-1] = (merged[-1][0] + delta, merged[-1][1])
+        else:
+            merged.append((delta, offset))
+    return merged
+
+
+class _PendingTurn:
+    """A response being generated ahead of its turn"""
+
+    def __init__(
+        self,
+        task: asyncio.Task,
+        seen_turns: int,
+        relay: _DeltaRelay,
+        call_type: CallType,
+    ):
+        self.task = task
+        # Number of turns already delivered when the snapshot was taken
+        self.seen_turns = seen_turns
+        self.relay = relay
+        self.call_type = call_type
+
+
+class TurnScheduler:
+    """Run a sequence of speaking turns with the next speakers generated ahead
+
+    While speaker k is generating or being broadcast, speakers k+1..k+lookahead
+    already generate against a snapshot of the conversation plus their own cue.
+    Responses that missed more than max_stale_turns turns, or missed a line
+    that mentions their speaker, are handled by the stale policy.
+
+    timeout_for returns the seconds the turn being awaited may still take. A
+    turn that takes longer is cancelled and replaced by its fallback.
+    """
+
+    def __init__(
+        self,
+        context: ConversationContext,
+        lookahead: int = TURN_LOOKAHEAD,
+        max_stale_turns: int = TURN_MAX_STALE_TURNS,
+        stale_policy: StalePolicy = TURN_STALE_POLICY,
+        timeout_for: Optional[Callable[[], Optional[float]]] = None,
+    ):
+        if stale_policy not in ("accept", "regenerate"):
+            raise ValueError(f"Unknown stale policy: {stale_policy}")
+        self.context = context
+        self.lookahead = max(0, lookahead)
+        self.max_stale_turns = max_stale_turns
+        self.stale_policy = stale_policy
+        self.timeout_for = timeout_for
+        # Counters for the last run
+        self.speculated = 0
+        self.regenerated = 0
+        self.timeouts = 0
+
+    async def run(
+        self,
+        turns: List[Tuple[MemecoinAgent, str]],
+        post_cue: Callable[[str], Awaitable[None]],
+        deliver: Callable[
+            [MemecoinAgent, CharacterResponse, Optional[CharacterStream]],
+            Awaitable[None],
+        ],
+        open_stream: Optional[
+            Callable[[MemecoinAgent], Optional[CharacterStream]]
+        ] = None,
+        on_timeout: Optional[
+            Callable[[MemecoinAgent], Awaitable[Optional[CharacterResponse]]]
+        ] = None,
+        call_type: CallType = "speech",
+    ):
+        """Run the turns in order
+
+        Args:
+            turns: (agent, host cue) pairs in speaking order
+            post_cue: Publishes the host cue right before a turn
+            deliver: Publishes an agent's response, closing its stream if any.
+                     The stream of a skipped turn is cancelled instead
+            open_stream: Opens a stream for an agent's response text. Speculative
+                         text is held back until the agent's turn comes
+            on_timeout: Returns the response of an agent whose turn ran out of
+                        time, None to skip the turn
+            call_type: What the turns are, to route their model calls
+        """
+        pending: Dict[int, _PendingTurn] = {}
+        streams: Dict[int, Optional[CharacterStream]] = {}
+        # Response text of every delivered turn, to tell what a speculation missed
+        delivered: List[str] = []
+        self.speculated = 0
+        self.regenerated = 0
+        self.timeouts = 0
+
+        def stream_for(i: int) -> Optional[CharacterStream]:
+            if i not in streams:
+                streams[i] = open_stream(turns[i][0]) if open_stream else None
+            return streams[i]
+
+        try:
+            for k, (agent, cue) in enumerate(turns):
+                # Start the upcoming speakers before this turn is published
+                for j in range(k + 1, min(k + 1 + self.lookahead, len(turns))):
+                    if j not in pending:
+                        next_agent, next_cue = turns[j]
+                        snapshot = self.context.snapshot(pending=[next_cue])
+                        pending[j] = self._launch(
+                            next_agent,
+                            snapshot,
+                            len(delivered),
+                            stream_for(j),
+                            call_type,
+                            live=False,
+                        )
+                        self.speculated += 1
+
+                await post_cue(cue)
+                turn = pending.pop(k, None)
+                timeout = self.timeout_for() if self.timeout_for else None
+                # Out of time before the turn started: don't call the model at all
+                if turn is None and (timeout is None or timeout > 0):
+                    turn = self._launch(
+                        agent,
+                        self.context,
+                        len(delivered),
+                        stream_for(k),
+                        call_type,
+                        True,
+                    )
+                response = (
+                    await self._resolve(agent, turn, delivered, timeout)
+                    if turn
+                    else None
+                )
+                if response is None:
+                    self.timeouts += 1
+                    logger.warning(f"{agent.character.name}'s turn ran out of time")
+                    response = await on_timeout(agent) if on_timeout else None
+                    if response is None:
+                        # Clients may have shown part of the dropped response
+                        if streams.get(k):
+                            await streams[k].cancel()
+                        continue
+                await deliver(agent, response, streams.get(k))
+                delivered.append(response.response)
+        finally:
+            # Drop speculative work of turns that will never be delivered
+            for turn in pending.values():
+                turn.task.cancel()
+
+    def _launch(
+        self,
+        agent: MemecoinAgent,
+        conversation: ConversationView,
+        seen_turns: int,
+        stream: Optional[CharacterStream],
+        call_type: CallType,
+        live: bool,
+    ) -> _PendingTurn:
+        relay = _DeltaRelay(stream, live)
+        on_delta = relay if stream else None
+        task = asyncio.create_task(
+            agent.respond(conversation, on_delta=on_delta, call_type=call_type)
+        )
+        return _PendingTurn(task, seen_turns, relay, call_type)
+
+    def _is_stale(self, agent: MemecoinAgent, missed: List[str]) -> bool:
+        if len(missed) > self.max_stale_turns:
+            return True
+        name = agent.character.name.lower()
+        return any(name in text.lower() for text in missed)
+
+    async def _resolve(
+        self,
+        agent: MemecoinAgent,
+        turn: _PendingTurn,
+        delivered: List[str],
+        timeout: Optional[float],
+    ) -> Optional[CharacterResponse]:
+        """The response of a turn, None if it took longer than the timeout"""
+        missed = delivered[turn.seen_turns :]
+        if self.stale_policy == "regenerate" and self._is_stale(agent, missed):
+            # Don't show text that is about to be thrown away
+            turn.task.cancel()
+            logger.info(
+                f"Regenerating {agent.character.name}'s turn, it missed {len(missed)} turns"
+            )
+            self.regenerated += 1
+            turn = self._launch(
+                agent,
+                self.context,
+                len(delivered),
+                turn.relay.stream,
+                turn.call_type,
+                True,
+            )
+        elif turn.relay.stream:
+            await turn.relay.go_live()
+        if timeout is None:
+            return await turn.task
+        try:
+            # Cancels the model call when the time is up
+            return await asyncio.wait_for(turn.task, timeout)
+        except asyncio.TimeoutError:
+            return None
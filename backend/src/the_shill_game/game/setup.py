@@ -1,41 +1,75 @@
+import asyncio
+import time
+from typing import Optional
+
+from the_shill_game.game.journal import GAME_JOURNAL_DIR, GameJournal
 from the_shill_game.game.state import GameState
 from the_shill_game.game.websocket import WebSocketManager
-from the_shill_game.utils.dummy import create_agents, create_agent_with_traits
+from the_shill_game.utils.dummy import (
+    SETUP_MAX_CONCURRENCY,
+    SetupMetrics,
+    create_agents,
+    create_agent_with_traits,
+)
 from the_shill_game.utils.logger import logger
 
 
 async def setup_game(
-    ws_manager: WebSocketManager,
+    ws_manager: Optional[WebSocketManager],
     num_agents: int = 6,
     game_id: str = "default",
     client_traits: dict = None,
+    journal_dir: Optional[str] = GAME_JOURNAL_DIR,
 ) -> GameState:
     """Set up a new game with the specified number of agents
 
     Args:
-        ws_manager: WebSocket manager for the game
+        ws_manager: WebSocket manager for the game, None to play without spectators
         num_agents: Total number of agents (including the client's character)
         game_id: Unique identifier for the game
         client_traits: Optional traits for client character. If provided, one character
                       will be created with these traits. The rest will have random traits.
+        journal_dir: Directory to log the game to so it can be resumed, None to
+                     not log it
     """
     logger.info("Setting up game...")
+    start = time.perf_counter()
+    # All memecoin generations of the lobby share one bounded fan-out
+    semaphore = asyncio.Semaphore(SETUP_MAX_CONCURRENCY)
+    metrics = SetupMetrics(num_agents=num_agents)
 
     if client_traits:
-        # Create one agent with the provided traits and the rest with random traits
-        client_agent = await create_agent_with_traits(
-            name="Vitalik", traits_dict=client_traits
+        # Create one agent with the provided traits and the rest with random traits,
+        # all at the same time
+        client_agent, random_agents = await asyncio.gather(
+            create_agent_with_traits(
+                name="Vitalik",
+                traits_dict=client_traits,
+                semaphore=semaphore,
+                metrics=metrics,
+            ),
+            create_agents(num_agents - 1, semaphore=semaphore, metrics=metrics),
         )
-        # Create the remaining agents randomly
-        random_agents = await create_agents(num_agents - 1)
         # Combine the agents
         agents = [client_agent] + random_agents
     else:
         # Create all agents with random traits (original behavior)
-        agents = await create_agents(num_agents)
+        agents = await create_agents(num_agents, semaphore=semaphore, metrics=metrics)
+
+    metrics.total_seconds = round(time.perf_counter() - start, 3)
+    logger.info(
+        f"Game setup took {metrics.total_seconds}s for {num_agents} agents "
+        f"({metrics.sequential_seconds:.3f}s of generation)"
+    )
 
     # Create and return the game state
-    game_state = GameState(agents, ws_manager, game_id)
+    game_state = GameState(
+        agents,
+        ws_manager,
+        game_id,
+        journal=GameJournal.create(game_id, journal_dir) if journal_dir else None,
+    )
+    game_state.setup_metrics = metrics
     return game_state
 
 
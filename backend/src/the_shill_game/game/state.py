@@ -1,8 +1,46 @@
-from typing import Dict, List, Literal, Optional
-from collections import Counter
+from typing import Dict, List, Literal, Optional, Tuple
+import asyncio
+import os
 import random
 
-from the_shill_game.agent.memecoin_agent import MemecoinAgent
+from agents import ModelBehaviorError
+
+from the_shill_game.agent.character import (
+    Character,
+    CharacterResponse,
+)
+from the_shill_game.agent.memecoin_agent import (
+    ConversationView,
+    MemecoinAgent,
+    create_agent,
+)
+from the_shill_game.game.context import ConversationContext
+from the_shill_game.game.deadlines import (
+    TURN_TIMEOUT_FALLBACK,
+    TURN_TIMEOUT_SECONDS,
+    VOTE_TIMEOUT_SECONDS,
+    PhaseDeadlines,
+    TimeoutFallback,
+    canned_line,
+)
+from the_shill_game.game.journal import GameJournal
+from the_shill_game.game.replay import GameReplay
+from the_shill_game.game.scheduler import TurnScheduler
+from the_shill_game.game.votes import (
+    VOTE_REPAIR_ATTEMPTS,
+    VoteTally,
+    VoteTargetIndex,
+    repair_vote_target,
+    tally_message,
+)
+from the_shill_game.game.transcript import (
+    HOST_ID,
+    HOST_NAME,
+    Transcript,
+    TranscriptEntry,
+    TranscriptLines,
+    TranscriptKind,
+)
 from the_shill_game.game.host import (
     eliminate_agent,
     get_background,
@@ -11,28 +49,83 @@ from the_shill_game.game.host import (
     get_host_intro_message,
     get_host_voting_message,
 )
-from the_shill_game.game.websocket import WebSocketManager
+from the_shill_game.game.websocket import (
+    CharacterStream,
+    VoteTallyMessage,
+    WebSocketManager,
+)
+from the_shill_game.utils.dummy import SetupMetrics
 from the_shill_game.utils.logger import logger
+from the_shill_game.utils.metrics import get_game_metrics
 from the_shill_game.utils.model import invoke_chat_response
+from the_shill_game.utils.routing import CallType, routed_model
+
+# Let all agents vote at the same time against one snapshot of the conversation
+SEALED_BALLOTS = os.getenv("SEALED_BALLOTS", "false").lower() in ("1", "true", "yes")
+# Stream agent responses to clients as they are generated
+STREAM_AGENT_RESPONSES = os.getenv("STREAM_AGENT_RESPONSES", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Phases of a round in the order they run. A restored game continues with the
+# phase after the last one that ended
+_ROUND_PHASES = [
+    "round_completed",
+    "persuasion",
+    "initial_voting",
+    "defense",
+    "final_voting",
+    "elimination",
+    "tie_breaker",
+]
+
+# Host lines are written with the speaker in front, as agents read them
+_HOST_PREFIX = f"[{HOST_NAME}]"
 
 
 class GameState:
     def __init__(
         self,
         agents: List[MemecoinAgent],
-        ws_manager: WebSocketManager,
+        ws_manager: Optional[WebSocketManager],
         game_id: str = "default",
+        sealed_ballots: bool = SEALED_BALLOTS,
+        timeout_fallback: TimeoutFallback = TURN_TIMEOUT_FALLBACK,
+        stream_responses: bool = STREAM_AGENT_RESPONSES,
+        journal: Optional[GameJournal] = None,
     ):
         # Game state
         self.round = 0
         self.round_phase = None  # Current phase within the round
-        self.messages = []  # Full conversation history
+        # Full conversation history
+        self.transcript = Transcript()
+        # Token-budgeted view of the conversation that agents respond to
+        self.context = ConversationContext()
+        # Time budgets of the running phases and the turns that overran them
+        self.deadlines = PhaseDeadlines()
+        # Runs speaking turns, generating the next speakers ahead of time
+        self.turn_scheduler = TurnScheduler(
+            self.context,
+            timeout_for=(
+                self._turn_timeout
+                if self.deadlines.limits(TURN_TIMEOUT_SECONDS)
+                else None
+            ),
+        )
         # Maps agent ID to the ID of the agent they voted for
         self.votes: Dict[str, MemecoinAgent] = {}
+        # Running count of the votes, with the leaders and tie state
+        self.tally = VoteTally()
         self.most_voted_agents: List[MemecoinAgent] = []
+        # Name index of the vote targets and the (round, active count) it is for
+        self._vote_index: Optional[VoteTargetIndex] = None
+        self._vote_index_key: Optional[Tuple[int, int]] = None
 
         # Agents
         self.agents = agents
+        self._agents_by_id = {agent.character.id: agent for agent in agents}
         self.active_agents = agents.copy()
         self.eliminated_agents = []
 
@@ -41,6 +134,46 @@ class GameState:
 
         self.ws_manager = ws_manager
         self.game_id = game_id
+        # Collect votes concurrently and reveal them afterwards
+        self.sealed_ballots = sealed_ballots
+        if timeout_fallback not in ("canned", "skip"):
+            raise ValueError(f"Unknown timeout fallback: {timeout_fallback}")
+        # What a speaking turn that runs out of time becomes
+        self.timeout_fallback = timeout_fallback
+        # Send AgentDeltaMessage frames while agents are speaking
+        self.stream_responses = stream_responses
+
+        # Timing of the lobby setup, filled in by setup_game
+        self.setup_metrics: Optional[SetupMetrics] = None
+        # Timing of the phases and agent calls of the game
+        self.metrics = get_game_metrics(game_id)
+        # Host summary of how the game was won, generated once when the game ends
+        self.winner_takeaway: Optional[str] = None
+        # Start generating the takeaway as soon as the game ends, rather than
+        # when it is first asked for
+        self.precompute_takeaway = True
+        self._winner_takeaway: Optional[asyncio.Task] = None
+
+        # Event log the game can be restored from
+        self.journal = journal
+        # (phase, state) of the phase event a restored game continues after
+        self._resume_after: Optional[Tuple[str, str]] = None
+        self.context.on_compacted = self._journal_summaries
+        if journal:
+            journal.append(
+                "setup",
+                game_id=game_id,
+                sealed_ballots=sealed_ballots,
+                agents=[
+                    {"character": agent.character.to_dict(), "model": agent.agent.model}
+                    for agent in agents
+                ],
+            )
+
+    @property
+    def messages(self) -> TranscriptLines:
+        """The conversation history as transcript lines, rendered once each"""
+        return self.transcript.lines()
 
     def get_player_names(self) -> List[str]:
         """Get the names of the players in the game"""
@@ -52,7 +185,7 @@ class GameState:
         self.round_phase = "intro"
         await self._send_phase_event("intro", "started")
 
-        await self._add_to_messages(get_background())
+        await self._add_to_messages(get_background(), pin=True)
 
         await self._add_to_messages(get_host_intro_message("opening"))
 
@@ -61,58 +194,164 @@ class GameState:
         random.shuffle(self.speaking_order)
 
         # Introduction round
-        for i, agent in enumerate(self.speaking_order):
-            await self._add_to_messages(
-                get_host_intro_message("intro", agent.character.name, i == 0)
-            )
-            response = await agent.respond(self.messages)
-            agent_message = f"[{agent.character.name}] {response.response}"
-            await self._add_to_messages(agent_message, response.thought)
+        await self._run_turns(
+            [
+                (agent, get_host_intro_message("intro", agent.character.name, i == 0))
+                for i, agent in enumerate(self.speaking_order)
+            ]
+        )
 
         await self._send_phase_event("intro", "ended")
         # Start first voting round
         await self._add_to_messages(get_host_intro_message("transition"))
-        await self.initial_voting_phase()
-        await self.defense_phase()
-        await self.final_voting_phase()
-        elimination_result = await self.process_round_results()
-        if not elimination_result:
-            # There was a tie, run tie-breaker
-            await self.run_tie_breaker()
-        await self._send_phase_event("round_completed", "ended")
+        await self._finish_round("intro")
 
     async def run_round(self):
         """Run a full game round"""
         self.round += 1
-        await self._send_phase_event("round_completed", "started")
+        self.context.start_round(self.round)
 
         # Reset round state
-        self.votes = {}
+        self._reset_votes()
         self.speaking_order = self.active_agents.copy()
         random.shuffle(self.speaking_order)
 
         self.tied_agents = []
-
-        # Start persuasion phase
-        await self.persuasion_phase()
-        # Run initial voting
-        await self.initial_voting_phase()
-        # Run defense phase
-        await self.defense_phase()
-        # Run final voting
-        await self.final_voting_phase()
-        # Process results
-        elimination_result = await self.process_round_results()
-
-        # If there was a tie, run tie-breaker
-        if not elimination_result:
-            await self.run_tie_breaker()
-
-        if len(self.active_agents) <= 2:
+        await self._send_phase_event("round_completed", "started")
+        return await self._finish_round("round_completed")
+
+    async def _finish_round(self, completed: str):
+        """Run the phases of the round that come after the completed one"""
+        phases = {
+            "persuasion": self.persuasion_phase,
+            "initial_voting": self.initial_voting_phase,
+            "defense": self.defense_phase,
+            "final_voting": self.final_voting_phase,
+        }
+        # The intro takes the place of the persuasion phase in the first round
+        if completed == "intro":
+            completed = "persuasion"
+        for phase in _ROUND_PHASES[_ROUND_PHASES.index(completed) + 1 :]:
+            if phase in phases:
+                await phases[phase]()
+            elif phase == "elimination":
+                if await self.process_round_results():
+                    break
+            elif phase == "tie_breaker" and self.tied_agents:
+                await self.run_tie_breaker()
+
+        if self.round > 0 and len(self.active_agents) <= 2:
             # Game is over, we have a winner
             return await self.end_game()
-        else:
-            await self._send_phase_event("round_completed", "ended")
+        # Summarize rounds that no longer fit the prompt budget before the next one
+        self.context.schedule_compaction()
+        await self._send_phase_event("round_completed", "ended")
+
+    @classmethod
+    def restore(cls, journal: GameJournal, ws_manager: WebSocketManager) -> "GameState":
+        """Rebuild a game from its journal, as it was after its last completed phase
+
+        Lines of a phase that was cut short are dropped; resume() runs the
+        phase again. No model is called: the recorded outputs are reused.
+        """
+        replay = GameReplay.from_journal(journal)
+        end = replay.last_checkpoint()
+        saved = replay.state_at(end)
+        agents = [
+            create_agent(Character.from_dict(agent["character"]), agent["model"])
+            for agent in saved.agents
+        ]
+        state = cls(
+            agents, ws_manager, journal.game_id, sealed_ballots=saved.sealed_ballots
+        )
+
+        state.transcript = saved.transcript
+        for entry in saved.transcript:
+            if entry.round != state.context.current_round:
+                state.context.start_round(entry.round)
+            if entry.seq in saved.pinned:
+                state.context.pin(entry.line)
+            else:
+                state.context.append(entry.line)
+        if saved.round != state.context.current_round:
+            state.context.start_round(saved.round)
+        state.context.load_summaries(saved.summaries, saved.summarized_through)
+
+        agents_by_id = state._agents_by_id
+
+        def agents_of(ids: List[str]) -> List[MemecoinAgent]:
+            return [agents_by_id[agent_id] for agent_id in ids]
+
+        state.round = saved.round
+        state.round_phase = saved.round_phase
+        state.active_agents = agents_of(saved.active)
+        state.eliminated_agents = agents_of(saved.eliminated)
+        state.speaking_order = agents_of(saved.speaking_order)
+        state.most_voted_agents = agents_of(saved.most_voted)
+        state.tied_agents = agents_of(saved.tied)
+        for voter_id, agent_id in saved.votes.items():
+            state.votes[voter_id] = agents_by_id[agent_id]
+            state.tally.add(voter_id, agent_id)
+        state.winner_takeaway = saved.takeaway
+        state._resume_after = saved.completed
+
+        # Clients that connect get the messages of the game so far, numbered
+        # on from the frames the game already sent
+        ws_manager.record(
+            journal.game_id, replay.messages(end), last_seq=replay.frames_sent()
+        )
+        state.journal = journal
+        logger.info(
+            f"Restored game {journal.game_id} at round {state.round} "
+            f"after {state._resume_after or 'setup'}"
+        )
+        return state
+
+    async def resume(self):
+        """Continue a restored game from its last completed phase"""
+        if self.journal:
+            # Lines of the interrupted phase are superseded by the ones spoken now
+            self.journal.append("rewind")
+        resume_after, self._resume_after = self._resume_after, None
+        if resume_after is None:
+            # Interrupted during the intro
+            return await self.start()
+        phase, state = resume_after
+        if phase == "game_over" or (phase, state) == ("round_completed", "ended"):
+            # Nothing was interrupted
+            return None
+        self.context.schedule_compaction()
+        return await self._finish_round(phase)
+
+    def _journal(self, type: str, **data):
+        if self.journal:
+            self.journal.append(type, **data)
+
+    def _journal_summaries(self):
+        self._journal(
+            "summaries",
+            summaries=self.context.summaries,
+            through_round=self.context.summarized_through,
+        )
+
+    def _checkpoint(self) -> Dict:
+        """Players and votes, as stored with every phase event"""
+
+        def ids(agents: List[MemecoinAgent]) -> List[str]:
+            return [agent.character.id for agent in agents]
+
+        return {
+            "round": self.round,
+            "round_phase": self.round_phase,
+            "active": ids(self.active_agents),
+            "eliminated": ids(self.eliminated_agents),
+            "speaking_order": ids(self.speaking_order),
+            "most_voted": ids(self.most_voted_agents),
+            "tied": ids(self.tied_agents),
+            "votes": {
+                voter_id: agent.character.id for voter_id, agent in self.votes.items()
+            },
+        }
 
     async def persuasion_phase(self):
         """Run the persuasion and strategy phase"""
@@ -122,13 +361,12 @@ class GameState:
         round_intro = "[Host] Alright! It's time for the persuasion phase. Each player will have a chance to speak."
         await self._add_to_messages(round_intro)
 
-        for agent in self.speaking_order:
-            prompt = f"[Host] {agent.character.name}, it's your turn to speak."
-            await self._add_to_messages(prompt)
-
-            response = await agent.respond(self.messages)
-            agent_message = f"[{agent.character.name}] {response.response}"
-            await self._add_to_messages(agent_message, response.thought)
+        await self._run_turns(
+            [
+                (agent, f"[Host] {agent.character.name}, it's your turn to speak.")
+                for agent in self.speaking_order
+            ]
+        )
 
         await self._send_phase_event("persuasion", "ended")
 
@@ -136,26 +374,11 @@ class GameState:
         """Run the initial voting phase"""
         logger.info("Running initial voting phase")
         self.round_phase = "initial_voting"
+        self._reset_votes()
         await self._send_phase_event("initial_voting", "started")
-        self.votes = {}
 
         await self._add_to_messages(get_host_voting_message("intro"))
-
-        for agent in self.active_agents:
-            await self._add_to_messages(
-                get_host_voting_message("cue", agent.character.name)
-            )
-
-            response = await agent.vote(self.messages)
-            # Get voted agent from response
-            voted_agent = self._resolve_vote_target(agent, response.vote_target)
-            # Store vote result
-            self.votes[agent.character.id] = voted_agent
-
-            vote_message = (
-                f"[{agent.character.name}] I vote for {voted_agent.character.name}."
-            )
-            await self._add_to_messages(vote_message, response.thought)
+        await self._collect_votes()
 
         # Count votes and determine who goes to defense
         self._count_votes()
@@ -175,12 +398,13 @@ class GameState:
         self.round_phase = "defense"
         await self._send_phase_event("defense", "started")
 
-        for agent in self.most_voted_agents:
-            defense_prompt = get_host_defense_message(agent.character.name)
-            await self._add_to_messages(defense_prompt)
-            response = await agent.respond(self.messages)
-            defense_message = f"[{agent.character.name}] {response.response}"
-            await self._add_to_messages(defense_message, response.thought)
+        await self._run_turns(
+            [
+                (agent, get_host_defense_message(agent.character.name))
+                for agent in self.most_voted_agents
+            ],
+            "defense",
+        )
 
         await self._send_phase_event("defense", "ended")
 
@@ -188,28 +412,178 @@ class GameState:
         """Run the final voting phase"""
         logger.info("Running final voting phase")
         self.round_phase = "final_voting"
+        self._reset_votes()
         await self._send_phase_event("final_voting", "started")
-        self.votes = {}
 
         await self._add_to_messages(get_host_voting_message("final_vote"))
+        await self._collect_votes()
 
-        for agent in self.active_agents:
-            await self._add_to_messages(
-                get_host_voting_message("cue", agent.character.name)
+        await self._send_phase_event("final_voting", "ended")
+
+    async def _run_turns(
+        self, turns: List[Tuple[MemecoinAgent, str]], call_type: CallType = "speech"
+    ):
+        """Let each agent speak after its host cue, in order"""
+
+        async def deliver(
+            agent: MemecoinAgent,
+            response: CharacterResponse,
+            stream: Optional[CharacterStream],
+        ):
+            await self._add_agent_message(
+                agent,
+                response.response,
+                "speech",
+                response.thought,
+                stream_id=stream.stream_id if stream else None,
             )
 
-            response = await agent.vote(self.messages)
-            # Get voted agent from response
-            voted_agent = self._resolve_vote_target(agent, response.vote_target)
-            # Store vote result
-            self.votes[agent.character.id] = voted_agent
+        await self.turn_scheduler.run(
+            turns,
+            self._add_to_messages,
+            deliver,
+            self._open_stream,
+            self._on_turn_timeout,
+            call_type,
+        )
 
-            vote_message = (
-                f"[{agent.character.name}] I vote for {voted_agent.character.name}."
+    def _open_stream(self, agent: MemecoinAgent) -> Optional[CharacterStream]:
+        """Open a delta stream for an agent's response if streaming is enabled"""
+        if self.stream_responses and self.ws_manager and self.game_id:
+            return self.ws_manager.open_character_stream(
+                self.game_id, agent.character.name
             )
-            await self._add_to_messages(vote_message, response.thought)
+        return None
 
-        await self._send_phase_event("final_voting", "ended")
+    async def _collect_votes(self):
+        """Ask every active agent for a vote and record it in self.votes"""
+        if not self.sealed_ballots:
+            for agent in self.active_agents:
+                await self._add_to_messages(
+                    get_host_voting_message("cue", agent.character.name)
+                )
+                voted_agent, thought = await self._cast_vote(agent, self.context)
+                await self._record_vote(agent, voted_agent, thought)
+            return
+
+        # Sealed ballots: everyone votes against the same snapshot, then the
+        # votes are revealed one by one in a fixed order
+        await self._add_to_messages(get_host_voting_message("sealed"))
+        snapshot = self.context.snapshot()
+        voters = list(self.active_agents)
+        ballots = await asyncio.gather(
+            *[self._cast_vote(agent, snapshot) for agent in voters]
+        )
+        for agent, (voted_agent, thought) in zip(voters, ballots):
+            await self._add_to_messages(
+                get_host_voting_message("reveal", agent.character.name)
+            )
+            await self._record_vote(agent, voted_agent, thought)
+
+    def _vote_candidates(self, agent: MemecoinAgent) -> List[str]:
+        """Names an agent may vote for"""
+        return [
+            other.character.name
+            for other in self.active_agents
+            if other.character.id != agent.character.id
+        ]
+
+    def _vote_targets(self) -> VoteTargetIndex:
+        """Name index of the active agents, built once per round"""
+        # Agents are only eliminated, so the count tells the active sets apart
+        key = (self.round, len(self.active_agents))
+        if self._vote_index_key != key:
+            self._vote_index = VoteTargetIndex(self.active_agents)
+            self._vote_index_key = key
+        return self._vote_index
+
+    async def _cast_vote(
+        self, agent: MemecoinAgent, conversation: ConversationView
+    ) -> Tuple[MemecoinAgent, str]:
+        """Get an agent's vote and return the voted agent and the reasoning
+
+        A vote that names no other active agent is repaired with a small model
+        call, then replaced with a random legal target, so a bad vote never
+        ends the round. A vote that runs out of time gets a random target too.
+        """
+        timeout = self.deadlines.timeout(VOTE_TIMEOUT_SECONDS)
+        if timeout is None:
+            return await self._ask_vote(agent, conversation)
+        if timeout > 0:
+            try:
+                return await asyncio.wait_for(
+                    self._ask_vote(agent, conversation), timeout
+                )
+            except asyncio.TimeoutError:
+                pass
+        self._record_timeout()
+        logger.warning(
+            f"{agent.character.name}'s vote ran out of time, voting at random"
+        )
+        return random.choice(self._other_active_agents(agent)), ""
+
+    async def _ask_vote(
+        self, agent: MemecoinAgent, conversation: ConversationView
+    ) -> Tuple[MemecoinAgent, str]:
+        candidates = self._vote_candidates(agent)
+        try:
+            response = await agent.vote(conversation, candidates)
+        except ModelBehaviorError as e:
+            logger.warning(f"Unparseable vote from {agent.character.name}: {e}")
+            return random.choice(self._other_active_agents(agent)), ""
+
+        answer = response.vote_target
+        voted_agent = self._resolve_vote_target(agent, answer)
+        for _ in range(VOTE_REPAIR_ATTEMPTS):
+            if voted_agent is not None:
+                break
+            logger.warning(
+                f"{agent.character.name} voted for '{answer}', asking which "
+                f"of {candidates} they meant"
+            )
+            try:
+                answer = await repair_vote_target(answer, candidates)
+            except Exception as e:
+                logger.error(
+                    f"Failed to repair the vote of {agent.character.name}: {e}"
+                )
+                break
+            voted_agent = self._resolve_vote_target(agent, answer)
+        if voted_agent is None:
+            logger.warning(
+                f"Unable to resolve the vote of {agent.character.name} for "
+                f"'{response.vote_target}', voting at random"
+            )
+            voted_agent = random.choice(self._other_active_agents(agent))
+        return voted_agent, response.thought
+
+    def _other_active_agents(self, agent: MemecoinAgent) -> List[MemecoinAgent]:
+        return [a for a in self.active_agents if a.character.id != agent.character.id]
+
+    async def _record_vote(
+        self, agent: MemecoinAgent, voted_agent: MemecoinAgent, thought: str
+    ):
+        """Store and announce a single vote"""
+        self.votes[agent.character.id] = voted_agent
+        previous = self.tally.add(agent.character.id, voted_agent.character.id)
+        await self._add_agent_message(
+            agent,
+            f"I vote for {voted_agent.character.name}.",
+            "vote",
+            thought,
+        )
+
+        # The tally follows the vote line, in the journal like on the wire
+        self._journal(
+            "vote", voter_id=agent.character.id, target_id=voted_agent.character.id
+        )
+        if self.ws_manager and self.game_id:
+            await self.ws_manager.send_vote_tally(
+                self.game_id,
+                self._tally_message(
+                    agent.character.id, voted_agent.character.id, previous
+                ),
+            )
 
     async def process_round_results(self) -> bool:
         """Process the results of the current round"""
@@ -232,9 +606,10 @@ class GameState:
         # If there's a clear elimination
         eliminated_agent = most_voted_agents[0]
         self.active_agents.remove(eliminated_agent)
-        print(f"Active agents: {len(self.active_agents)} left")
+        logger.info(f"Active agents: {len(self.active_agents)} left")
         self.eliminated_agents.append(eliminated_agent)
-        print(f"Eliminated agent: {eliminated_agent.character.name}")
+        self._journal("elimination", agent_id=eliminated_agent.character.id, by="votes")
+        logger.info(f"Eliminated agent: {eliminated_agent.character.name}")
 
         await self._add_to_messages(
             get_host_final_vote_message(
@@ -244,15 +619,18 @@ class GameState:
         )
 
         # Let the eliminated agent say farewell
-        await self._add_to_messages(
-            get_host_final_vote_message(
-                phase="farewell",
-                eliminated_agent=eliminated_agent.character.name,
-            )
+        await self._run_turns(
+            [
+                (
+                    eliminated_agent,
+                    get_host_final_vote_message(
+                        phase="farewell",
+                        eliminated_agent=eliminated_agent.character.name,
+                    ),
+                )
+            ],
+            "farewell",
         )
-        response = await eliminated_agent.respond(self.messages)
-        farewell_message = f"[{eliminated_agent.character.name}] {response.response}"
-        await self._add_to_messages(farewell_message, response.thought)
         await self._send_phase_event("elimination", "ended")
         return True
 
@@ -260,34 +638,35 @@ class GameState:
         """Run a tie-breaker when there's a tie in voting"""
         await self._send_phase_event("tie_breaker", "started")
         # TODO: For demo purposes, we let the host decide who to eliminate
-        response = eliminate_agent(self.tied_agents)
-        eliminated_agent_name = response.vote_target.strip().lower()
+        response = await eliminate_agent(self.tied_agents)
         # Resolve the agent from the response
-        eliminated_agent = None
-        for agent in self.tied_agents:
-            active_agent_name = agent.character.name.strip().lower()
-            if active_agent_name == eliminated_agent_name:
-                eliminated_agent = agent
+        eliminated_agent = VoteTargetIndex(self.tied_agents).resolve(
+            response.vote_target
+        )
         if not eliminated_agent:
-            logger.warning(f"Unable to find agent {eliminated_agent_name}")
+            logger.warning(f"Unable to find agent {response.vote_target}")
             eliminated_agent = random.choice(self.tied_agents)
 
         self.active_agents.remove(eliminated_agent)
         self.eliminated_agents.append(eliminated_agent)
+        self._journal("elimination", agent_id=eliminated_agent.character.id, by="host")
 
         await self._add_to_messages(
-            f"[Host] No more delays—I'm making the call. {response.vote_target}, you're out!"
+            f"[Host] No more delays—I'm making the call. {eliminated_agent.character.name}, you're out!"
         )
         # Let the eliminated agent say farewell
-        await self._add_to_messages(
-            get_host_final_vote_message(
-                phase="farewell",
-                eliminated_agent=eliminated_agent.character.name,
-            )
+        await self._run_turns(
+            [
+                (
+                    eliminated_agent,
+                    get_host_final_vote_message(
+                        phase="farewell",
+                        eliminated_agent=eliminated_agent.character.name,
+                    ),
+                )
+            ],
+            "farewell",
         )
-        response = await eliminated_agent.respond(self.messages)
-        farewell_message = f"[{eliminated_agent.character.name}] {response.response}"
-        await self._add_to_messages(farewell_message, response.thought)
         await self._send_phase_event("tie_breaker", "ended")
 
     async def end_game(self):
@@ -301,103 +680,186 @@ class GameState:
             winner = self.active_agents[0]
             winning_message = f"[Host] Congratulations {winner.character.name}! You are the winner of The Shill Game!"
             await self._add_to_messages(winning_message)
+            if self.precompute_takeaway:
+                self.schedule_winner_takeaway()
             await self._send_phase_event("game_over", "ended")
             return winner
         elif len(self.active_agents) == 2:
             # Final two agents
             finalists_message = f"[Host] We have our final two contestants: {self.active_agents[0].character.name} and {self.active_agents[1].character.name}!"
             await self._add_to_messages(finalists_message)
+            if self.precompute_takeaway:
+                self.schedule_winner_takeaway()
             await self._send_phase_event("game_over", "ended")
             return self.active_agents
         else:
             raise ValueError("Game is not over")
 
-    def generate_winner_takeaway(self) -> str:
-        """Generate a takeaway message for the winner"""
+    def schedule_winner_takeaway(self):
+        """Start generating the winner takeaway in the background"""
+        if self._winner_takeaway is None and self.winner_takeaway is None:
+            self._winner_takeaway = asyncio.create_task(self._generate_takeaway())
+            self._winner_takeaway.add_done_callback(self._takeaway_done)
+
+    def _takeaway_done(self, task: asyncio.Task):
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.error(f"Failed to generate the winner takeaway: {task.exception()}")
+        # Let the next request try again
+        if self._winner_takeaway is task:
+            self._winner_takeaway = None
+
+    async def generate_winner_takeaway(self) -> str:
+        """The takeaway message for the winner
+
+        Generated once per game and served from memory afterwards. Requests made
+        while it is being generated wait for the same generation.
+        """
         # if len(self.active_agents) > 2 or self.round_phase != "game_over":
         #     raise ValueError("Game is not over")
+        if self.winner_takeaway is not None:
+            return self.winner_takeaway
+        self.schedule_winner_takeaway()
+        # A request that goes away doesn't cancel the generation for the others
+        return await asyncio.shield(self._winner_takeaway)
 
+    async def _generate_takeaway(self) -> str:
         winners = self.active_agents
-        response = invoke_chat_response(
-            input=(
-                f"The following is a transcript of The Shill Game, a social survival show where players must outwit, outtalk, "
-                f"and outmaneuver each other to become the last memecoin founder standing.\n\n"
-                f"Conversation history:\n{self.messages}\n\n"
-                f"The winner(s): {', '.join(agent.character.name for agent in winners)}"
-            ),
-            instruction=(
-                "You're the host of The Shill Game. "
-                "Summarize how the winner(s) outplayed the others — highlight their most brilliant moves, "
-                "alliances made or broken, emotional or psychological tactics, and what set them apart.\n"
-                "End with a punchy one-liner or mic-drop statement that captures why they won."
-            ),
-        )
+        transcript = "\n".join(self.transcript.lines())
+        with routed_model("takeaway", "gpt-4o") as model:
+            response = await invoke_chat_response(
+                input=(
+                    f"The following is a transcript of The Shill Game, a social survival show where players must outwit, outtalk, "
+                    f"and outmaneuver each other to become the last memecoin founder standing.\n\n"
+                    f"Conversation history:\n{transcript}\n\n"
+                    f"The winner(s): {', '.join(agent.character.name for agent in winners)}"
+                ),
+                instruction=(
+                    "You're the host of The Shill Game. "
+                    "Summarize how the winner(s) outplayed the others — highlight their most brilliant moves, "
+                    "alliances made or broken, emotional or psychological tactics, and what set them apart.\n"
+                    "End with a punchy one-liner or mic-drop statement that captures why they won."
+                ),
+                model=model,
+            )
+        self.winner_takeaway = response
+        self._journal("takeaway", text=response)
         return response
 
     def _resolve_vote_target(
         self, voting_agent: MemecoinAgent, voted_target: str
-    ) -> MemecoinAgent:
-        """Resolve the voted agent from the input string."""
-        normalized_target = voted_target.strip().lower()
-        voting_agent_name = voting_agent.character.name.strip().lower()
-
-        for agent in self.active_agents:
-            active_agent_name = agent.character.name.strip().lower()
-            if active_agent_name == voting_agent_name:
-                continue  # Can't vote for yourself
-            if active_agent_name == normalized_target:
-                return agent
-
-        raise ValueError(
-            f"Unable to resolve vote target '{voted_target}'. "
-            f"Active targets: {[agent.character.name for agent in self.active_agents]}"
+    ) -> Optional[MemecoinAgent]:
+        """The active agent a vote names, None if it names nobody else"""
+        agent = self._vote_targets().resolve(voted_target)
+        if agent is None or agent.character.id == voting_agent.character.id:
+            # Can't vote for yourself
+            return None
+        return agent
+
+    def _reset_votes(self):
+        self.votes = {}
+        self.tally = VoteTally()
+
+    def _tally_message(
+        self, voter_id: str, target_id: str, previous_id: Optional[str]
+    ) -> VoteTallyMessage:
+        return tally_message(
+            self.tally,
+            self.round_phase,
+            self._get_agent_name_by_id,
+            len(self.active_agents),
+            voter_id,
+            target_id,
+            previous_id,
         )
 
     def _count_votes(self) -> Dict:
-        """Count votes and return detailed information about voting results"""
-        self.most_voted_agents = []
-        vote_count = Counter(
-            voted_agent.character.id for voted_agent in self.votes.values()
-        )
-
-        # Get the agent(s) with the most votes
-        max_votes = max(vote_count.values())
+        """Voting results, read from the running tally"""
         most_voted_agents = [
-            self._get_agent_by_id(agent_id)
-            for agent_id, count in vote_count.items()
-            if count == max_votes
+            self._get_agent_by_id(agent_id) for agent_id in self.tally.leaders
         ]
         self.most_voted_agents = most_voted_agents
         return {
-            "vote_count": dict(vote_count),
-            "max_votes": max_votes,
+            "vote_count": dict(self.tally.counts),
+            "max_votes": self.tally.max_votes,
             "most_voted_agents": most_voted_agents,
         }
 
-    async def _add_to_messages(self, message: str, thought: str = None):
-        """Add a message to the conversation history and send via WebSocket if available"""
-        # Store message in local history
-        self.messages.append(message.strip().replace("\n", " "))
+    async def _add_to_messages(self, message: str, pin: bool = False):
+        """Add a host line, or the show background, to the conversation
+
+        Pinned messages stay in every agent prompt, however long the game gets.
+        """
+        if message.startswith(_HOST_PREFIX):
+            await self._add_entry(
+                message[len(_HOST_PREFIX) :].strip(),
+                "host",
+                HOST_ID,
+                HOST_NAME,
+                pin=pin,
+            )
+        else:
+            await self._add_entry(message.strip(), "background", pin=pin)
+
+    async def _add_agent_message(
+        self,
+        agent: MemecoinAgent,
+        text: str,
+        kind: TranscriptKind,
+        thought: Optional[str] = None,
+        stream_id: Optional[str] = None,
+    ):
+        """Add what an agent said to the conversation
+
+        stream_id closes the delta stream the message was streamed on.
+        """
+        await self._add_entry(
+            text.strip(),
+            kind,
+            agent.character.id,
+            agent.character.name,
+            thought,
+            stream_id=stream_id,
+        )
+
+    async def _add_entry(
+        self,
+        text: str,
+        kind: TranscriptKind,
+        sender_id: Optional[str] = None,
+        sender: Optional[str] = None,
+        thought: Optional[str] = None,
+        pin: bool = False,
+        stream_id: Optional[str] = None,
+    ) -> TranscriptEntry:
+        """Record a line in the transcript and the agent context, then send it"""
+        entry = self.transcript.append(
+            text,
+            kind,
+            self.round,
+            self.round_phase or "setup",
+            sender_id,
+            sender,
+            thought,
+        )
+        if pin:
+            self.context.pin(entry.line)
+        else:
+            self.context.append(entry.line)
+        self._journal("entry", pin=pin, **entry.to_dict())
 
-        # If WebSocket manager is available, send the message
         if self.ws_manager and self.game_id:
-            # Extract sender and content from message format
-            if message.startswith("[") and "]" in message:
-                parts = message.split("]", 1)
-                sender = parts[0][1:].strip()  # Remove brackets
-                content = parts[1].strip()
-
-                if thought:
-                    await self.ws_manager.send_character_message_with_thought(
-                        self.game_id, content, thought, sender
-                    )
-                else:
-                    await self.ws_manager.send_character_message(
-                        self.game_id, content, sender
-                    )
+            if sender is None:
+                await self.ws_manager.send_system_message(self.game_id, text)
+            elif thought:
+                await self.ws_manager.send_character_message_with_thought(
+                    self.game_id, text, thought, sender, stream_id
+                )
             else:
-                # Default to system message if format doesn't match
-                await self.ws_manager.send_system_message(self.game_id, message)
+                await self.ws_manager.send_character_message(
+                    self.game_id, text, sender, stream_id
+                )
+        return entry
 
     async def _send_phase_event(
         self,
@@ -414,20 +876,52 @@ class GameState:
         ],
         state: Literal["started", "ended"],
     ):
-        """Send an event indicating a phase's state (started/ended)"""
+        """Send an event indicating a phase's state (started/ended)
+
+        Ended events carry the number of turns and votes that ran out of time
+        in the phase.
+        """
+        timeouts = None
+        if state == "started":
+            self.metrics.phase_started(phase)
+            self.deadlines.start(phase)
+        else:
+            self.metrics.phase_ended(phase)
+            timeouts = self.deadlines.end(phase)
+        if self.journal:
+            self._journal(
+                "phase",
+                phase=phase,
+                state=state,
+                timeouts=timeouts,
+                checkpoint=self._checkpoint(),
+            )
         if self.ws_manager and self.game_id:
-            await self.ws_manager.send_event(self.game_id, f"{phase}_{state}")
+            await self.ws_manager.send_event(
+                self.game_id, f"{phase}_{state}", timeouts=timeouts
+            )
+
+    def _turn_timeout(self) -> Optional[float]:
+        return self.deadlines.timeout(TURN_TIMEOUT_SECONDS)
+
+    def _record_timeout(self):
+        self.deadlines.record_timeout()
+        self.metrics.record_timeout()
+
+    async def _on_turn_timeout(
+        self, agent: MemecoinAgent
+    ) -> Optional[CharacterResponse]:
+        """Stand-in for a speaking turn that ran out of time, None to skip it"""
+        self._record_timeout()
+        if self.timeout_fallback == "skip":
+            return None
+        return CharacterResponse(response=canned_line(agent.character), thought="")
 
     def _get_agent_name_by_id(self, agent_id: str) -> str:
         """Helper method to get an agent's name by their ID"""
-        for agent in self.agents:
-            if agent.character.id == agent_id:
-                return agent.character.name
-        return "Unknown"
+        agent = self._agents_by_id.get(agent_id)
+        return agent.character.name if agent else "Unknown"
 
     def _get_agent_by_id(self, agent_id: str) -> Optional[MemecoinAgent]:
         """Helper method to get an agent object by ID"""
-        for agent in self.active_agents:
-            if agent.character.id == agent_id:
-                return agent
-        return None
+        return self._agents_by_id.get(agent_id)
@@ -0,0 +1,308 @@
+from array import array
+from itertools import islice
+from typing import Dict, Iterator, List, Literal, Optional, Sequence, Tuple, Union
+
+# "background" is the show introduction, "host" the host's lines, "speech" what
+# agents say in their turns and "vote" the votes they announce
+TranscriptKind = Literal["background", "host", "speech", "vote"]
+
+HOST_ID = "host"
+HOST_NAME = "Host"
+
+
+def _line(sender: Optional[str], text: str) -> str:
+    text = text.replace("\n", " ")
+    return f"[{sender}] {text}" if sender else text
+
+
+class TranscriptEntry:
+    """One line of a game, as recorded in a Transcript"""
+
+    __slots__ = (
+        "seq",
+        "round",
+        "phase",
+        "kind",
+        "sender_id",
+        "sender",
+        "text",
+        "thought",
+    )
+
+    def __init__(
+        self,
+        seq: int,
+        round: int,
+        phase: str,
+        kind: TranscriptKind,
+        sender_id: Optional[str],
+        sender: Optional[str],
+        text: str,
+        thought: Optional[str],
+    ):
+        self.seq = seq
+        self.round = round
+        self.phase = phase
+        self.kind = kind
+        self.sender_id = sender_id
+        self.sender = sender
+        self.text = text
+        self.thought = thought
+
+    @property
+    def line(self) -> str:
+        """The entry as a single transcript line, as agents read it"""
+        return _line(self.sender, self.text)
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"TranscriptEntry({self.seq}, {self.kind}, {self.line!r})"
+
+
+class _Interned:
+    """Small table of repeated values, stored in the columns by index"""
+
+    def __init__(self):
+        self.values: List = []
+        self._index: Dict = {}
+
+    def index(self, value) -> int:
+        if value not in self._index:
+            self._index[value] = len(self.values)
+            self.values.append(value)
+        return self._index[value]
+
+
+class TranscriptView:
+    """Entries of a transcript picked out by position, without copying them
+
+    A view covers the entries that existed when it was taken. Entries are built
+    from the transcript columns when they are read.
+    """
+
+    def __init__(
+        self,
+        transcript: "Transcript",
+        positions: Optional[array],
+        start: int,
+        stop: int,
+    ):
+        self._transcript = transcript
+        # None for a contiguous range of the whole transcript
+        self._positions = positions
+        self._start = start
+        self._stop = stop
+
+    def _position(self, i: int) -> int:
+        i += self._start
+        return i if self._positions is None else self._positions[i]
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(
+        self, key: Union[int, slice]
+    ) -> Union[TranscriptEntry, "TranscriptView"]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("Transcript views don't support slice steps")
+            return TranscriptView(
+                self._transcript,
+                self._positions,
+                self._start + start,
+                self._start + max(start, stop),
+            )
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("transcript view index out of range")
+        return self._transcript._entry(self._position(key))
+
+    def __iter__(self) -> Iterator[TranscriptEntry]:
+        for i in range(len(self)):
+            yield self._transcript._entry(self._position(i))
+
+    def texts(self) -> List[str]:
+        text = self._transcript._text
+        return [text[self._position(i)] for i in range(len(self))]
+
+    def lines(self) -> List[str]:
+        return [entry.line for entry in self]
+
+
+class TranscriptLines(Sequence):
+    """Read-only lines of a transcript, as far as it went when they were taken
+
+    The lines are rendered once per entry and shared by every caller. Like a
+    view, they are not valid after the transcript is truncated.
+    """
+
+    def __init__(self, lines: List[str], length: int):
+        self._lines = lines
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(key, slice):
+            return self._lines[: self._length][key]
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("transcript lines index out of range")
+        return self._lines[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return islice(self._lines, self._length)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"TranscriptLines({list(self)!r})"
+
+
+class Transcript:
+    """Append-only record of everything said in a game
+
+    Entries are stored column by column, with phases, kinds and senders
+    interned, and indexed by round, sender and phase as they are appended, so
+    the views of one round, speaker or phase are found without a scan. The
+    sequence number of an entry is its position in the transcript.
+    """
+
+    def __init__(self):
+        self._round = array("H")
+        self._phase = array("B")
+        self._kind = array("B")
+        self._sender = array("H")
+        self._text: List[str] = []
+        self._thought: List[Optional[str]] = []
+        # Rendered lines of the entries so far, extended when lines() is called
+        self._lines: List[str] = []
+
+        self._phases = _Interned()
+        self._kinds = _Interned()
+        # (sender_id, sender name), (None, None) for unattributed lines
+        self._senders = _Interned()
+
+        self._by_round: Dict[int, array] = {}
+        self._by_phase: Dict[str, array] = {}
+        self._by_sender: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def __getitem__(self, seq: int) -> TranscriptEntry:
+        if seq < 0:
+            seq += len(self)
+        return self._entry(seq)
+
+    def __iter__(self) -> Iterator[TranscriptEntry]:
+        return iter(self.view())
+
+    def append(
+        self,
+        text: str,
+        kind: TranscriptKind,
+        round: int,
+        phase: str,
+        sender_id: Optional[str] = None,
+        sender: Optional[str] = None,
+        thought: Optional[str] = None,
+    ) -> TranscriptEntry:
+        seq = len(self._text)
+        self._round.append(round)
+        self._phase.append(self._phases.index(phase))
+        self._kind.append(self._kinds.index(kind))
+        self._sender.append(self._senders.index((sender_id, sender)))
+        self._text.append(text)
+        self._thought.append(thought)
+
+        for index, key in (
+            (self._by_round, round),
+            (self._by_phase, phase),
+            (self._by_sender, sender_id),
+        ):
+            if key is not None:
+                if key not in index:
+                    index[key] = array("I")
+                index[key].append(seq)
+        return self._entry(seq)
+
+    def truncate(self, length: int):
+        """Drop the entries from `length` on, e.g. those of an interrupted phase
+
+        Views taken before are not valid afterwards.
+        """
+        if length >= len(self):
+            return
+        for column in (
+            self._round,
+            self._phase,
+            self._kind,
+            self._sender,
+            self._text,
+            self._thought,
+            self._lines,
+        ):
+            del column[length:]
+        for index in (self._by_round, self._by_phase, self._by_sender):
+            for key in list(index):
+                positions = index[key]
+                while positions and positions[-1] >= length:
+                    positions.pop()
+                if not positions:
+                    del index[key]
+
+    def _entry(self, seq: int) -> TranscriptEntry:
+        sender_id, sender = self._senders.values[self._sender[seq]]
+        return TranscriptEntry(
+            seq=seq,
+            round=self._round[seq],
+            phase=self._phases.values[self._phase[seq]],
+            kind=self._kinds.values[self._kind[seq]],
+            sender_id=sender_id,
+            sender=sender,
+            text=self._text[seq],
+            thought=self._thought[seq],
+        )
+
+    def _indexed(self, index: Dict, key) -> TranscriptView:
+        positions = index.get(key)
+        if positions is None:
+            return TranscriptView(self, None, 0, 0)
+        return TranscriptView(self, positions, 0, len(positions))
+
+    def view(self) -> TranscriptView:
+        """All entries so far"""
+        return TranscriptView(self, None, 0, len(self))
+
+    def by_round(self, round: int) -> TranscriptView:
+        return self._indexed(self._by_round, round)
+
+    def by_phase(self, phase: str) -> TranscriptView:
+        return self._indexed(self._by_phase, phase)
+
+    def by_sender(self, sender_id: str) -> TranscriptView:
+        return self._indexed(self._by_sender, sender_id)
+
+    def rounds(self) -> List[int]:
+        return list(self._by_round)
+
+    def senders(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        """(sender_id, name) of everyone who has spoken"""
+        return list(self._senders.values)
+
+    def lines(self) -> TranscriptLines:
+        """Every entry as a transcript line, only new entries are rendered"""
+        for seq in range(len(self._lines), len(self)):
+            _, sender = self._senders.values[self._sender[seq]]
+            self._lines.append(_line(sender, self._text[seq]))
+        return TranscriptLines(self._lines, len(self))
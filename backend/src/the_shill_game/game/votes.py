@@ -0,0 +1,208 @@
+import os
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from the_shill_game.agent.character import vote_response_type
+from the_shill_game.agent.memecoin_agent import MemecoinAgent
+from the_shill_game.game.websocket import VoteTallyMessage
+from the_shill_game.utils.model import invoke_structured_response
+
+# Repair calls made for a vote that names no legal target before falling back
+# to a random one
+VOTE_REPAIR_ATTEMPTS = int(os.getenv("VOTE_REPAIR_ATTEMPTS", "1"))
+VOTE_REPAIR_MODEL = os.getenv("VOTE_REPAIR_MODEL", "gpt-4o-mini")
+
+_NOT_NAME = re.compile(r"[^\w\s]+")
+# Words a vote may wrap the name in, e.g. "I vote for @Jamie!"
+_FILLER = {"i", "vote", "for", "to", "eliminate", "player", "my", "is", "the"}
+
+
+def normalize_name(name: str) -> str:
+    """Case, accent, punctuation and spacing insensitive form of a name"""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(_NOT_NAME.sub(" ", name.casefold()).split())
+
+
+def _add_aliases(
+    index: Dict[str, Optional[MemecoinAgent]],
+    agent: MemecoinAgent,
+    aliases: Iterable[str],
+):
+    """Add an agent's aliases to an index, None marking those shared with another"""
+    for alias in {normalize_name(alias) for alias in aliases} - {""}:
+        index[alias] = agent if index.get(alias, agent) is agent else None
+
+
+class VoteTargetIndex:
+    """Agents by every name a vote may call them, looked up in O(1)
+
+    Besides the full name, an agent is found by its ID, its first name and the
+    name and symbol of its memecoin. Full names and IDs take priority over the
+    other aliases, so a player whose full name is another player's memecoin
+    name can still be voted for by name. Aliases shared by several agents at
+    the same priority are left out rather than resolved to one of them.
+    """
+
+    def __init__(self, agents: Iterable[MemecoinAgent]):
+        exact: Dict[str, Optional[MemecoinAgent]] = {}
+        loose: Dict[str, Optional[MemecoinAgent]] = {}
+        for agent in agents:
+            character = agent.character
+            words = character.name.split()
+            _add_aliases(exact, agent, (character.name, character.id))
+            _add_aliases(
+                loose,
+                agent,
+                (
+                    words[0] if words else "",
+                    character.memecoin.name,
+                    character.memecoin.symbol,
+                ),
+            )
+        # A full name or ID shadows the same alias of another agent
+        self._agents: Dict[str, MemecoinAgent] = {
+            alias: agent
+            for index in (loose, exact)
+            for alias, agent in index.items()
+            if agent is not None
+        }
+        for alias, agent in exact.items():
+            if agent is None:
+                self._agents.pop(alias, None)
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def resolve(self, target: str) -> Optional[MemecoinAgent]:
+        """The agent a vote names, None if it names none or several"""
+        normalized = normalize_name(target)
+        agent = self._agents.get(normalized)
+        if agent is not None:
+            return agent
+        # A name within a longer answer
+        found = {
+            id(agent): agent
+            for word in normalized.split()
+            if word not in _FILLER and (agent := self._agents.get(word)) is not None
+        }
+        return next(iter(found.values())) if len(found) == 1 else None
+
+
+async def repair_vote_target(answer: str, candidates: Sequence[str]) -> str:
+    """Ask a small model which of the candidates a malformed vote meant
+
+    Only the answer and the names are sent, and the result is limited to the
+    names, so the call is cheap and can't come back malformed.
+    """
+    response = await invoke_structured_response(
+        instruction=(
+            "A player of a game show answered a vote with something that is not "
+            "exactly one of the candidates. Pick the candidate the answer means, "
+            "or the first candidate if it means none of them."
+        ),
+        input=f"Answer: {answer}\nCandidates: {', '.join(candidates)}",
+        response_format=vote_response_type(tuple(candidates)),
+        model=VOTE_REPAIR_MODEL,
+        choices=candidates,
+    )
+    return response.vote_target
+
+
+class VoteTally:
+    """Running vote count of one voting phase, by target ID
+
+    Targets are kept in buckets by their number of votes, so a ballot, or a
+    voter changing their ballot, updates the count, the leading count and the
+    tie state in O(1).
+    """
+
+    def __init__(self):
+        # Voter ID -> target ID
+        self.ballots: Dict[str, str] = {}
+        # Target ID -> votes
+        self.counts: Dict[str, int] = {}
+        # Votes -> targets with that many
+        self._buckets: Dict[int, Dict[str, None]] = {}
+        # Target ID -> number of their first vote, to list leaders stably
+        self._first_vote: Dict[str, int] = {}
+        self._votes_cast = 0
+        self.max_votes = 0
+
+    def __len__(self) -> int:
+        return len(self.ballots)
+
+    def _move(self, target: str, count: int):
+        previous = self.counts.get(target, 0)
+        if previous:
+            bucket = self._buckets[previous]
+            del bucket[target]
+            if not bucket:
+                del self._buckets[previous]
+        if count:
+            self.counts[target] = count
+            self._buckets.setdefault(count, {})[target] = None
+        else:
+            del self.counts[target]
+            del self._first_vote[target]
+
+    def add(self, voter: str, target: str) -> Optional[str]:
+        """Count a ballot, replacing the voter's earlier one
+
+        Returns the target the voter's earlier ballot named, if it changed.
+        """
+        previous = self.ballots.get(voter)
+        if previous == target:
+            return None
+        if previous is not None:
+            self._move(previous, self.counts[previous] - 1)
+            # Only the leader can leave the top bucket empty, one vote lower
+            if self.max_votes not in self._buckets:
+                self.max_votes -= 1
+        self.ballots[voter] = target
+        self._votes_cast += 1
+        self._first_vote.setdefault(target, self._votes_cast)
+        count = self.counts.get(target, 0) + 1
+        self._move(target, count)
+        self.max_votes = max(self.max_votes, count)
+        return previous
+
+    @property
+    def tied(self) -> bool:
+        return len(self._buckets.get(self.max_votes, ())) > 1
+
+    @property
+    def leaders(self) -> List[str]:
+        """Target IDs with the most votes, in the order they were first voted for"""
+        return sorted(self._buckets.get(self.max_votes, ()), key=self._first_vote.get)
+
+
+def tally_message(
+    tally: VoteTally,
+    phase: str,
+    name_of: Callable[[str], str],
+    voters: int,
+    voter: str,
+    target: str,
+    previous: Optional[str] = None,
+) -> VoteTallyMessage:
+    """The vote_tally frame of one ballot, with players named for the clients
+
+    Only the counts the ballot changed are sent: the target's, and the one of
+    the target the voter's earlier ballot named.
+    """
+    changed = {name_of(target): tally.counts[target]}
+    if previous is not None:
+        changed[name_of(previous)] = tally.counts.get(previous, 0)
+    return VoteTallyMessage(
+        type="vote_tally",
+        phase=phase,
+        voter=name_of(voter),
+        target=name_of(target),
+        counts=changed,
+        leaders=[name_of(leader) for leader in tally.leaders],
+        tied=tally.tied,
+        votes_cast=len(tally),
+        voters=voters,
+    )
@@ -1,14 +1,34 @@
+import asyncio
+import os
+import time
 from datetime import datetime, timezone
-from typing import List, Dict, Literal, Optional
+from typing import Dict, Iterable, List, Literal, Optional
+from uuid import uuid4
 from fastapi import WebSocket
 from pydantic import BaseModel, Field
 
+from the_shill_game.game.connection import (
+    WS_OVERFLOW_POLICY,
+    WS_QUEUE_SIZE,
+    ClientConnection,
+    OutboundFrame,
+    OverflowPolicy,
+)
+from the_shill_game.game.history import WS_HISTORY_SIZE, MessageHistory
+from the_shill_game.utils.metrics import current_game_metrics
+
+# A client that takes longer than this to accept a frame is disconnected
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+
 
 class WsMessage(BaseModel):
     # Timestamp in milliseconds
     timestamp: int = Field(
         default_factory=lambda: int(datetime.now(timezone.utc).timestamp() * 1000)
     )
+    # Position in the game's message history, set when the message is broadcast.
+    # Frames that are not kept in history, like deltas, have none
+    seq: Optional[int] = None
 
 
 class AgentMessage(WsMessage):
@@ -16,34 +36,160 @@ class AgentMessage(WsMessage):
     sender: str
     response: str
     thought: str
+    # Set when the response was streamed before as AgentDeltaMessage frames
+    stream_id: Optional[str] = None
+
+
+class AgentDeltaMessage(WsMessage):
+    """A piece of an agent response that is still being generated"""
+
+    type: Literal["agent_delta"]
+    stream_id: str
+    sender: str
+    delta: str
+    # Position of the delta in the response. A delta at offset 0 restarts the text
+    offset: int
+
+
+class AgentStreamCancelMessage(WsMessage):
+    """Closes a stream whose response was dropped, so its text should be removed"""
+
+    type: Literal["agent_stream_cancel"]
+    stream_id: str
+    sender: str
 
 
 class SystemMessage(WsMessage):
     type: Literal["system"]
     content: str
     event: Optional[str] = None
+    # Turns and votes that ran out of time, on the ended event of a phase
+    timeouts: Optional[int] = None
+
+
+class VoteTallyMessage(WsMessage):
+    """A ballot of a voting phase and the counts it changed, sent after every ballot
+
+    Clients keep the running count of a phase by applying the counts of each
+    frame over the ones they have.
+    """
+
+    type: Literal["vote_tally"]
+    phase: str
+    voter: str
+    target: str
+    # Name -> votes of the players this ballot changed, 0 when one lost their
+    # last vote to a changed ballot
+    counts: Dict[str, int]
+    leaders: List[str]
+    tied: bool
+    votes_cast: int
+    voters: int
+
+
+class ReplayMessage(WsMessage):
+    """The recorded messages a client missed, sent as one frame when it joins"""
+
+    type: Literal["replay"]
+    # Sequence number of the last replayed message, to resume from next time
+    last_seq: int
+    # Older messages the client missed are no longer in history
+    truncated: bool
+    # The missed frames, serialized by replay_payload()
+    messages: List[dict] = []
+
+    def replay_payload(self, frames: List[str]) -> str:
+        """The frame JSON with already serialized frames as its messages
+
+        The frames are written as they were recorded instead of being parsed and
+        serialized again.
+        """
+        envelope = self.model_dump_json(exclude={"messages"})
+        return f'{envelope[:-1]},"messages":[{",".join(frames)}]}}'
+
+
+class CharacterStream:
+    """Delta frames of one agent message, closed by an AgentMessage with the same stream_id"""
+
+    def __init__(self, ws_manager: "WebSocketManager", game_id: str, sender: str):
+        self.ws_manager = ws_manager
+        self.game_id = game_id
+        self.sender = sender
+        self.stream_id = uuid4().hex
+
+    async def send_delta(self, delta: str, offset: int):
+        await self.ws_manager.send_character_delta(
+            self.game_id, self.stream_id, self.sender, delta, offset
+        )
+
+    async def cancel(self):
+        """Close the stream without a final message"""
+        await self.ws_manager.send_character_stream_cancel(
+            self.game_id, self.stream_id, self.sender
+        )
 
 
 class WebSocketManager:
-    def __init__(self):
+    def __init__(
+        self,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+        max_queue: int = WS_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = WS_OVERFLOW_POLICY,
+        history_size: int = WS_HISTORY_SIZE,
+    ):
+        self.send_timeout = send_timeout
+        self.history_size = history_size
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        # Background close tasks, referenced until they finish
+        self._closing: set = set()
         # ID -> List of WebSockets
         self.active_connections: Dict[str, List[WebSocket]] = {}
-        # ID -> List of Messages
-        self.message_history: Dict[str, List[WsMessage]] = {}
+        # WebSocket -> its outbound queue and writer
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        # ID -> Recent messages, kept until the game is forgotten
+        self.message_history: Dict[str, MessageHistory] = {}
 
     async def connect(self, websocket: WebSocket, game_id: str):
         """Legacy method that accepts and adds a connection"""
         await websocket.accept()
         self.add_connection(websocket, game_id)
 
-    def add_connection(self, websocket: WebSocket, game_id: str):
-        """Add a connection that's already been accepted"""
+    def add_connection(
+        self,
+        websocket: WebSocket,
+        game_id: str,
+        since: Optional[int] = None,
+        since_timestamp: Optional[int] = None,
+    ):
+        """Add a connection that's already been accepted
+
+        Args:
+            since: Replay the messages after this sequence number
+            since_timestamp: Replay the messages after this timestamp in milliseconds
+        """
         if game_id not in self.active_connections:
             self.active_connections[game_id] = []
-            self.message_history[game_id] = []
         # Add the new connection to the list of active connections
         self.active_connections[game_id].append(websocket)
 
+        def on_failure(client: ClientConnection):
+            self.disconnect(websocket, game_id)
+
+        client = ClientConnection(
+            websocket,
+            on_failure,
+            send_timeout=self.send_timeout,
+            max_queue=self.max_queue,
+            overflow_policy=self.overflow_policy,
+        )
+        client.start()
+        self.clients[websocket] = client
+
+        # Queued before returning, so nothing broadcast later can overtake it
+        if since is not None or since_timestamp is not None:
+            self._replay(client, game_id, since, since_timestamp)
+
     def disconnect(self, websocket: WebSocket, game_id: str):
         """Remove a connection"""
         if (
@@ -51,9 +197,20 @@ class WebSocketManager:
             and websocket in self.active_connections[game_id]
         ):
             self.active_connections[game_id].remove(websocket)
+            client = self.clients.pop(websocket, None)
+            if client:
+                client.stop()
+            # History stays, so clients can still resume after everybody left
             if not self.active_connections[game_id]:
                 del self.active_connections[game_id]
-                del self.message_history[game_id]
+
+    def forget(self, game_id: str):
+        """Drop all connections and history of a game"""
+        for websocket in self.active_connections.pop(game_id, []):
+            client = self.clients.pop(websocket, None)
+            if client:
+                client.stop()
+        self.message_history.pop(game_id, None)
 
     def is_connected(self, websocket: WebSocket, game_id: str) -> bool:
         """Check if a specific WebSocket connection is still active"""
@@ -69,56 +226,189 @@ class WebSocketManager:
             and len(self.active_connections[game_id]) > 0
         )
 
+    def get_queue_stats(self, game_id: str) -> List[Dict]:
+        """Outbound queue depth and counters of every connection of a game"""
+        return [
+            self.clients[websocket].stats()
+            for websocket in self.active_connections.get(game_id, [])
+            if websocket in self.clients
+        ]
+
     async def send_personal_message(self, websocket: WebSocket, content: str):
         """Send a message to a specific client"""
         try:
             message = SystemMessage(type="system", content=content)
-            await websocket.send_json(message.model_dump())
+            client = self.clients.get(websocket)
+            if client:
+                # Queued behind the broadcasts already sent to this client
+                client.enqueue(OutboundFrame(message.model_dump_json(), message))
+            else:
+                await websocket.send_text(message.model_dump_json())
         except Exception as e:
             print(f"Error sending personal message: {e}")
 
-    async def send_character_message(self, game_id: str, content: str, sender: str):
+    async def send_character_message(
+        self,
+        game_id: str,
+        content: str,
+        sender: str,
+        stream_id: Optional[str] = None,
+    ):
         """Send a character message to all clients in a game"""
         message = AgentMessage(
-            type="agent", sender=sender, response=content, thought=""
+            type="agent",
+            sender=sender,
+            response=content,
+            thought="",
+            stream_id=stream_id,
         )
         await self._broadcast(game_id, message)
 
     async def send_character_message_with_thought(
-        self, game_id: str, content: str, thought: str, sender: str
+        self,
+        game_id: str,
+        content: str,
+        thought: str,
+        sender: str,
+        stream_id: Optional[str] = None,
     ):
         """Send a character message with thought to all clients in a game"""
         message = AgentMessage(
-            type="agent", sender=sender, response=content, thought=thought
+            type="agent",
+            sender=sender,
+            response=content,
+            thought=thought,
+            stream_id=stream_id,
         )
         await self._broadcast(game_id, message)
 
+    def open_character_stream(self, game_id: str, sender: str) -> CharacterStream:
+        """Start streaming a character message to all clients in a game"""
+        return CharacterStream(self, game_id, sender)
+
+    async def send_character_delta(
+        self, game_id: str, stream_id: str, sender: str, delta: str, offset: int
+    ):
+        """Send a piece of a character message that is still being generated"""
+        message = AgentDeltaMessage(
+            type="agent_delta",
+            stream_id=stream_id,
+            sender=sender,
+            delta=delta,
+            offset=offset,
+        )
+        # Deltas are superseded by the final message, so they are not kept in history
+        await self._broadcast(game_id, message, record=False)
+
+    async def send_character_stream_cancel(
+        self, game_id: str, stream_id: str, sender: str
+    ):
+        """Tell all clients in a game that a streamed message won't be sent"""
+        message = AgentStreamCancelMessage(
+            type="agent_stream_cancel", stream_id=stream_id, sender=sender
+        )
+        # Like its deltas, a cancelled stream is not kept in history
+        await self._broadcast(game_id, message, record=False)
+
     async def send_system_message(self, game_id: str, content: str):
         """Send a system message to all clients in a game"""
         message = SystemMessage(type="system", content=content)
         await self._broadcast(game_id, message)
 
-    async def send_event(self, game_id: str, event: str):
+    async def send_event(
+        self, game_id: str, event: str, timeouts: Optional[int] = None
+    ):
         """Send an event to all clients in a game"""
-        message = SystemMessage(type="system", content="", event=event)
+        message = SystemMessage(
+            type="system", content="", event=event, timeouts=timeouts
+        )
         await self._broadcast(game_id, message)
 
-    async def _broadcast(self, game_id: str, message: WsMessage):
-        """Broadcast a message to all clients in a game"""
+    async def send_vote_tally(self, game_id: str, tally: VoteTallyMessage):
+        """Send the running vote count to all clients in a game"""
+        await self._broadcast(game_id, tally)
+
+    def record(
+        self,
+        game_id: str,
+        messages: Iterable[WsMessage],
+        last_seq: Optional[int] = None,
+    ):
+        """Add messages to a game's history without sending them
+
+        Used for restored games, so clients that join get what was said before.
+        With last_seq, the messages are numbered so the last one gets it and
+        later messages go on from there. A client that reconnects with a seq
+        from before a restart then misses nothing. Frames of a phase that was
+        cut short are not recorded again, so it may get a few frames twice.
+        """
+        messages = list(messages)
+        history = self._history(game_id)
+        if last_seq is not None:
+            history.next_seq = max(history.next_seq, last_seq - len(messages) + 1)
+        for message in messages:
+            message.seq = history.claim_seq()
+            history.append(message.seq, message.timestamp, message.model_dump_json())
+
+    def _history(self, game_id: str) -> MessageHistory:
+        if game_id not in self.message_history:
+            self.message_history[game_id] = MessageHistory(self.history_size)
+        return self.message_history[game_id]
+
+    def _replay(
+        self,
+        client: ClientConnection,
+        game_id: str,
+        since: Optional[int],
+        since_timestamp: Optional[int],
+    ):
+        """Queue the recorded messages a client missed as a single frame"""
+        history = self._history(game_id)
+        frames, truncated = history.since(seq=since, timestamp=since_timestamp)
+        message = ReplayMessage(
+            type="replay", last_seq=history.last_seq, truncated=truncated
+        )
+        client.enqueue(OutboundFrame(message.replay_payload(frames), message))
+
+    async def _broadcast(self, game_id: str, message: WsMessage, record: bool = True):
+        """Broadcast a message to all clients in a game
+
+        Messages are serialized once and queued per client, so this never waits
+        on a client. Each client's writer task does the sending. Recorded
+        messages are numbered and kept for replay even without any client.
+        """
+        start = time.perf_counter()
+        if record:
+            history = self._history(game_id)
+            message.seq = history.claim_seq()
+            payload = message.model_dump_json()
+            history.append(message.seq, message.timestamp, payload)
+        elif game_id in self.active_connections:
+            payload = message.model_dump_json()
+
         if game_id in self.active_connections:
-            self.message_history[game_id].append(message)
-            failed_connections = []
-
-            for connection in self.active_connections[game_id]:
-                try:
-                    # Convert the message to a dictionary and then to JSON
-                    message_dict = message.model_dump()
-                    await connection.send_json(message_dict)
-                except Exception as e:
-                    print(f"Error broadcasting message: {e}")
-                    # Mark the connection for removal
-                    failed_connections.append(connection)
-
-            # Remove failed connections
-            for connection in failed_connections:
-                self.disconnect(connection, game_id)
+            frame = OutboundFrame(payload, message)
+            failed_connections = [
+                websocket
+                for websocket in self.active_connections[game_id]
+                if websocket in self.clients
+                and not self.clients[websocket].enqueue(frame)
+            ]
+
+            # Remove connections whose overflow policy is to disconnect
+            for websocket in failed_connections:
+                self.disconnect(websocket, game_id)
+                task = asyncio.create_task(self._close(websocket))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+
+        game = current_game_metrics()
+        if game and game.game_id == game_id:
+            game.record_broadcast(time.perf_counter() - start)
+
+    async def _close(self, websocket: WebSocket):
+        """Close a connection without waiting on a client that is not reading"""
+        try:
+            await asyncio.wait_for(websocket.close(code=1008), self.send_timeout)
+        except Exception:
+            pass
@@ -1,16 +1,46 @@
 import asyncio
 import json
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any, Optional
 
+from the_shill_game.agent.memecoin_cache import get_memecoin_cache
+from the_shill_game.game.registry import (
+    DEFAULT_GAME_ID,
+    GameCapacityError,
+    GameRegistry,
+)
+from the_shill_game.game.replay import GameReplay
 from the_shill_game.game.setup import run_game, setup_game
+from the_shill_game.game.state import GameState
 from the_shill_game.game.websocket import WebSocketManager
+from the_shill_game.utils.dummy import MEMECOIN_THEMES
+from the_shill_game.utils.llm_client import close_llm_client
 from the_shill_game.utils.logger import logger
+from the_shill_game.utils.metrics import render_prometheus
+from the_shill_game.utils.routing import get_model_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bring back the games of the previous process, e.g. after a deploy
+    restored = registry.restore()
+    if restored:
+        logger.info(f"Restored {len(restored)} games")
+    registry.start_reaper()
+    # Keep pre-generated memecoins ready so lobby setup doesn't wait on the models
+    get_memecoin_cache().start_pool(MEMECOIN_THEMES)
+    yield
+    await registry.stop()
+    await get_memecoin_cache().stop()
+    # Release the shared LLM connection pool
+    await close_llm_client()
 
 
 # Setup FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -23,21 +53,70 @@ app.add_middleware(
 
 # Create WebSocket manager instance
 ws_manager = WebSocketManager()
-# Current active game state
-game_state = None
-# Flag to track if game is being set up
-is_initializing = False
-# Lock for game initialization
-initialization_lock = asyncio.Lock()
+# All games of this process. The unparameterized /game/* routes and /ws use
+# the default game
+registry = GameRegistry(ws_manager)
+
+
+def _get_game_state(game_id: str) -> Optional[GameState]:
+    """Get the state of a game if it has been set up"""
+    entry = registry.get(game_id)
+    return entry.state if entry else None
+
+
+@app.post("/games")
+async def create_game():
+    """Reserve a new game ID"""
+    try:
+        entry = registry.create()
+    except GameCapacityError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"status": "success", "game_id": entry.game_id}
+
+
+@app.get("/games")
+async def list_games():
+    """List the games of this process"""
+    return {
+        "status": "success",
+        "capacity": registry.capacity,
+        "games": [
+            {
+                "game_id": entry.game_id,
+                "initialized": entry.state is not None,
+                "running": entry.is_running,
+                "round": entry.state.round if entry.state else None,
+                "round_phase": entry.state.round_phase if entry.state else None,
+                "connections": len(
+                    ws_manager.active_connections.get(entry.game_id, [])
+                ),
+            }
+            for entry in registry.games()
+        ],
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Phase and model call timings of all games, in Prometheus text format"""
+    return PlainTextResponse(
+        render_prometheus() + get_model_router().render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
+
 
-# Default game ID
-GAME_ID = "default"
+@app.get("/routing")
+async def routing():
+    """The model each call type is routed to, and why"""
+    return {"status": "success", **get_model_router().summary()}
 
 
 @app.get("/game/state")
-async def get_game_state():
+@app.get("/games/{game_id}/state")
+async def get_game_state(game_id: str = DEFAULT_GAME_ID):
     """Get the current game state"""
     try:
+        game_state = _get_game_state(game_id)
         if not game_state:
             return {
                 "status": "not_initialized",
@@ -65,6 +144,10 @@ async def get_game_state():
                 }
                 for agent in game_state.eliminated_agents
             ],
+            "setup_metrics": game_state.setup_metrics.summary()
+            if game_state.setup_metrics
+            else None,
+            "phase_metrics": game_state.metrics.summary(),
         }
         return response
     except Exception as e:
@@ -75,30 +158,37 @@ async def get_game_state():
 
 
 @app.post("/game/setup")
-async def setup_game_api(traits: Dict[str, str] = Body(...)):
-    """Set up a new game with custom character traits"""
-    global game_state, is_initializing
-
+@app.post("/games/{game_id}/setup")
+async def setup_game_api(
+    traits: Dict[str, str] = Body(...), game_id: str = DEFAULT_GAME_ID
+):
+    """Set up a game created with POST /games, or the default game"""
     try:
-        async with initialization_lock:
-            if is_initializing:
-                return {
-                    "status": "error",
-                    "message": "Game is already being initialized. Please wait.",
-                }
+        entry = registry.find(game_id)
+    except GameCapacityError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not entry:
+        raise HTTPException(status_code=404, detail=f"Game {game_id} not found")
 
-            if game_state:
+    try:
+        # A setup that waited for another one finds its game below
+        async with entry.lock:
+            if entry.state:
                 return {
                     "status": "error",
                     "message": "Game already exists. Cannot initialize a new one.",
                 }
 
-            is_initializing = True
+            entry.is_initializing = True
             try:
                 # Setup the game with client traits
                 game_state = await setup_game(
-                    ws_manager=ws_manager, game_id=GAME_ID, client_traits=traits
+                    ws_manager=ws_manager,
+                    game_id=game_id,
+                    client_traits=traits,
+                    journal_dir=registry.journal_dir,
                 )
+                entry.state = game_state
 
                 # Get player names to return
                 players = game_state.get_player_names()
@@ -107,9 +197,12 @@ async def setup_game_api(traits: Dict[str, str] = Body(...)):
                     "status": "success",
                     "message": "Game initialized successfully with client character",
                     "players": players,
+                    "setup_metrics": game_state.setup_metrics.summary(),
+                    "memecoin_cache": get_memecoin_cache().stats(),
                 }
             finally:
-                is_initializing = False
+                entry.is_initializing = False
+                entry.touch()
 
     except Exception as e:
         logger.error(f"Error setting up game: {e}")
@@ -117,19 +210,23 @@ async def setup_game_api(traits: Dict[str, str] = Body(...)):
 
 
 @app.post("/game/start")
-async def start_game():
+@app.post("/games/{game_id}/start")
+async def start_game(game_id: str = DEFAULT_GAME_ID):
     """Start the game"""
-    global game_state
-
     try:
-        if not game_state:
+        entry = registry.get(game_id)
+        if not entry or not entry.state:
             return {
                 "status": "error",
                 "message": "Game not initialized yet. Connect via WebSocket to initialize.",
             }
 
-        # Start the game
-        asyncio.create_task(run_game(game_state))
+        async with entry.lock:
+            if entry.is_running:
+                return {"status": "error", "message": "Game is already running."}
+
+            # Start the game
+            entry.task = asyncio.create_task(run_game(entry.state))
 
         return {"status": "success", "message": "Game started"}
 
@@ -138,26 +235,58 @@ async def start_game():
         raise HTTPException(status_code=500, detail=f"Error starting game: {str(e)}")
 
 
+@app.post("/game/resume")
+@app.post("/games/{game_id}/resume")
+async def resume_game(game_id: str = DEFAULT_GAME_ID):
+    """Continue a restored game from its last completed phase"""
+    try:
+        entry = registry.get(game_id)
+        if not entry or not entry.state:
+            return {
+                "status": "error",
+                "message": "Game not initialized yet. Connect via WebSocket to initialize.",
+            }
+
+        async with entry.lock:
+            if entry.is_running:
+                return {"status": "error", "message": "Game is already running."}
+
+            entry.task = asyncio.create_task(entry.state.resume())
+
+        return {"status": "success", "message": "Game resumed"}
+
+    except Exception as e:
+        logger.error(f"Error resuming game: {e}")
+        raise HTTPException(status_code=500, detail=f"Error resuming game: {str(e)}")
+
+
 @app.post("/game/next-round")
-async def next_round():
+@app.post("/games/{game_id}/next-round")
+async def next_round(game_id: str = DEFAULT_GAME_ID):
     """Trigger the next round via HTTP POST"""
-    global game_state
-
     try:
-        if not game_state:
+        entry = registry.get(game_id)
+        if not entry or not entry.state:
             return {
                 "status": "error",
                 "message": "Game not initialized yet. Connect via WebSocket to initialize.",
             }
 
-        if game_state.round_phase == "game_over":
+        if entry.state.round_phase == "game_over":
             return {
                 "status": "error",
                 "message": "Game is over. Cannot trigger next round.",
             }
 
-        # Trigger the next round
-        asyncio.create_task(game_state.run_round())
+        async with entry.lock:
+            if entry.is_running:
+                return {
+                    "status": "error",
+                    "message": "A round is still in progress. Please wait.",
+                }
+
+            # Trigger the next round
+            entry.task = asyncio.create_task(entry.state.run_round())
 
         return {"status": "success", "message": "Next round triggered successfully"}
 
@@ -169,9 +298,11 @@ async def next_round():
 
 
 @app.get("/game/winner")
-async def get_winner():
+@app.get("/games/{game_id}/winner")
+async def get_winner(game_id: str = DEFAULT_GAME_ID):
     """Get the winner's takeaway when the game is over"""
     try:
+        game_state = _get_game_state(game_id)
         if not game_state:
             return {
                 "status": "not_initialized",
@@ -185,7 +316,7 @@ async def get_winner():
             }
 
         # Get the winner(s)
-        takeaway = game_state.generate_winner_takeaway()
+        takeaway = await game_state.generate_winner_takeaway()
         if len(game_state.active_agents) == 1:
             winner = game_state.active_agents[0]
             return {
@@ -223,20 +354,102 @@ async def get_winner():
         )
 
 
+@app.get("/game/transcript")
+@app.get("/games/{game_id}/transcript")
+async def get_transcript(
+    game_id: str = DEFAULT_GAME_ID,
+    round: Optional[int] = None,
+    phase: Optional[str] = None,
+    sender_id: Optional[str] = None,
+):
+    """Get the structured transcript of a game, optionally of one round, phase or speaker"""
+    game_state = _get_game_state(game_id)
+    if not game_state:
+        raise HTTPException(status_code=404, detail=f"Game {game_id} not found")
+    transcript = game_state.transcript
+    if round is not None:
+        entries = transcript.by_round(round)
+    elif phase is not None:
+        entries = transcript.by_phase(phase)
+    elif sender_id is not None:
+        entries = transcript.by_sender(sender_id)
+    else:
+        entries = transcript.view()
+    # The indexed view is narrowed by the remaining filters
+    return {
+        "game_id": game_id,
+        "entries": [
+            entry.to_dict()
+            for entry in entries
+            if (round is None or entry.round == round)
+            and (phase is None or entry.phase == phase)
+            and (sender_id is None or entry.sender_id == sender_id)
+        ],
+    }
+
+
+@app.get("/game/replay")
+@app.get("/games/{game_id}/replay")
+async def get_replay(game_id: str = DEFAULT_GAME_ID, events: Optional[int] = None):
+    """Rebuild a game from its journal, as it was after the first `events` events"""
+    game_state = _get_game_state(game_id)
+    if not game_state or not game_state.journal:
+        raise HTTPException(status_code=404, detail=f"No journal for game {game_id}")
+    replay = GameReplay.from_journal(game_state.journal)
+    return {"total_events": len(replay), **replay.state_at(events).summary()}
+
+
+@app.get("/game/connections")
+@app.get("/games/{game_id}/connections")
+async def get_connections(game_id: str = DEFAULT_GAME_ID):
+    """Get the outbound queue depth of every client connected to a game"""
+    if not registry.get(game_id):
+        raise HTTPException(status_code=404, detail=f"Game {game_id} not found")
+    connections = ws_manager.get_queue_stats(game_id)
+    return {
+        "game_id": game_id,
+        "connections": connections,
+        "max_depth": max((c["depth"] for c in connections), default=0),
+    }
+
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """Handle a new WebSocket connection for an existing game"""
-    global game_state
+@app.websocket("/ws/{game_id}")
+async def websocket_endpoint(
+    websocket: WebSocket,
+    game_id: str = DEFAULT_GAME_ID,
+    since: Optional[int] = None,
+    since_ts: Optional[int] = None,
+):
+    """Handle a new WebSocket connection for an existing game
+
+    Clients that pass `since` (the last seq they received, 0 for everything) or
+    `since_ts` (a timestamp in milliseconds) first get the messages they missed
+    as one replay frame.
+    """
+    logger.info(f"New WebSocket connection for game {game_id}")
+    try:
+        entry = registry.find(game_id)
+    except GameCapacityError as e:
+        # 1013: try again later
+        await websocket.close(code=1013, reason=str(e))
+        return
+    if not entry:
+        # 1008: policy violation, games are created with POST /games
+        await websocket.close(code=1008, reason=f"Game {game_id} not found")
+        return
 
-    logger.info("New WebSocket connection")
     # Accept the WebSocket connection
     await websocket.accept()
 
     try:
-        # Add the connection to the manager for the default game ID
-        ws_manager.add_connection(websocket, GAME_ID)
+        # Add the connection to the manager for this game
+        ws_manager.add_connection(
+            websocket, game_id, since=since, since_timestamp=since_ts
+        )
 
         # Check if game exists
+        game_state = entry.state
         if game_state:
             logger.info("Client joined existing game.")
             await ws_manager.send_personal_message(websocket, "Joined game.")
@@ -277,7 +490,8 @@ async def websocket_endpoint(websocket: WebSocket):
         logger.error(f"WebSocket error: {e}")
     finally:
         # Clean up the connection
-        ws_manager.disconnect(websocket, GAME_ID)
+        ws_manager.disconnect(websocket, game_id)
+        entry.touch()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,372 @@
+"""
+Headless tournament: many complete games across a process pool, for trait tuning.
+
+    python -m the_shill_game.tournament --games 10000 --backend fake > games.jsonl
+    python -m the_shill_game.tournament --games 500 --workers 8 --concurrency 16 \\
+        --backend openai --output games.jsonl --stats stats.json
+
+Every worker process runs one asyncio loop with its own model backend and
+plays up to `--concurrency` games at a time, without WebSockets or journals.
+Each finished game is written as one JSON line as soon as it arrives, and the
+trait and win-rate statistics are updated from it and the line dropped, so a
+sweep never holds more than its running games in memory. The winner takeaway,
+a full-transcript model call the statistics don't use, is only generated with
+`--takeaways`.
+
+`--backend` is "fake", "openai" or "package.module:factory" for a function
+returning a ModelBackend, called once in every worker. Names, traits and host
+lines come from the global random generator, so games are only reproducible
+from their seed with `--concurrency 1`.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, TextIO
+
+from the_shill_game.agent.memecoin_cache import MemecoinCache, set_memecoin_cache
+from the_shill_game.agent.traits import Traits
+from the_shill_game.game.setup import setup_game
+from the_shill_game.game.state import GameState
+from the_shill_game.utils.backend import ModelBackend, OpenAIBackend, set_model_backend
+from the_shill_game.utils.metrics import forget_game_metrics
+
+
+def load_backend(spec: str) -> ModelBackend:
+    """The backend named by a --backend spec"""
+    if spec == "openai":
+        return OpenAIBackend()
+    if spec == "fake":
+        from the_shill_game.utils.fake_backend import FakeBackend
+
+        return FakeBackend.from_env()
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"Unknown model backend: {spec}")
+    factory: Callable[[], ModelBackend] = getattr(importlib.import_module(module), name)
+    return factory()
+
+
+def game_result(game_state: GameState, index: int, seed: int, seconds: float) -> Dict:
+    """The outcome of a finished game, without its transcript
+
+    Placement 1 is a winner, both finalists win when the game ends with two.
+    The eliminated players are placed in reverse order of elimination.
+    """
+    winners = game_state.active_agents
+    placements = {agent.character.id: 1 for agent in winners}
+    for i, agent in enumerate(reversed(game_state.eliminated_agents)):
+        placements[agent.character.id] = len(winners) + i + 1
+    phases = game_state.metrics.summary().values()
+    return {
+        "game": index,
+        "seed": seed,
+        "worker": os.getpid(),
+        "seconds": round(seconds, 3),
+        "rounds": game_state.round,
+        "messages": len(game_state.transcript),
+        "llm_calls": sum(p["calls"] for p in phases),
+        "prompt_tokens": sum(p["prompt_tokens"] for p in phases),
+        "completion_tokens": sum(p["completion_tokens"] for p in phases),
+        "winners": [agent.character.name for agent in winners],
+        "players": [
+            {
+                "name": agent.character.name,
+                "traits": agent.character.traits.to_dict(),
+                "model": agent.agent.model,
+                "placement": placements[agent.character.id],
+                "won": placements[agent.character.id] == 1,
+            }
+            for agent in game_state.agents
+        ],
+        "takeaway": game_state.winner_takeaway,
+    }
+
+
+async def play_game(
+    index: int, seed: int, num_agents: int, takeaway: bool = False
+) -> Dict:
+    """Play one complete game without spectators and return its result
+
+    The winner takeaway is only generated with takeaway, otherwise the
+    result has None for it.
+    """
+    game_id = f"tournament-{index}"
+    random.seed(seed)
+    start = time.perf_counter()
+    game_state = await setup_game(
+        None, num_agents=num_agents, game_id=game_id, journal_dir=None
+    )
+    game_state.precompute_takeaway = takeaway
+    try:
+        await game_state.start()
+        while game_state.round_phase != "game_over":
+            await game_state.run_round()
+        if takeaway:
+            await game_state.generate_winner_takeaway()
+        return game_result(game_state, index, seed, time.perf_counter() - start)
+    finally:
+        forget_game_metrics(game_id)
+
+
+async def _worker_loop(
+    tasks: multiprocessing.Queue,
+    results: multiprocessing.Queue,
+    backend: str,
+    concurrency: int,
+    num_agents: int,
+    seed: int,
+    takeaways: bool,
+):
+    set_model_backend(load_backend(backend))
+    # Generate every memecoin, a shared SQLite file would serialize the workers
+    set_memecoin_cache(MemecoinCache(""))
+
+    async def play():
+        # Every player takes exactly one of the stop markers
+        while (index := await asyncio.to_thread(tasks.get)) is not None:
+            try:
+                result = await play_game(index, seed + index, num_agents, takeaways)
+            except Exception as e:
+                result = {"game": index, "seed": seed + index, "error": repr(e)}
+            results.put(result)
+
+    await asyncio.gather(*[play() for _ in range(concurrency)])
+
+
+def _worker(*args):
+    # Standard output carries the results, keep the game's prints out of it
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        asyncio.run(_worker_loop(*args))
+
+
+class TournamentStats:
+    """Win rates and placements per trait value, updated one game at a time"""
+
+    def __init__(self):
+        self.games = 0
+        self.errors = 0
+        self.rounds = 0
+        self.seconds = 0.0
+        self.llm_calls = 0
+        self.players = 0
+        # (trait, value) -> [appearances, wins, sum of placements]
+        self.traits: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0.0, 0])
+        # model -> [appearances, wins, sum of placements]
+        self.models: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0])
+
+    def add(self, result: Dict):
+        if "error" in result:
+            self.errors += 1
+            return
+        self.games += 1
+        self.rounds += result["rounds"]
+        self.seconds += result["seconds"]
+        self.llm_calls += result["llm_calls"]
+        self.players += len(result["players"])
+        # Co-winners share the win
+        share = 1 / len(result["winners"])
+        for player in result["players"]:
+            won = share if player["won"] else 0.0
+            for row in (
+                *(self.traits[item] for item in player["traits"].items()),
+                self.models[player["model"]],
+            ):
+                row[0] += 1
+                row[1] += won
+                row[2] += player["placement"]
+
+    @staticmethod
+    def _rates(row: List[float], base_rate: float) -> Dict:
+        appearances, wins, placements = row
+        win_rate = wins / appearances
+        return {
+            "appearances": appearances,
+            "wins": round(wins, 2),
+            "win_rate": round(win_rate, 4),
+            # Win rate relative to a player picked at random
+            "lift": round(win_rate / base_rate, 3) if base_rate else None,
+            "mean_placement": round(placements / appearances, 3),
+        }
+
+    def summary(self) -> Dict:
+        # Wins are shared, so a random player wins one game in players / games
+        base_rate = self.games / self.players if self.players else 0.0
+        return {
+            "games": self.games,
+            "errors": self.errors,
+            "rounds_per_game": round(self.rounds / self.games, 2)
+            if self.games
+            else None,
+            "seconds_per_game": round(self.seconds / self.games, 3)
+            if self.games
+            else None,
+            "llm_calls_per_game": round(self.llm_calls / self.games, 2)
+            if self.games
+            else None,
+            "base_win_rate": round(base_rate, 4),
+            "traits": {
+                trait: {
+                    value: self._rates(self.traits[(trait, value)], base_rate)
+                    for value in values
+                    if (trait, value) in self.traits
+                }
+                for trait, values in Traits.TRAIT_OPTIONS.items()
+            },
+            "models": {
+                model: self._rates(row, base_rate)
+                for model, row in sorted(self.models.items())
+            },
+        }
+
+
+def run_tournament(
+    games: int,
+    output: TextIO,
+    workers: int = os.cpu_count() or 1,
+    concurrency: int = 8,
+    num_agents: int = 6,
+    backend: str = "fake",
+    seed: int = 0,
+    on_result: Optional[Callable[[Dict, TournamentStats], None]] = None,
+    takeaways: bool = False,
+) -> TournamentStats:
+    """Play `games` games across `workers` processes and stream them to `output`
+
+    Returns the statistics of the finished games. A worker that dies takes its
+    running games with it, they are counted as errors. Winner takeaways are
+    only generated with takeaways.
+    """
+    # Fresh interpreters, so no worker inherits the event loop or HTTP clients
+    context = multiprocessing.get_context("spawn")
+    tasks = context.Queue()
+    results = context.Queue()
+    for index in range(games):
+        tasks.put(index)
+    for _ in range(workers * concurrency):
+        tasks.put(None)
+
+    processes = [
+        context.Process(
+            target=_worker,
+            args=(tasks, results, backend, concurrency, num_agents, seed, takeaways),
+            daemon=True,
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    stats = TournamentStats()
+    received = 0
+    try:
+        while received < games:
+            try:
+                result = results.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    stats.errors += games - received
+                    break
+                continue
+            received += 1
+            output.write(json.dumps(result) + "\n")
+            stats.add(result)
+            if on_result:
+                on_result(result, stats)
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    output.flush()
+    return stats
+
+
+def main(args: argparse.Namespace) -> int:
+    # Fail here rather than in every worker
+    load_backend(args.backend)
+    start = time.perf_counter()
+
+    def progress(result: Dict, stats: TournamentStats):
+        done = stats.games + stats.errors
+        if args.progress and done % args.progress == 0:
+            print(
+                f"{done}/{args.games} games, {stats.errors} errors, "
+                f"{done / (time.perf_counter() - start):.1f} games/s",
+                file=sys.stderr,
+            )
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        stats = run_tournament(
+            args.games,
+            output,
+            workers=args.workers,
+            concurrency=args.concurrency,
+            num_agents=args.agents,
+            backend=args.backend,
+            seed=args.seed,
+            on_result=progress,
+            takeaways=args.takeaways,
+        )
+    finally:
+        if args.output:
+            output.close()
+
+    summary = stats.summary()
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    if args.stats:
+        with open(args.stats, "w") as file:
+            json.dump(summary, file, indent=2)
+
+    print(
+        f"{summary['games']} games, {summary['errors']} errors in "
+        f"{summary['seconds']}s, base win rate {summary['base_win_rate']}",
+        file=sys.stderr,
+    )
+    for trait, values in summary["traits"].items():
+        for value, rates in values.items():
+            print(
+                f"  {trait:<18} {value:<20} win rate {rates['win_rate']:<7} "
+                f"lift {rates['lift']:<6} placement {rates['mean_placement']}",
+                file=sys.stderr,
+            )
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Games at a time per worker"
+    )
+    parser.add_argument("--agents", type=int, default=6)
+    parser.add_argument(
+        "--backend",
+        default="fake",
+        help='"fake", "openai" or package.module:factory',
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON lines file, stdout by default")
+    parser.add_argument("--stats", help="Also write the statistics to this file")
+    parser.add_argument(
+        "--takeaways",
+        action="store_true",
+        help="Generate the winner takeaway of every game, one model call each",
+    )
+    parser.add_argument(
+        "--progress", type=int, default=100, help="Report every N games, 0 for never"
+    )
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,169 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Optional, Sequence, Type
+
+from agents import Agent, Runner
+from openai.types.responses import ResponseCompletedEvent, ResponseTextDeltaEvent
+from pydantic import BaseModel
+
+from the_shill_game.agent.streaming import JsonFieldStreamer
+from the_shill_game.utils.llm_client import call_llm, get_async_openai_client
+from the_shill_game.utils.metrics import record_tokens
+
+# "openai" calls the real models, "fake" the local stand-in of fake_backend.py
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "openai")
+
+# Receives streamed response text and its character offset in the response.
+# The offset goes back to 0 when a failed stream is retried from the start.
+DeltaCallback = Callable[[str, int], Awaitable[None]]
+
+
+class ModelBackend(ABC):
+    """Where every LLM call of the game ends up
+
+    `choices` lists the legal values of a `vote_target` field. The real models
+    read them from the prompt, backends that don't read prompts use them instead.
+    """
+
+    @abstractmethod
+    async def chat(
+        self, input: str, instruction: str = "", model: str = "gpt-4o"
+    ) -> str:
+        """Return a plain text completion"""
+
+    @abstractmethod
+    async def structured(
+        self,
+        input: str,
+        response_format: Type[BaseModel],
+        instruction: str = "",
+        model: str = "gpt-4o",
+        choices: Optional[Sequence[str]] = None,
+    ) -> BaseModel:
+        """Return a completion parsed into response_format"""
+
+    @abstractmethod
+    async def run_agent(
+        self,
+        agent: Agent,
+        prompt: str,
+        on_delta: Optional[DeltaCallback] = None,
+        choices: Optional[Sequence[str]] = None,
+    ) -> Any:
+        """Run an agent on a prompt and return its final output
+
+        When on_delta is given, the `response` field of the output is streamed
+        to it as it is generated.
+        """
+
+
+def _messages(input: str, instruction: str):
+    messages = []
+    if instruction:
+        messages.append({"role": "system", "content": instruction})
+    messages.append({"role": "user", "content": input})
+    return messages
+
+
+def _record_usage(completion):
+    usage = completion.usage
+    if usage:
+        details = usage.prompt_tokens_details
+        record_tokens(
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            details.cached_tokens if details else 0,
+        )
+
+
+class OpenAIBackend(ModelBackend):
+    """The OpenAI API, through the shared client, concurrency limit and retries"""
+
+    async def chat(
+        self, input: str, instruction: str = "", model: str = "gpt-4o"
+    ) -> str:
+        client = get_async_openai_client()
+        messages = _messages(input, instruction)
+        completion = await call_llm(
+            lambda: client.chat.completions.create(model=model, messages=messages)
+        )
+        _record_usage(completion)
+        return completion.choices[0].message.content
+
+    async def structured(
+        self,
+        input: str,
+        response_format: Type[BaseModel],
+        instruction: str = "",
+        model: str = "gpt-4o",
+        choices: Optional[Sequence[str]] = None,
+    ) -> BaseModel:
+        client = get_async_openai_client()
+        messages = _messages(input, instruction)
+        completion = await call_llm(
+            lambda: client.beta.chat.completions.parse(
+                model=model, messages=messages, response_format=response_format
+            )
+        )
+        _record_usage(completion)
+        return completion.choices[0].message.parsed
+
+    async def run_agent(
+        self,
+        agent: Agent,
+        prompt: str,
+        on_delta: Optional[DeltaCallback] = None,
+        choices: Optional[Sequence[str]] = None,
+    ) -> Any:
+        # Make sure the shared client is registered for this loop before running
+        get_async_openai_client()
+        # Always streamed: the non-streamed result doesn't carry cached token counts
+        result = await call_llm(lambda: self._run_streamed(agent, prompt, on_delta))
+        return result.final_output
+
+    async def _run_streamed(
+        self, agent: Agent, prompt: str, on_delta: Optional[DeltaCallback]
+    ):
+        result = Runner.run_streamed(agent, prompt)
+        streamer = JsonFieldStreamer("response")
+        async for event in result.stream_events():
+            if event.type != "raw_response_event":
+                continue
+            if on_delta and isinstance(event.data, ResponseTextDeltaEvent):
+                offset = streamer.offset
+                delta = streamer.feed(event.data.delta)
+                if delta:
+                    await on_delta(delta, offset)
+            elif isinstance(event.data, ResponseCompletedEvent):
+                usage = event.data.response.usage
+                if usage:
+                    record_tokens(
+                        usage.input_tokens,
+                        usage.output_tokens,
+                        usage.input_tokens_details.cached_tokens,
+                    )
+        return result
+
+
+_backend: Optional[ModelBackend] = None
+
+
+def set_model_backend(backend: ModelBackend):
+    """Route all LLM calls of this process through a backend"""
+    global _backend
+    _backend = backend
+
+
+def get_model_backend() -> ModelBackend:
+    """The backend of this process, created from MODEL_BACKEND on first use"""
+    global _backend
+    if _backend is None:
+        if MODEL_BACKEND == "openai":
+            _backend = OpenAIBackend()
+        elif MODEL_BACKEND == "fake":
+            from the_shill_game.utils.fake_backend import FakeBackend
+
+            _backend = FakeBackend.from_env()
+        else:
+            raise ValueError(f"Unknown model backend: {MODEL_BACKEND}")
+    return _backend
@@ -1,10 +1,86 @@
 import asyncio
+import os
 import random
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional
+
+from pydantic import BaseModel, Field
 
 from the_shill_game.agent.character import Character
+from the_shill_game.agent.memecoin import fallback_memecoin
 from the_shill_game.agent.memecoin_agent import MemecoinAgent, create_agent
 from the_shill_game.agent.traits import Traits
+from the_shill_game.utils.id_generator import generate_id
+from the_shill_game.utils.logger import logger
+
+# Maximum number of memecoins generated at the same time during setup
+SETUP_MAX_CONCURRENCY = int(os.getenv("SETUP_MAX_CONCURRENCY", "32"))
+
+# Themes of the generated memecoins, also the themes the memecoin pool stocks
+MEMECOIN_THEMES = [
+    "Cats",
+    "Dogs",
+    "Aliens",
+    "Space",
+    "Time Travel",
+    "Gaming",
+    "Retro Tech",
+    "Dank Memes",
+    "Food (Pizza, Tacos, Burgers)",
+    "Sports",
+    "Music Genres (Lo-fi, Metal, Synthwave)",
+    "Street Art",
+    "Tech Bros",
+    "Fashion (Y2K, Vaporwave)",
+    "Crypto Culture",
+    "NFT Parody",
+    "AI Takeover",
+    "Taiwan Culture",
+    "Conspiracy Theories",
+    "Internet Legends",
+    "Meme History (Doge, Pepe, etc.)",
+    "Cartoons",
+    "Movie Parodies",
+    "Quantum Physics (but dumbed down)",
+    "Weird Holidays (Talk Like a Pirate Day, etc.)",
+    "Fast Food Mascots",
+    "Mythical Creatures",
+    "Apocalypse Vibes",
+    "Corporate Satire",
+    "Internet Nostalgia (early 2000s)",
+]
+
+
+class SetupMetrics(BaseModel):
+    """Timing of a lobby setup"""
+
+    num_agents: int = 0
+    max_concurrency: int = SETUP_MAX_CONCURRENCY
+    total_seconds: float = Field(
+        default=0.0, description="Wall time of the whole setup."
+    )
+    character_seconds: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Time spent generating each character, keyed by character ID.",
+    )
+    failed_characters: List[str] = Field(
+        default_factory=list,
+        description="Characters that fell back to a placeholder memecoin.",
+    )
+
+    @property
+    def sequential_seconds(self) -> float:
+        """Time the setup would have taken generating one character at a time"""
+        return sum(self.character_seconds.values())
+
+    def summary(self) -> Dict:
+        return {
+            **self.model_dump(),
+            "sequential_seconds": round(self.sequential_seconds, 3),
+            "speedup": round(self.sequential_seconds / self.total_seconds, 2)
+            if self.total_seconds
+            else None,
+        }
 
 
 def _get_character_names(num: int) -> List[str]:
@@ -58,55 +134,68 @@ def _get_character_traits(num: int) -> List[Traits]:
 
 def _get_memecoin_themes(num: int) -> List[str]:
     """Get a list of random memecoin themes"""
-
-    themes = [
-        "Cats",
-        "Dogs",
-        "Aliens",
-        "Space",
-        "Time Travel",
-        "Gaming",
-        "Retro Tech",
-        "Dank Memes",
-        "Food (Pizza, Tacos, Burgers)",
-        "Sports",
-        "Music Genres (Lo-fi, Metal, Synthwave)",
-        "Street Art",
-        "Tech Bros",
-        "Fashion (Y2K, Vaporwave)",
-        "Crypto Culture",
-        "NFT Parody",
-        "AI Takeover",
-        "Taiwan Culture",
-        "Conspiracy Theories",
-        "Internet Legends",
-        "Meme History (Doge, Pepe, etc.)",
-        "Cartoons",
-        "Movie Parodies",
-        "Quantum Physics (but dumbed down)",
-        "Weird Holidays (Talk Like a Pirate Day, etc.)",
-        "Fast Food Mascots",
-        "Mythical Creatures",
-        "Apocalypse Vibes",
-        "Corporate Satire",
-        "Internet Nostalgia (early 2000s)",
-    ]
+    themes = list(MEMECOIN_THEMES)
     random.shuffle(themes)
     return themes[:num]
 
 
-async def create_agents(num: int, model: str = "gpt-4o") -> List[MemecoinAgent]:
-    """Create characters with random trait sets and return agents"""
+async def _create_character(
+    name: str,
+    traits: Traits,
+    memecoin_theme: str,
+    semaphore: asyncio.Semaphore,
+    metrics: SetupMetrics,
+) -> Character:
+    """Create a character, falling back to a placeholder memecoin on failure
+
+    A failed generation never takes the rest of the lobby down with it.
+    """
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            character = await Character.create(
+                name=name,
+                traits=traits,
+                memecoin_theme=memecoin_theme,
+            )
+        except Exception as e:
+            logger.error(f"Failed to generate memecoin for {name}: {e}")
+            metrics.failed_characters.append(name)
+            character = Character(
+                id=generate_id(name),
+                name=name,
+                traits=traits,
+                memecoin_theme=memecoin_theme,
+                memecoin=fallback_memecoin(memecoin_theme),
+            )
+        metrics.character_seconds[character.id] = round(time.perf_counter() - start, 3)
+    return character
+
+
+async def create_agents(
+    num: int,
+    model: str = "gpt-4o",
+    semaphore: Optional[asyncio.Semaphore] = None,
+    metrics: Optional[SetupMetrics] = None,
+) -> List[MemecoinAgent]:
+    """Create characters with random trait sets and return agents
+
+    Args:
+        num: Number of agents to create
+        model: LLM model to use for the agents, unless MODEL_ROUTES routes a
+               call type elsewhere
+        semaphore: Bounds how many memecoins are generated at once. Shared with
+                   other setup calls of the same lobby when provided
+        metrics: Collects per-character setup timings when provided
+    """
+    semaphore = semaphore or asyncio.Semaphore(SETUP_MAX_CONCURRENCY)
+    metrics = metrics if metrics is not None else SetupMetrics(num_agents=num)
     traits = _get_character_traits(num)
     names = _get_character_names(num)
     themes = _get_memecoin_themes(num)
     characters = await asyncio.gather(
         *[
-            Character.create(
-                name=names[i],
-                traits=traits[i],
-                memecoin_theme=themes[i],
-            )
+            _create_character(names[i], traits[i], themes[i], semaphore, metrics)
             for i in range(num)
         ]
     )
@@ -115,13 +204,20 @@ async def create_agents(num: int, model: str = "gpt-4o") -> List[MemecoinAgent]:
 
 
 async def create_agent_with_traits(
-    name: str, traits_dict: Dict[str, str], model: str = "gpt-4o"
+    name: str,
+    traits_dict: Dict[str, str],
+    model: str = "gpt-4o",
+    semaphore: Optional[asyncio.Semaphore] = None,
+    metrics: Optional[SetupMetrics] = None,
 ) -> MemecoinAgent:
     """Create a single character with specified traits and return an agent
 
     Args:
         traits_dict: Dictionary of traits for the character
-        model: LLM model to use for the agent
+        model: LLM model to use for the agent, unless MODEL_ROUTES routes a
+               call type elsewhere
+        semaphore: Bounds how many memecoins are generated at once
+        metrics: Collects the setup timing when provided
 
     Returns:
         An agent with the specified traits
@@ -133,10 +229,12 @@ async def create_agent_with_traits(
     themes = _get_memecoin_themes(1)
 
     # Create a character with the specified traits
-    character = await Character.create(
-        name=name,
-        traits=traits,
-        memecoin_theme=themes[0],
+    character = await _create_character(
+        name,
+        traits,
+        themes[0],
+        semaphore or asyncio.Semaphore(1),
+        metrics if metrics is not None else SetupMetrics(num_agents=1),
     )
 
     # Create and return an agent from the character
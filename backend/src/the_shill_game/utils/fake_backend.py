@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import math
+import os
+import random
+import typing
+from collections import Counter
+from typing import Any, Dict, Optional, Sequence, Type, Union
+
+from agents import Agent
+from pydantic import BaseModel
+
+from the_shill_game.utils.backend import DeltaCallback, ModelBackend
+from the_shill_game.utils.metrics import record_tokens
+
+# Seed of the generated outputs and latencies
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+# Latency of every call, e.g. "fixed:0", "uniform:0.2,1.5", "lognormal:0.8,0.5".
+# FAKE_LLM_LATENCY_AGENT, _CHAT and _STRUCTURED override it per kind of call
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "fixed:0")
+
+# Like the OpenAI prompt cache: prefixes from 1024 tokens on, in 128 token blocks
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_BLOCK_TOKENS = 128
+
+_WORDS = (
+    "moon pump diamond hands rug community whale liquidity roadmap vibes chart "
+    "alpha degen holders burn airdrop trust vote alliance betray loyal fud hype "
+    "wagmi ngmi token launch utility meme bag green candle stack believe rally"
+).split()
+
+
+class LatencyDistribution:
+    """Seconds a fake call takes
+
+    Specs:
+        fixed:<seconds>
+        uniform:<low>,<high>
+        normal:<mean>,<stddev>          clipped at 0
+        lognormal:<median>,<sigma>      long tail, like real LLM latency
+        exponential:<mean>
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, kind: str, *params: float):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, params = spec.partition(":")
+        values = [float(p) for p in params.split(",") if p.strip()]
+        return cls(kind.strip(), *values)
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            return p[0] if p else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(p[0], p[1])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(p[0], p[1]))
+        if self.kind == "lognormal":
+            # lognormvariate takes mu of the underlying normal, log(median)
+            return rng.lognormvariate(math.log(p[0]), p[1]) if p[0] > 0 else 0.0
+        return rng.expovariate(1 / p[0]) if p[0] > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{','.join(str(p) for p in self.params)}"
+
+
+LatencySpec = Union[str, LatencyDistribution]
+
+
+def _distribution(spec: LatencySpec) -> LatencyDistribution:
+    return LatencyDistribution.parse(spec) if isinstance(spec, str) else spec
+
+
+class FakeBackend(ModelBackend):
+    """Local stand-in for the models, for load tests and benchmarks
+
+    Outputs are generated from a random generator seeded with the seed and the
+    call's prompt, so the same game plays out the same way every run no matter
+    in which order concurrent calls complete. Votes always pick one of the
+    `choices` they are given.
+    """
+
+    def __init__(
+        self,
+        seed: int = FAKE_LLM_SEED,
+        latency: Union[LatencySpec, Dict[str, LatencySpec]] = FAKE_LLM_LATENCY,
+        stream_chunk_words: int = 3,
+    ):
+        self.seed = seed
+        if isinstance(latency, dict):
+            self.latency = {kind: _distribution(spec) for kind, spec in latency.items()}
+        else:
+            self.latency = {"default": _distribution(latency)}
+        self.stream_chunk_words = max(1, stream_chunk_words)
+        # Number of calls per kind
+        self.calls: Counter = Counter()
+        # Last prompt per caller, to report the prefix a provider would have cached
+        self._last_prompts: Dict[str, str] = {}
+
+    @classmethod
+    def from_env(cls) -> "FakeBackend":
+        latency: Dict[str, LatencySpec] = {"default": FAKE_LLM_LATENCY}
+        for kind in ("agent", "chat", "structured"):
+            spec = os.getenv(f"FAKE_LLM_LATENCY_{kind.upper()}")
+            if spec:
+                latency[kind] = spec
+        return cls(seed=FAKE_LLM_SEED, latency=latency)
+
+    def _rng(self, kind: str, *parts: str) -> random.Random:
+        key = "\x1f".join([str(self.seed), kind, *parts]).encode()
+        return random.Random(
+            int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+        )
+
+    def _cached_tokens(self, caller: str, prompt: str) -> int:
+        previous = self._last_prompts.get(caller, "")
+        self._last_prompts[caller] = prompt
+        tokens = _common_prefix_length(previous, prompt) // 4
+        if tokens < PROMPT_CACHE_MIN_TOKENS:
+            return 0
+        return tokens - tokens % PROMPT_CACHE_BLOCK_TOKENS
+
+    def _latency(self, kind: str, rng: random.Random) -> float:
+        distribution = self.latency.get(kind) or self.latency.get("default")
+        return distribution.sample(rng) if distribution else 0.0
+
+    async def chat(
+        self, input: str, instruction: str = "", model: str = "gpt-4o"
+    ) -> str:
+        self.calls["chat"] += 1
+        rng = self._rng("chat", instruction, input)
+        await asyncio.sleep(self._latency("chat", rng))
+        text = _sentence(rng, 12, 40)
+        prompt = instruction + input
+        _record_usage(prompt, text, self._cached_tokens("chat", prompt))
+        return text
+
+    async def structured(
+        self,
+        input: str,
+        response_format: Type[BaseModel],
+        instruction: str = "",
+        model: str = "gpt-4o",
+        choices: Optional[Sequence[str]] = None,
+    ) -> BaseModel:
+        self.calls["structured"] += 1
+        rng = self._rng("structured", response_format.__name__, instruction, input)
+        await asyncio.sleep(self._latency("structured", rng))
+        output = _generate(response_format, rng, choices)
+        prompt = instruction + input
+        cached = self._cached_tokens(response_format.__name__, prompt)
+        _record_usage(prompt, output.model_dump_json(), cached)
+        return output
+
+    async def run_agent(
+        self,
+        agent: Agent,
+        prompt: str,
+        on_delta: Optional[DeltaCallback] = None,
+        choices: Optional[Sequence[str]] = None,
+    ) -> Any:
+        self.calls["agent"] += 1
+        output_type = agent.output_type
+        rng = self._rng("agent", agent.name, output_type.__name__, prompt)
+        latency = self._latency("agent", rng)
+        output = _generate(output_type, rng, choices)
+        full_prompt = str(agent.instructions) + prompt
+        cached = self._cached_tokens(agent.name, full_prompt)
+        _record_usage(full_prompt, output.model_dump_json(), cached)
+
+        text = getattr(output, "response", None)
+        if not on_delta or not isinstance(text, str):
+            await asyncio.sleep(latency)
+            return output
+
+        # A third of the latency before the first token, the rest spread over chunks
+        words = text.split(" ")
+        chunks = [
+            " ".join(words[i : i + self.stream_chunk_words])
+            for i in range(0, len(words), self.stream_chunk_words)
+        ]
+        await asyncio.sleep(latency / 3)
+        offset = 0
+        for i, chunk in enumerate(chunks):
+            delta = chunk if i == 0 else " " + chunk
+            await on_delta(delta, offset)
+            offset += len(delta)
+            await asyncio.sleep(latency * 2 / 3 / len(chunks))
+        return output
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    # Binary search over slice comparisons, which run in C
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _record_usage(prompt: str, completion: str, cached_tokens: int = 0):
+    # Same estimate as the conversation budget, about four characters per token
+    record_tokens(len(prompt) // 4 + 1, len(completion) // 4 + 1, cached_tokens)
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(min_words, max_words))
+    return " ".join(words).capitalize() + "."
+
+
+def _generate(
+    model: Type[BaseModel], rng: random.Random, choices: Optional[Sequence[str]]
+) -> BaseModel:
+    """Fill a model with random values of the right types"""
+    values = {}
+    for name, field in model.model_fields.items():
+        values[name] = _value(name, field.annotation, rng, choices)
+    return model(**values)
+
+
+def _value(name: str, annotation, rng: random.Random, choices):
+    if name == "vote_target" and choices:
+        return rng.choice(list(choices))
+    if name == "symbol":
+        return "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=rng.randint(3, 5)))
+    if name == "name":
+        return " ".join(w.capitalize() for w in rng.choices(_WORDS, k=2))
+
+    origin = typing.get_origin(annotation)
+    if origin in (list, typing.List):
+        (item,) = typing.get_args(annotation) or (str,)
+        return [_value(name, item, rng, choices) for _ in range(rng.randint(1, 3))]
+    if origin is Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _value(name, args[0], rng, choices)
+    if origin is typing.Literal:
+        return rng.choice(typing.get_args(annotation))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _generate(annotation, rng, choices)
+    if annotation is bool:
+        return rng.random() < 0.5
+    if annotation is int:
+        return rng.randint(0, 100)
+    if annotation is float:
+        return rng.random()
+    return _sentence(rng, 8, 30)
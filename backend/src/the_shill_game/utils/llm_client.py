@@ -0,0 +1,165 @@
+import asyncio
+import os
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from agents import set_default_openai_client
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+from pydantic import BaseModel, Field
+
+from the_shill_game.utils.logger import logger
+from the_shill_game.utils.metrics import record_retry
+
+T = TypeVar("T")
+
+# Errors worth retrying: transport failures, throttling and provider-side 5xx.
+# APITimeoutError is a subclass of APIConnectionError.
+RETRYABLE_ERRORS = (
+    APIConnectionError,
+    RateLimitError,
+    InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+class LLMClientConfig(BaseModel):
+    """Settings for the shared async LLM client"""
+
+    max_connections: int = Field(
+        default=100, description="Size of the shared HTTP connection pool."
+    )
+    max_keepalive_connections: int = Field(
+        default=20, description="Idle connections kept open for reuse."
+    )
+    max_concurrency: int = Field(
+        default=32, description="Maximum number of in-flight LLM calls."
+    )
+    timeout: float = Field(
+        default=60.0, description="Timeout in seconds of each attempt of a call."
+    )
+    max_retries: int = Field(
+        default=3, description="Retries on transient errors before giving up."
+    )
+    backoff_base: float = Field(
+        default=0.5, description="First retry delay in seconds, doubled per retry."
+    )
+    backoff_max: float = Field(default=8.0, description="Upper bound on a retry delay.")
+
+    @classmethod
+    def from_env(cls) -> "LLMClientConfig":
+        """Build the config from LLM_* environment variables"""
+        env = {
+            "max_connections": os.getenv("LLM_MAX_CONNECTIONS"),
+            "max_keepalive_connections": os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS"),
+            "max_concurrency": os.getenv("LLM_MAX_CONCURRENCY"),
+            "timeout": os.getenv("LLM_TIMEOUT_SECONDS"),
+            "max_retries": os.getenv("LLM_MAX_RETRIES"),
+            "backoff_base": os.getenv("LLM_BACKOFF_BASE_SECONDS"),
+            "backoff_max": os.getenv("LLM_BACKOFF_MAX_SECONDS"),
+        }
+        return cls(**{key: value for key, value in env.items() if value is not None})
+
+
+_config: LLMClientConfig = LLMClientConfig.from_env()
+_client: Optional[AsyncOpenAI] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+# The loop the client and semaphore were created on. httpx connections cannot be
+# shared across event loops, so a new loop (e.g. a second asyncio.run) gets its own.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def configure_llm_client(config: LLMClientConfig):
+    """Replace the client settings. The pool is rebuilt on the next call."""
+    global _config, _client, _semaphore, _loop
+    _config = config
+    _client = None
+    _semaphore = None
+    _loop = None
+
+
+def get_llm_config() -> LLMClientConfig:
+    return _config
+
+
+def _ensure_loop_resources():
+    global _client, _semaphore, _loop
+    loop = asyncio.get_running_loop()
+    if _client is not None and _loop is loop:
+        return
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=_config.max_connections,
+            max_keepalive_connections=_config.max_keepalive_connections,
+        ),
+        timeout=httpx.Timeout(_config.timeout),
+    )
+    # Retries are handled by call_llm so they share the backoff and the limiter
+    _client = AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client, max_retries=0
+    )
+    _semaphore = asyncio.Semaphore(_config.max_concurrency)
+    _loop = loop
+    # Route agents SDK calls (Runner.run) through the same pool
+    set_default_openai_client(_client)
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Get the shared async OpenAI client for the running event loop"""
+    _ensure_loop_resources()
+    return _client
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    delay = min(_config.backoff_max, _config.backoff_base * (2**attempt))
+    return random.uniform(0, delay)
+
+
+async def call_llm(
+    fn: Callable[[], Awaitable[T]],
+    timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+) -> T:
+    """Run an LLM call under the concurrency limit, with a timeout and retries
+
+    Args:
+        fn: Zero-argument callable creating the awaitable, invoked once per attempt
+        timeout: Per-attempt timeout in seconds. Defaults to the configured timeout
+        max_retries: Retries on transient errors. Defaults to the configured value
+    """
+    _ensure_loop_resources()
+    timeout = _config.timeout if timeout is None else timeout
+    max_retries = _config.max_retries if max_retries is None else max_retries
+
+    attempt = 0
+    while True:
+        try:
+            async with _semaphore:
+                return await asyncio.wait_for(fn(), timeout=timeout)
+        except RETRYABLE_ERRORS as e:
+            if attempt >= max_retries:
+                raise
+            delay = _backoff_delay(attempt)
+            attempt += 1
+            record_retry()
+            logger.warning(
+                f"LLM call failed ({type(e).__name__}), retry {attempt}/{max_retries} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+async def close_llm_client():
+    """Close the shared connection pool"""
+    global _client, _semaphore, _loop
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _semaphore = None
+    _loop = None
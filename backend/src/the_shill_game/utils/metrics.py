@@ -0,0 +1,320 @@
+import asyncio
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from the_shill_game.utils.logger import logger
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120, 300)
+
+# The game whose calls and broadcasts are being measured. Set by the game task,
+# and inherited by the tasks it creates
+_current_game: ContextVar[Optional["GameMetrics"]] = ContextVar(
+    "current_game_metrics", default=None
+)
+_current_call: ContextVar[Optional["CallSpan"]] = ContextVar(
+    "current_call_span", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs including +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((f"{bound:g}", total))
+        pairs.append(("+Inf", self.count))
+        return pairs
+
+
+class CallStats:
+    """Aggregated agent or model calls of one kind in one phase"""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.prompt_tokens = 0
+        # Prompt tokens served from the provider's prompt cache
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.retries = 0
+        self.errors = 0
+
+
+class PhaseStats:
+    """Aggregated runs of one phase"""
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.broadcasts = 0
+        self.broadcast_seconds = 0.0
+        # Agent turns and votes that ran out of time
+        self.timeouts = 0
+
+
+class CallSpan:
+    """One model call, filled in by the layers it passes through"""
+
+    def __init__(self, kind: str, phase: str):
+        self.kind = kind
+        self.phase = phase
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.retries = 0
+
+
+class GameMetrics:
+    """Timing spans of one game, aggregated by phase and by kind of call"""
+
+    def __init__(self, game_id: str):
+        self.game_id = game_id
+        self.phases: Dict[str, PhaseStats] = {}
+        # (phase, kind) -> stats
+        self.calls: Dict[Tuple[str, str], CallStats] = {}
+        # Phases that have started and not ended, innermost last
+        self._open: List[Tuple[str, float]] = []
+
+    @property
+    def current_phase(self) -> str:
+        return self._open[-1][0] if self._open else "none"
+
+    def _phase(self, phase: str) -> PhaseStats:
+        if phase not in self.phases:
+            self.phases[phase] = PhaseStats()
+        return self.phases[phase]
+
+    def phase_started(self, phase: str):
+        _current_game.set(self)
+        self._open.append((phase, time.perf_counter()))
+
+    def phase_ended(self, phase: str):
+        for i in range(len(self._open) - 1, -1, -1):
+            if self._open[i][0] == phase:
+                _, started = self._open.pop(i)
+                self._phase(phase).duration.observe(time.perf_counter() - started)
+                return
+
+    def record_broadcast(self, seconds: float):
+        if not self._open:
+            # Host lines between phases
+            return
+        stats = self._phase(self.current_phase)
+        stats.broadcasts += 1
+        stats.broadcast_seconds += seconds
+
+    def record_timeout(self):
+        self._phase(self.current_phase).timeouts += 1
+
+    def record_call(self, span: CallSpan, seconds: float, failed: bool):
+        key = (span.phase, span.kind)
+        if key not in self.calls:
+            self.calls[key] = CallStats()
+        stats = self.calls[key]
+        stats.latency.observe(seconds)
+        stats.prompt_tokens += span.prompt_tokens
+        stats.cached_tokens += span.cached_tokens
+        stats.completion_tokens += span.completion_tokens
+        stats.retries += span.retries
+        stats.errors += failed
+
+    def summary(self) -> Dict:
+        """Totals per phase, for logs and the game state endpoint"""
+        phases = {}
+        for phase, stats in self.phases.items():
+            calls = [s for (p, _), s in self.calls.items() if p == phase]
+            phases[phase] = {
+                "runs": stats.duration.count,
+                "seconds": round(stats.duration.sum, 3),
+                "broadcast_seconds": round(stats.broadcast_seconds, 3),
+                "calls": sum(s.latency.count for s in calls),
+                "call_seconds": round(sum(s.latency.sum for s in calls), 3),
+                "prompt_tokens": sum(s.prompt_tokens for s in calls),
+                "cached_tokens": sum(s.cached_tokens for s in calls),
+                "completion_tokens": sum(s.completion_tokens for s in calls),
+                "retries": sum(s.retries for s in calls),
+                "timeouts": stats.timeouts,
+            }
+        return phases
+
+
+_games: Dict[str, GameMetrics] = {}
+
+
+def get_game_metrics(game_id: str) -> GameMetrics:
+    """The metrics of a game, created on first use"""
+    if game_id not in _games:
+        _games[game_id] = GameMetrics(game_id)
+    return _games[game_id]
+
+
+def forget_game_metrics(game_id: str):
+    _games.pop(game_id, None)
+
+
+def current_game_metrics() -> Optional[GameMetrics]:
+    return _current_game.get()
+
+
+@contextmanager
+def call_span(kind: str) -> Iterator[CallSpan]:
+    """Measure a model call of the current game
+
+    Backends add token counts and call_llm adds retries to the span while the
+    call runs. Calls made outside of a game, e.g. during setup, are not recorded.
+    """
+    game = _current_game.get()
+    span = CallSpan(kind, game.current_phase if game else "none")
+    token = _current_call.set(span)
+    start = time.perf_counter()
+    failed = True
+    cancelled = False
+    try:
+        yield span
+        failed = False
+    except asyncio.CancelledError:
+        # Cancelled work, like a dropped speculative turn, is not a failure
+        cancelled = True
+        raise
+    finally:
+        _current_call.reset(token)
+        if game and not cancelled:
+            seconds = time.perf_counter() - start
+            game.record_call(span, seconds, failed)
+            logger.debug(
+                f"{kind} call in {span.phase} took {seconds:.2f}s: "
+                f"{span.prompt_tokens} prompt tokens ({span.cached_tokens} cached), "
+                f"{span.completion_tokens} completion tokens"
+            )
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0):
+    """Add token usage to the call being measured, if any"""
+    span = _current_call.get()
+    if span:
+        span.prompt_tokens += prompt_tokens or 0
+        span.cached_tokens += cached_tokens or 0
+        span.completion_tokens += completion_tokens or 0
+
+
+def record_retry():
+    span = _current_call.get()
+    if span:
+        span.retries += 1
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(str(value))}"' for key, value in labels.items())
+
+
+def _histogram(lines: List[str], name: str, histogram: Histogram, **labels: str):
+    for le, count in histogram.cumulative():
+        lines.append(f"{name}_bucket{{{_labels(**labels, le=le)}}} {count}")
+    lines.append(f"{name}_sum{{{_labels(**labels)}}} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{{{_labels(**labels)}}} {histogram.count}")
+
+
+def render_prometheus() -> str:
+    """All game metrics in the Prometheus text exposition format"""
+    games = list(_games.values())
+    lines = [
+        "# HELP shill_games Games with metrics in this process",
+        "# TYPE shill_games gauge",
+        f"shill_games {len(games)}",
+        "# HELP shill_phase_duration_seconds Wall time of game phases",
+        "# TYPE shill_phase_duration_seconds histogram",
+    ]
+    for game in games:
+        for phase, stats in game.phases.items():
+            _histogram(
+                lines,
+                "shill_phase_duration_seconds",
+                stats.duration,
+                game_id=game.game_id,
+                phase=phase,
+            )
+
+    lines += [
+        "# HELP shill_broadcast_seconds_total Time spent broadcasting messages",
+        "# TYPE shill_broadcast_seconds_total counter",
+    ]
+    for game in games:
+        for phase, stats in game.phases.items():
+            labels = _labels(game_id=game.game_id, phase=phase)
+            lines.append(
+                f"shill_broadcast_seconds_total{{{labels}}} {stats.broadcast_seconds:.6f}"
+            )
+    lines += [
+        "# HELP shill_broadcasts_total Messages broadcast",
+        "# TYPE shill_broadcasts_total counter",
+    ]
+    for game in games:
+        for phase, stats in game.phases.items():
+            labels = _labels(game_id=game.game_id, phase=phase)
+            lines.append(f"shill_broadcasts_total{{{labels}}} {stats.broadcasts}")
+
+    lines += [
+        "# HELP shill_turn_timeouts_total Agent turns and votes that ran out of time",
+        "# TYPE shill_turn_timeouts_total counter",
+    ]
+    for game in games:
+        for phase, stats in game.phases.items():
+            labels = _labels(game_id=game.game_id, phase=phase)
+            lines.append(f"shill_turn_timeouts_total{{{labels}}} {stats.timeouts}")
+
+    lines += [
+        "# HELP shill_llm_call_duration_seconds Latency of model calls, retries included",
+        "# TYPE shill_llm_call_duration_seconds histogram",
+    ]
+    for game in games:
+        for (phase, kind), stats in game.calls.items():
+            _histogram(
+                lines,
+                "shill_llm_call_duration_seconds",
+                stats.latency,
+                game_id=game.game_id,
+                phase=phase,
+                kind=kind,
+            )
+
+    counters = [
+        ("shill_llm_prompt_tokens_total", "Prompt tokens", "prompt_tokens"),
+        (
+            "shill_llm_cached_prompt_tokens_total",
+            "Prompt tokens served from the provider prompt cache",
+            "cached_tokens",
+        ),
+        ("shill_llm_completion_tokens_total", "Completion tokens", "completion_tokens"),
+        ("shill_llm_retries_total", "Retried model calls", "retries"),
+        ("shill_llm_errors_total", "Model calls that failed", "errors"),
+    ]
+    for name, help, attribute in counters:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+        for game in games:
+            for (phase, kind), stats in game.calls.items():
+                labels = _labels(game_id=game.game_id, phase=phase, kind=kind)
+                lines.append(f"{name}{{{labels}}} {getattr(stats, attribute)}")
+
+    return "\n".join(lines) + "\n"
@@ -1,45 +1,46 @@
+from typing import Optional, Sequence
+
 from pydantic import BaseModel
-from the_shill_game import openai_client
+from the_shill_game.utils.backend import get_model_backend
+from the_shill_game.utils.metrics import call_span
 
 
-def invoke_chat_response(
+async def invoke_chat_response(
     input: str, instruction: str = "", model: str = "gpt-4o"
 ) -> str:
     """Invoke a model and return the response"""
-    messages = []
-    if instruction:
-        messages.append({"role": "system", "content": instruction})
-    messages.append({"role": "user", "content": input})
-    return (
-        openai_client.chat.completions.create(model=model, messages=messages)
-        .choices[0]
-        .message.content
-    )
+    with call_span("chat"):
+        return await get_model_backend().chat(
+            input, instruction=instruction, model=model
+        )
 
 
-def invoke_structured_response(
+async def invoke_structured_response(
     input: str,
     response_format: BaseModel,
     instruction: str = "",
     model: str = "gpt-4o",
+    choices: Optional[Sequence[str]] = None,
 ) -> BaseModel:
-    """Invoke a model and return a structured response"""
-    messages = []
-    if instruction:
-        messages.append({"role": "system", "content": instruction})
-    messages.append({"role": "user", "content": input})
-
-    return (
-        openai_client.beta.chat.completions.parse(
-            model=model, messages=messages, response_format=response_format
+    """Invoke a model and return a structured response
+
+    Args:
+        choices: Legal values of a vote_target field, for backends that don't read prompts
+    """
+    with call_span("structured"):
+        return await get_model_backend().structured(
+            input,
+            response_format,
+            instruction=instruction,
+            model=model,
+            choices=choices,
         )
-        .choices[0]
-        .message.parsed
-    )
 
 
 if __name__ == "__main__":
-    print(invoke_chat_response("Hello, world!"))
+    import asyncio
+
+    print(asyncio.run(invoke_chat_response("Hello, world!")))
 
     class Step(BaseModel):
         explanation: str
@@ -49,10 +50,12 @@ if __name__ == "__main__":
         steps: list[Step]
         final_answer: str
 
-    res = invoke_structured_response(
-        instruction="You are a helpful math tutor. Guide the user through the solution step by step.",
-        input="how can I solve 8x + 7 = -23",
-        response_format=MathReasoning,
+    res = asyncio.run(
+        invoke_structured_response(
+            instruction="You are a helpful math tutor. Guide the user through the solution step by step.",
+            input="how can I solve 8x + 7 = -23",
+            response_format=MathReasoning,
+        )
     )
     print(
         "\n".join(
@@ -0,0 +1,279 @@
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Literal, Optional, Tuple, get_args
+
+from the_shill_game.utils.logger import logger
+from the_shill_game.utils.metrics import _labels
+
+CallType = Literal["speech", "vote", "defense", "farewell", "memecoin", "takeaway"]
+CALL_TYPES = get_args(CallType)
+
+# Model per call type, e.g. "vote=gpt-4o-mini,farewell=gpt-4o-mini". Call types
+# left out use the model their caller asks for
+MODEL_ROUTES = os.getenv("MODEL_ROUTES", "")
+# Model to fall back to when a model is too slow or failing, e.g. "gpt-4o=gpt-4o-mini"
+MODEL_DOWNGRADES = os.getenv("MODEL_DOWNGRADES", "gpt-4o=gpt-4o-mini")
+# A call type is downgraded once the p95 latency or the error rate of its last
+# ROUTE_WINDOW calls crosses these. 0 to never downgrade on that measure
+ROUTE_MAX_P95_SECONDS = float(os.getenv("ROUTE_MAX_P95_SECONDS", "20"))
+ROUTE_MAX_ERROR_RATE = float(os.getenv("ROUTE_MAX_ERROR_RATE", "0.2"))
+ROUTE_WINDOW = int(os.getenv("ROUTE_WINDOW", "50"))
+# Calls a model must have made for a call type before it can be downgraded
+ROUTE_MIN_CALLS = int(os.getenv("ROUTE_MIN_CALLS", "10"))
+# Seconds a downgrade lasts before the original model is tried again
+ROUTE_COOLDOWN_SECONDS = float(os.getenv("ROUTE_COOLDOWN_SECONDS", "300"))
+
+
+def parse_model_map(
+    spec: str, keys: Optional[Tuple[str, ...]] = None
+) -> Dict[str, str]:
+    """A "key=model,key=model" setting as a dict"""
+    models = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, model = item.partition("=")
+        key, model = key.strip(), model.strip()
+        if not model or (keys is not None and key not in keys):
+            raise ValueError(f"Invalid model route: {item}")
+        models[key] = model
+    return models
+
+
+class _Window:
+    """Latency and outcome of the last calls of one model for one call type"""
+
+    def __init__(self, size: int):
+        self.calls: Deque[Tuple[float, bool]] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    def p95(self) -> float:
+        latencies = sorted(seconds for seconds, _ in self.calls)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def error_rate(self) -> float:
+        return sum(failed for _, failed in self.calls) / len(self.calls)
+
+
+class _Route:
+    """The model a call type currently gets instead of its primary model"""
+
+    def __init__(self, primary: str):
+        self.primary = primary
+        self.model = primary
+        self.reason = ""
+        self.since = 0.0
+
+
+class ModelRouter:
+    """Picks the model of every call by its call type, and downgrades slow ones
+
+    Each call type has a primary model, from the routes or from its caller. The
+    latency and errors of every call are kept per call type and model, and when
+    the model a call type is on crosses the p95 or the error rate threshold,
+    the call type moves down to the model's downgrade. After the cooldown it
+    goes back to its primary model, which starts over with an empty window.
+
+    Every pick is counted by call type, model and reason, and every downgrade
+    and restore is kept, so the trade between quality and speed can be read
+    back from the metrics.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, str]] = None,
+        downgrades: Optional[Dict[str, str]] = None,
+        max_p95_seconds: float = ROUTE_MAX_P95_SECONDS,
+        max_error_rate: float = ROUTE_MAX_ERROR_RATE,
+        window: int = ROUTE_WINDOW,
+        min_calls: int = ROUTE_MIN_CALLS,
+        cooldown_seconds: float = ROUTE_COOLDOWN_SECONDS,
+    ):
+        self.routes = routes or {}
+        self.downgrades = downgrades or {}
+        self.max_p95_seconds = max_p95_seconds
+        self.max_error_rate = max_error_rate
+        self.window = window
+        self.min_calls = max(1, min_calls)
+        self.cooldown_seconds = cooldown_seconds
+        # (call type, primary model) -> where its calls go now
+        self._routes: Dict[Tuple[str, str], _Route] = {}
+        # (call type, model) -> its last calls
+        self._windows: Dict[Tuple[str, str], _Window] = {}
+        # (call type, model, reason) -> calls routed that way
+        self.decisions: Counter = Counter()
+        # Downgrades and restores, latest last
+        self.changes: Deque[Dict] = deque(maxlen=100)
+        self.change_count = 0
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        return cls(
+            parse_model_map(MODEL_ROUTES, CALL_TYPES),
+            parse_model_map(MODEL_DOWNGRADES),
+        )
+
+    def _route(self, call_type: str, default: str) -> _Route:
+        primary = self.routes.get(call_type, default)
+        route = self._routes.get((call_type, primary))
+        if route is None:
+            route = self._routes[(call_type, primary)] = _Route(primary)
+        return route
+
+    def pick(self, call_type: CallType, default: str) -> str:
+        """The model for a call, default being the model the caller would use"""
+        route = self._route(call_type, default)
+        if (
+            route.model != route.primary
+            and time.monotonic() - route.since >= self.cooldown_seconds
+        ):
+            self._windows.pop((call_type, route.primary), None)
+            self._change(call_type, route, route.primary, "cooldown")
+        if route.model != route.primary:
+            reason = "downgraded"
+        elif call_type in self.routes:
+            reason = "route"
+        else:
+            reason = "default"
+        self.decisions[(call_type, route.model, reason)] += 1
+        return route.model
+
+    def observe(
+        self,
+        call_type: CallType,
+        default: str,
+        model: str,
+        seconds: float,
+        failed: bool,
+    ):
+        """Record a finished call and downgrade its call type if it is too slow"""
+        window = self._windows.get((call_type, model))
+        if window is None:
+            window = self._windows[(call_type, model)] = _Window(self.window)
+        window.calls.append((seconds, failed))
+
+        route = self._route(call_type, default)
+        # Only the model the call type is on now can move it further down
+        if route.model != model or len(window) < self.min_calls:
+            return
+        downgrade = self.downgrades.get(model)
+        if not downgrade or downgrade == model:
+            return
+        p95, error_rate = window.p95(), window.error_rate()
+        if self.max_p95_seconds and p95 > self.max_p95_seconds:
+            self._change(call_type, route, downgrade, f"p95 {p95:.2f}s")
+        elif self.max_error_rate and error_rate > self.max_error_rate:
+            self._change(call_type, route, downgrade, f"error rate {error_rate:.2f}")
+
+    def _change(self, call_type: str, route: _Route, model: str, reason: str):
+        logger.warning(
+            f"Routing {call_type} calls from {route.model} to {model} ({reason})"
+        )
+        self.changes.append(
+            {
+                "at": time.time(),
+                "call_type": call_type,
+                "from": route.model,
+                "to": model,
+                "reason": reason,
+            }
+        )
+        self.change_count += 1
+        route.model = model
+        route.reason = reason
+        route.since = time.monotonic()
+
+    def summary(self) -> Dict:
+        """Current routes with the stats they were chosen on, and past changes"""
+        routes = []
+        for (call_type, primary), route in self._routes.items():
+            window = self._windows.get((call_type, route.model))
+            routes.append(
+                {
+                    "call_type": call_type,
+                    "primary": primary,
+                    "model": route.model,
+                    "reason": route.reason if route.model != primary else None,
+                    "calls": len(window) if window else 0,
+                    "p95_seconds": round(window.p95(), 3) if window else None,
+                    "error_rate": round(window.error_rate(), 3) if window else None,
+                }
+            )
+        return {
+            "routes": routes,
+            "decisions": [
+                {"call_type": call_type, "model": model, "reason": reason, "calls": n}
+                for (call_type, model, reason), n in sorted(self.decisions.items())
+            ],
+            "changes": list(self.changes),
+        }
+
+    def render_prometheus(self) -> str:
+        """Routing decisions in the Prometheus text exposition format"""
+        lines: List[str] = [
+            "# HELP shill_model_route_decisions_total Model calls by call type, "
+            "routed model and reason",
+            "# TYPE shill_model_route_decisions_total counter",
+        ]
+        for (call_type, model, reason), n in sorted(self.decisions.items()):
+            labels = _labels(call_type=call_type, model=model, reason=reason)
+            lines.append(f"shill_model_route_decisions_total{{{labels}}} {n}")
+        lines += [
+            "# HELP shill_model_route_downgraded Whether a call type is routed "
+            "away from its primary model",
+            "# TYPE shill_model_route_downgraded gauge",
+        ]
+        for (call_type, primary), route in self._routes.items():
+            labels = _labels(call_type=call_type, primary=primary, model=route.model)
+            lines.append(
+                f"shill_model_route_downgraded{{{labels}}} "
+                f"{int(route.model != primary)}"
+            )
+        lines += [
+            "# HELP shill_model_route_changes_total Downgrades and restores of routes",
+            "# TYPE shill_model_route_changes_total counter",
+            f"shill_model_route_changes_total {self.change_count}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+_router: Optional[ModelRouter] = None
+
+
+def set_model_router(router: ModelRouter):
+    """Route the model calls of this process through a router"""
+    global _router
+    _router = router
+
+
+def get_model_router() -> ModelRouter:
+    """The router of this process, created from the environment on first use"""
+    global _router
+    if _router is None:
+        _router = ModelRouter.from_env()
+    return _router
+
+
+@contextmanager
+def routed_model(call_type: CallType, default: str) -> Iterator[str]:
+    """Pick the model of a call and feed its latency and outcome back
+
+    A cancelled call, like a turn that ran out of time, counts with the time it
+    had taken so far but not as an error, since a dropped speculative turn is
+    cancelled the same way.
+    """
+    router = get_model_router()
+    model = router.pick(call_type, default)
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield model
+        failed = False
+    except asyncio.CancelledError:
+        failed = False
+        raise
+    finally:
+        router.observe(call_type, default, model, time.perf_counter() - start, failed)
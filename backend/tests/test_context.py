@@ -0,0 +1,103 @@
+import asyncio
+
+from the_shill_game.game.context import ConversationContext, estimate_tokens
+
+
+def _context(summaries, token_budget=200, **kwargs):
+    """A context whose summaries come from a list instead of the model"""
+    context = ConversationContext(token_budget=token_budget, **kwargs)
+
+    async def summarize(lines):
+        return summaries.pop(0) if summaries else ""
+
+    context._summarize = summarize
+    return context
+
+
+def _fill_rounds(context, rounds, lines_per_round=10):
+    for round in range(rounds):
+        context.start_round(round)
+        for i in range(lines_per_round):
+            context.append(f"[Player {i}] round {round} line {i} " + "x" * 40)
+
+
+def test_render_keeps_recent_lines_within_budget():
+    context = ConversationContext(token_budget=100, window_slack=0.25)
+    context.pin("[Host] Welcome")
+    for i in range(50):
+        context.append(f"line {i} " + "y" * 30)
+
+    rendered = context.render()
+    assert rendered.startswith("[Host] Welcome")
+    assert rendered.endswith("line 49 " + "y" * 30)
+    assert estimate_tokens(rendered) <= 100
+
+
+def test_window_slides_in_steps_and_keeps_its_prefix():
+    context = ConversationContext(token_budget=100, window_slack=0.25)
+    for i in range(30):
+        context.append(f"line {i} " + "y" * 30)
+    before = context.render()
+    context.append("next")
+    after = context.render()
+    # Only one line was added, and the slack left room for it
+    assert after == before + "\nnext"
+
+
+def test_compact_replaces_old_rounds_by_summaries():
+    context = _context(["round zero went well", "round one was chaos"])
+    _fill_rounds(context, 3)
+
+    asyncio.run(context.compact())
+
+    assert context.summaries == [
+        ("Intro", "round zero went well"),
+        ("Round 1", "round one was chaos"),
+    ]
+    assert context.summarized_through == 1
+    rendered = context.render()
+    assert "[Summary of earlier rounds]" in rendered
+    assert "round 0 line" not in rendered
+    assert "round 2 line 9" in rendered
+
+
+def test_compact_keeps_the_current_round():
+    context = _context(["summary"] * 5, token_budget=10)
+    _fill_rounds(context, 1)
+
+    asyncio.run(context.compact())
+
+    assert context.summaries == []
+    assert context.current_round == 0
+
+
+def test_failed_summary_keeps_the_round_for_the_next_compaction():
+    summaries = []
+    context = _context(summaries)
+    _fill_rounds(context, 3)
+    compacted = []
+    context.on_compacted = lambda: compacted.append(True)
+
+    asyncio.run(context.compact())
+    assert context.summaries == []
+    assert context.summarized_through == -1
+    assert compacted == []
+    # The window still bounds the prompt without the summary
+    assert estimate_tokens(context.render()) <= context.token_budget
+
+    summaries += ["intro summary", "round one summary"]
+    asyncio.run(context.compact())
+    assert [label for label, _ in context.summaries] == ["Intro", "Round 1"]
+    assert compacted == [True]
+
+
+def test_load_summaries_drops_the_summarized_rounds():
+    context = _context([])
+    _fill_rounds(context, 3)
+
+    context.load_summaries([("Intro", "a"), ("Round 1", "b")], through_round=1)
+
+    assert context.summarized_through == 1
+    assert context.live_tokens == sum(
+        estimate_tokens(f"[Player {i}] round 2 line {i} " + "x" * 40) for i in range(10)
+    )
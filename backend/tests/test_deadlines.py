@@ -0,0 +1,32 @@
+from the_shill_game.game.deadlines import PhaseDeadlines
+
+
+def test_no_limits_means_no_timeout():
+    deadlines = PhaseDeadlines(phase_timeout=0)
+    deadlines.start("intro")
+    assert not deadlines.limits(0)
+    assert deadlines.timeout(0) is None
+    assert deadlines.limits(30)
+    assert deadlines.timeout(30) == 30
+
+
+def test_turns_get_the_least_time_left_of_any_open_phase():
+    deadlines = PhaseDeadlines(phase_timeout=10)
+    deadlines.start("round_completed")
+    assert deadlines.timeout(0) is None
+    deadlines.start("intro")
+    assert 9 < deadlines.timeout(0) <= 10
+    assert deadlines.timeout(5) == 5
+
+
+def test_timeouts_count_toward_every_open_phase():
+    deadlines = PhaseDeadlines(phase_timeout=10)
+    deadlines.start("round_completed")
+    deadlines.start("initial_voting")
+    deadlines.record_timeout()
+    deadlines.record_timeout()
+    assert deadlines.end("initial_voting") == 2
+    deadlines.start("defense")
+    deadlines.record_timeout()
+    assert deadlines.end("defense") == 1
+    assert deadlines.end("round_completed") == 3
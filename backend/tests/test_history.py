@@ -0,0 +1,49 @@
+import json
+
+from the_shill_game.game.history import MessageHistory
+from the_shill_game.game.websocket import SystemMessage, WebSocketManager
+
+
+def _history(frames, max_size=10):
+    history = MessageHistory(max_size)
+    for i in range(frames):
+        seq = history.claim_seq()
+        history.append(seq, 1000 + i, f"frame {seq}")
+    return history
+
+
+def test_since_seq_returns_the_frames_after_it():
+    history = _history(5)
+    assert history.since(seq=3) == (["frame 4", "frame 5"], False)
+    assert history.since(seq=0) == ([f"frame {i}" for i in range(1, 6)], False)
+    assert history.since(seq=5) == ([], False)
+
+
+def test_since_reports_frames_that_left_the_buffer():
+    history = _history(15)
+    assert history.first_seq == 6
+    frames, truncated = history.since(seq=2)
+    assert frames[0] == "frame 6"
+    assert truncated
+    assert history.since(seq=5) == ([f"frame {i}" for i in range(6, 16)], False)
+
+
+def test_since_timestamp():
+    history = _history(5)
+    assert history.since(timestamp=1002) == (["frame 4", "frame 5"], False)
+    assert history.since(timestamp=0)[0][0] == "frame 1"
+
+
+def test_record_numbers_restored_messages_on_from_last_seq():
+    manager = WebSocketManager()
+    messages = [SystemMessage(type="system", content=str(i)) for i in range(3)]
+
+    manager.record("game", messages, last_seq=10)
+
+    history = manager.message_history["game"]
+    assert [message.seq for message in messages] == [8, 9, 10]
+    assert history.last_seq == 10
+    # A client that saw seq 9 before the restart gets only what came after
+    frames, truncated = history.since(seq=9)
+    assert [json.loads(frame)["content"] for frame in frames] == ["2"]
+    assert history.claim_seq() == 11
@@ -0,0 +1,60 @@
+import asyncio
+import random
+
+from the_shill_game.agent.memecoin_cache import MemecoinCache, set_memecoin_cache
+from the_shill_game.game.registry import GameRegistry
+from the_shill_game.game.setup import setup_game
+from the_shill_game.game.websocket import WebSocketManager
+from the_shill_game.utils.backend import set_model_backend
+from the_shill_game.utils.fake_backend import FakeBackend
+
+
+def _registry(directory, rounds):
+    """A registry holding one game played for some rounds, journaled to directory"""
+    set_model_backend(FakeBackend(seed=0, latency={"default": "fixed:0"}))
+    set_memecoin_cache(MemecoinCache(""))
+    random.seed(0)
+    registry = GameRegistry(WebSocketManager(), idle_timeout=0, journal_dir=directory)
+    entry = registry.create("game")
+
+    async def play():
+        entry.state = await setup_game(
+            registry.ws_manager, game_id="game", journal_dir=directory
+        )
+        await entry.state.start()
+        while entry.state.round < rounds and entry.state.round_phase != "game_over":
+            await entry.state.run_round()
+
+    asyncio.run(play())
+    return registry, entry
+
+
+def test_idle_games_are_unloaded_and_loaded_back_from_their_journal(tmp_path):
+    registry, entry = _registry(str(tmp_path), rounds=1)
+    round, transcript = entry.state.round, len(entry.state.transcript)
+
+    assert registry.expire_idle() == ["game"]
+    assert len(registry) == 0
+    assert (tmp_path / "game.jsonl").exists()
+
+    loaded = registry.get("game")
+    assert loaded is not None and loaded is not entry
+    assert loaded.state.round == round
+    assert len(loaded.state.transcript) == transcript
+    assert len(registry) == 1
+
+
+def test_finished_games_are_deleted_with_their_journal(tmp_path):
+    registry, entry = _registry(str(tmp_path), rounds=100)
+    assert entry.state.round_phase == "game_over"
+
+    assert registry.expire_idle() == ["game"]
+    assert not (tmp_path / "game.jsonl").exists()
+    assert registry.get("game") is None
+
+
+def test_unknown_games_are_not_created(tmp_path):
+    registry = GameRegistry(WebSocketManager(), journal_dir=str(tmp_path))
+    assert registry.find("made-up") is None
+    assert registry.find("default") is not None
+    assert len(registry) == 1
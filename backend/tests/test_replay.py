@@ -0,0 +1,130 @@
+import asyncio
+import json
+import random
+
+from the_shill_game.agent.memecoin_cache import MemecoinCache, set_memecoin_cache
+from the_shill_game.game.journal import GameJournal
+from the_shill_game.game.replay import GameReplay
+from the_shill_game.game.setup import setup_game
+from the_shill_game.game.state import GameState
+from the_shill_game.game.websocket import WebSocketManager
+from the_shill_game.utils.backend import set_model_backend
+from the_shill_game.utils.fake_backend import FakeBackend
+
+
+def _play(directory, game_id="game", seed=0):
+    """Play a full game with the fake backend, journaled to directory"""
+    set_model_backend(FakeBackend(seed=seed, latency={"default": "fixed:0"}))
+    set_memecoin_cache(MemecoinCache(""))
+    random.seed(seed)
+
+    async def play():
+        game_state = await setup_game(
+            WebSocketManager(), game_id=game_id, journal_dir=str(directory)
+        )
+        await game_state.start()
+        while game_state.round_phase != "game_over":
+            await game_state.run_round()
+        game_state.journal.close()
+        return game_state
+
+    return asyncio.run(play())
+
+
+def _names(agents):
+    return [agent.character.name for agent in agents]
+
+
+def test_state_at_the_end_matches_the_game(tmp_path):
+    game_state = _play(tmp_path)
+    replay = GameReplay.from_journal(GameJournal("game", str(tmp_path)))
+
+    state = replay.state_at()
+
+    assert state.round_phase == "game_over"
+    assert state.round == game_state.round
+    assert [state.names[i] for i in state.winners] == _names(game_state.active_agents)
+    assert [state.names[i] for i in state.eliminated] == _names(
+        game_state.eliminated_agents
+    )
+    assert list(state.transcript.lines()) == list(game_state.messages)
+
+
+def test_state_at_an_earlier_event(tmp_path):
+    _play(tmp_path)
+    replay = GameReplay.from_journal(GameJournal("game", str(tmp_path)))
+    first_vote = next(
+        i for i, event in enumerate(replay.events) if event["type"] == "vote"
+    )
+
+    state = replay.state_at(first_vote + 1)
+
+    assert state.events == first_vote + 1
+    assert len(state.votes) == 1
+    assert state.eliminated == []
+    assert state.round_phase == "initial_voting"
+
+
+def test_messages_replay_the_recorded_frames(tmp_path):
+    game_state = _play(tmp_path)
+    replay = GameReplay.from_journal(GameJournal("game", str(tmp_path)))
+    history = game_state.ws_manager.message_history["game"]
+
+    live = [json.loads(frame) for frame in history.since(seq=0)[0]]
+    replayed = [json.loads(m.model_dump_json()) for m in replay.messages()]
+
+    def strip(frames):
+        return [
+            {k: v for k, v in frame.items() if k not in ("seq", "timestamp")}
+            for frame in frames
+        ]
+
+    assert strip(replayed[-len(live) :]) == strip(live)
+    assert replay.frames_sent() == history.last_seq
+
+
+def test_restore_after_a_crash_resumes_from_the_last_phase(tmp_path):
+    finished = _play(tmp_path)
+    path = tmp_path / "game.jsonl"
+    events = path.read_text().splitlines()
+    # Crash in the middle of the second round's defense, mid-line
+    defense = [
+        i
+        for i, line in enumerate(events)
+        if '"phase": "defense"' in line and '"state": "started"' in line
+    ]
+    cut = defense[1] + 3
+    path.write_text("\n".join(events[:cut]) + '\n{"type": "entry", "te')
+
+    journal = GameJournal("game", str(tmp_path))
+    replay = GameReplay.from_journal(journal)
+    saved = replay.state_at(replay.last_checkpoint())
+    game_state = GameState.restore(journal, WebSocketManager())
+
+    round = json.loads(events[defense[1]])["checkpoint"]["round"]
+    assert game_state.round == saved.round == round
+    assert saved.completed == ("initial_voting", "ended")
+    assert [a.character.id for a in game_state.active_agents] == saved.active
+    # The initial votes carry over into the defense
+    assert {
+        voter: agent.character.id for voter, agent in game_state.votes.items()
+    } == saved.votes
+    assert len(game_state.tally) == len(saved.votes) > 0
+    assert len(game_state.transcript) == len(saved.transcript)
+    assert game_state.ws_manager.message_history["game"].last_seq == (
+        replay.frames_sent()
+    )
+
+    async def resume():
+        await game_state.resume()
+        while game_state.round_phase != "game_over":
+            await game_state.run_round()
+        game_state.journal.close()
+
+    asyncio.run(resume())
+    assert game_state.round_phase == "game_over"
+    assert len(game_state.active_agents) == 2
+    # The same agents play on, so the finished game has everyone it had before
+    assert sorted(_names(game_state.active_agents + game_state.eliminated_agents)) == (
+        sorted(_names(finished.active_agents + finished.eliminated_agents))
+    )
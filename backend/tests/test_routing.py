@@ -0,0 +1,78 @@
+import pytest
+
+from the_shill_game.utils import routing
+from the_shill_game.utils.routing import ModelRouter, parse_model_map
+
+
+def _router(**kwargs):
+    options = dict(
+        downgrades={"gpt-4o": "gpt-4o-mini"},
+        max_p95_seconds=5,
+        max_error_rate=0.5,
+        window=10,
+        min_calls=4,
+        cooldown_seconds=60,
+    )
+    return ModelRouter(**{**options, **kwargs})
+
+
+def test_parse_model_map():
+    assert parse_model_map(" vote=gpt-4o-mini, farewell = x ,") == {
+        "vote": "gpt-4o-mini",
+        "farewell": "x",
+    }
+    with pytest.raises(ValueError):
+        parse_model_map("speeches=gpt-4o", routing.CALL_TYPES)
+    with pytest.raises(ValueError):
+        parse_model_map("vote=")
+
+
+def test_routes_override_the_default_model():
+    router = _router(routes={"vote": "gpt-4o-mini"})
+    assert router.pick("vote", "gpt-4o") == "gpt-4o-mini"
+    assert router.pick("speech", "gpt-4o") == "gpt-4o"
+    assert router.decisions[("vote", "gpt-4o-mini", "route")] == 1
+    assert router.decisions[("speech", "gpt-4o", "default")] == 1
+
+
+def test_slow_calls_downgrade_the_call_type_only():
+    router = _router()
+    for _ in range(3):
+        router.observe("speech", "gpt-4o", "gpt-4o", 9.0, False)
+    # Too few calls to judge yet
+    assert router.pick("speech", "gpt-4o") == "gpt-4o"
+
+    router.observe("speech", "gpt-4o", "gpt-4o", 9.0, False)
+    assert router.pick("speech", "gpt-4o") == "gpt-4o-mini"
+    assert router.pick("vote", "gpt-4o") == "gpt-4o"
+    assert router.changes[-1]["reason"].startswith("p95")
+    assert router.decisions[("speech", "gpt-4o-mini", "downgraded")] == 1
+
+
+def test_errors_downgrade_and_calls_of_an_old_model_are_ignored():
+    router = _router()
+    for failed in (True, True, True, False):
+        router.observe("vote", "gpt-4o", "gpt-4o", 0.1, failed)
+    assert router.pick("vote", "gpt-4o") == "gpt-4o-mini"
+    assert "error rate" in router.changes[-1]["reason"]
+
+    # A call that was still on the primary model doesn't move the route again
+    router.observe("vote", "gpt-4o", "gpt-4o", 9.0, True)
+    assert router.pick("vote", "gpt-4o") == "gpt-4o-mini"
+    assert router.change_count == 1
+
+
+def test_cooldown_restores_the_primary_with_an_empty_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(routing.time, "monotonic", lambda: now[0])
+    router = _router()
+    for _ in range(4):
+        router.observe("speech", "gpt-4o", "gpt-4o", 9.0, False)
+    assert router.pick("speech", "gpt-4o") == "gpt-4o-mini"
+
+    now[0] += 61
+    assert router.pick("speech", "gpt-4o") == "gpt-4o"
+    assert router.changes[-1]["reason"] == "cooldown"
+    # The slow calls from before the downgrade no longer count
+    router.observe("speech", "gpt-4o", "gpt-4o", 9.0, False)
+    assert router.pick("speech", "gpt-4o") == "gpt-4o"
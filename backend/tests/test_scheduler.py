@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+
+from the_shill_game.agent.character import CharacterResponse
+from the_shill_game.game.context import ConversationContext
+from the_shill_game.game.scheduler import TurnScheduler
+
+
+class _Agent:
+    """An agent that answers after a fixed delay and counts its calls"""
+
+    def __init__(self, name, seconds=0.0):
+        self.character = SimpleNamespace(name=name)
+        self.seconds = seconds
+        self.calls = 0
+
+    async def respond(self, conversation, on_delta=None, call_type="speech"):
+        self.calls += 1
+        await asyncio.sleep(self.seconds)
+        return CharacterResponse(response=f"{self.character.name} speaks", thought="")
+
+
+def _run(scheduler, agents, on_timeout=None):
+    delivered = []
+
+    async def post_cue(cue):
+        scheduler.context.append(cue)
+
+    async def deliver(agent, response, stream):
+        scheduler.context.append(response.response)
+        delivered.append(agent.character.name)
+
+    turns = [(agent, f"[Host] {agent.character.name}") for agent in agents]
+    asyncio.run(scheduler.run(turns, post_cue, deliver, on_timeout=on_timeout))
+    return delivered
+
+
+def test_speculative_turns_are_used_when_fresh():
+    agents = [_Agent("Ann"), _Agent("Bob"), _Agent("Cat")]
+    scheduler = TurnScheduler(ConversationContext(), lookahead=1, max_stale_turns=1)
+
+    assert _run(scheduler, agents) == ["Ann", "Bob", "Cat"]
+    assert scheduler.speculated == 2
+    assert scheduler.regenerated == 0
+    assert [agent.calls for agent in agents] == [1, 1, 1]
+
+
+def test_speculation_that_missed_a_turn_after_a_skipped_one_is_regenerated():
+    # Ann runs out of time and is skipped, so Cat's speculation, started
+    # during Bob's turn, misses Bob's line although Ann delivered nothing
+    agents = [_Agent("Ann", seconds=1), _Agent("Bob"), _Agent("Cat")]
+    skipped = []
+
+    async def skip(agent):
+        skipped.append(agent.character.name)
+        return None
+
+    scheduler = TurnScheduler(
+        ConversationContext(),
+        lookahead=1,
+        max_stale_turns=0,
+        timeout_for=lambda: 0.05,
+    )
+
+    assert _run(scheduler, agents, on_timeout=skip) == ["Bob", "Cat"]
+    assert skipped == ["Ann"]
+    assert scheduler.timeouts == 1
+    # Bob's speculation missed nothing, Cat's missed Bob
+    assert scheduler.regenerated == 1
+    assert [agent.calls for agent in agents] == [1, 1, 2]
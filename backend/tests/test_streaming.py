@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from the_shill_game.agent.memecoin_cache import MemecoinCache, set_memecoin_cache
+from the_shill_game.agent.streaming import JsonFieldStreamer
+from the_shill_game.game.setup import setup_game
+from the_shill_game.game.websocket import WebSocketManager
+from the_shill_game.utils.backend import set_model_backend
+from the_shill_game.utils.fake_backend import FakeBackend
+
+
+def _stream(payload, chunk_size):
+    streamer = JsonFieldStreamer("response")
+    text = "".join(
+        streamer.feed(payload[i : i + chunk_size])
+        for i in range(0, len(payload), chunk_size)
+    )
+    return text, streamer
+
+
+def test_decodes_the_field_in_any_chunking():
+    response = 'Say "gm" \\ to ${PEPE}\nnow é 🚀'
+    payload = json.dumps({"thought": "x", "response": response})
+    for chunk_size in (1, 2, 3, 7, len(payload)):
+        text, streamer = _stream(payload, chunk_size)
+        assert text == response
+        assert streamer.done
+        assert streamer.offset == len(response)
+
+
+def test_escaped_surrogate_pairs_wait_for_both_halves():
+    payload = json.dumps({"response": "to the 🚀 moon"}, ensure_ascii=True)
+    assert "\\ud83d" in payload
+    text, _ = _stream(payload, 1)
+    assert text == "to the 🚀 moon"
+
+
+def test_other_fields_and_text_after_the_value_are_ignored():
+    streamer = JsonFieldStreamer("response")
+    assert streamer.feed('{"thought": "response", ') == ""
+    assert streamer.feed('"response": "hi"') == "hi"
+    assert streamer.feed(', "response": "again"}') == ""
+    assert streamer.offset == 2
+
+
+class _Client:
+    """A spectator socket that keeps every frame it gets"""
+
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, data):
+        self.frames.append(json.loads(data))
+
+    async def close(self, code=1000):
+        pass
+
+
+@pytest.mark.parametrize("fallback", ["canned", "skip"])
+def test_streams_of_timed_out_turns_are_closed(fallback):
+    set_model_backend(
+        FakeBackend(seed=0, latency={"default": "fixed:0", "agent": "fixed:0.3"})
+    )
+    set_memecoin_cache(MemecoinCache(""))
+    manager = WebSocketManager()
+    client = _Client()
+
+    async def play():
+        game_state = await setup_game(manager, game_id="stream", journal_dir=None)
+        manager.add_connection(client, "stream")
+        game_state.stream_responses = True
+        game_state.timeout_fallback = fallback
+        game_state.turn_scheduler.timeout_for = lambda: 0.15
+        agents = game_state.active_agents[:3]
+        await game_state._run_turns([(agent, "[Host] Go") for agent in agents])
+        # Let the client's writer catch up
+        await asyncio.sleep(0.05)
+
+    asyncio.run(play())
+
+    opened = {f["stream_id"] for f in client.frames if f["type"] == "agent_delta"}
+    closed = {
+        f["stream_id"]
+        for f in client.frames
+        if f["type"] in ("agent", "agent_stream_cancel") and f.get("stream_id")
+    }
+    assert opened
+    assert opened <= closed
+    cancelled = [f for f in client.frames if f["type"] == "agent_stream_cancel"]
+    assert bool(cancelled) == (fallback == "skip")
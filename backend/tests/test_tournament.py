@@ -0,0 +1,29 @@
+import io
+import json
+
+from the_shill_game.tournament import run_tournament
+
+
+def test_run_tournament_streams_every_game_and_sums_them_up():
+    output = io.StringIO()
+
+    stats = run_tournament(games=4, output=output, workers=1, backend="fake")
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(line["game"] for line in lines) == [0, 1, 2, 3]
+    assert all(line["takeaway"] is None for line in lines)
+
+    summary = stats.summary()
+    assert summary["games"] == 4
+    assert summary["errors"] == 0
+    assert summary["rounds_per_game"] == round(
+        sum(line["rounds"] for line in lines) / 4, 2
+    )
+    assert summary["llm_calls_per_game"] == round(
+        sum(line["llm_calls"] for line in lines) / 4, 2
+    )
+    # Every player of every game counts once per trait
+    for values in summary["traits"].values():
+        assert sum(rates["appearances"] for rates in values.values()) == 4 * 6
+    # A random player's share of the wins
+    assert summary["base_win_rate"] == round(4 / (4 * 6), 4)
@@ -0,0 +1,30 @@
+import pytest
+
+from the_shill_game.agent.traits import Traits
+
+
+def test_traits_are_read_only():
+    traits = Traits(thinking="Emotional")
+    with pytest.raises(TypeError):
+        traits.traits["thinking"] = "Logical"
+    assert traits.get_trait("thinking") == "Emotional"
+
+
+def test_set_trait_refreshes_the_cached_texts():
+    traits = Traits(thinking="Emotional")
+    before = traits.get_communication_style()
+    key = traits.cache_key
+
+    traits.set_trait("thinking", "Logical")
+
+    assert traits.cache_key != key
+    assert "Structured Mind" in traits.get_communication_style()
+    assert traits.get_communication_style() != before
+
+
+def test_set_trait_rejects_unknown_values():
+    traits = Traits()
+    with pytest.raises(KeyError):
+        traits.set_trait("charisma", "High")
+    with pytest.raises(ValueError):
+        traits.set_trait("thinking", "Psychic")
@@ -0,0 +1,53 @@
+from the_shill_game.game.transcript import Transcript
+
+
+def _transcript():
+    transcript = Transcript()
+    transcript.append("Welcome", "host", 0, "intro")
+    transcript.append("gm\nfrens", "speech", 0, "intro", "a1", "Alice")
+    transcript.append("I vote for Bob.", "vote", 1, "final_voting", "a1", "Alice")
+    transcript.append("Nope", "speech", 1, "defense", "b1", "Bob")
+    return transcript
+
+
+def test_lines_render_senders_and_flatten_newlines():
+    assert _transcript().lines() == [
+        "Welcome",
+        "[Alice] gm frens",
+        "[Alice] I vote for Bob.",
+        "[Bob] Nope",
+    ]
+
+
+def test_lines_are_extended_and_keep_their_length():
+    transcript = _transcript()
+    before = transcript.lines()
+    transcript.append("Next", "host", 1, "defense")
+
+    assert len(before) == 4
+    assert list(before) == [entry.line for entry in transcript][:4]
+    assert transcript.lines()[-1] == "Next"
+    assert transcript.lines()[1:3] == ["[Alice] gm frens", "[Alice] I vote for Bob."]
+
+
+def test_indexes_by_round_phase_and_sender():
+    transcript = _transcript()
+    assert [entry.seq for entry in transcript.by_round(1)] == [2, 3]
+    assert transcript.by_phase("intro").texts() == ["Welcome", "gm\nfrens"]
+    assert [entry.kind for entry in transcript.by_sender("a1")] == ["speech", "vote"]
+    assert transcript.senders() == [(None, None), ("a1", "Alice"), ("b1", "Bob")]
+
+
+def test_truncate_drops_entries_indexes_and_lines():
+    transcript = _transcript()
+    transcript.lines()
+
+    transcript.truncate(2)
+
+    assert len(transcript) == 2
+    assert transcript.lines() == ["Welcome", "[Alice] gm frens"]
+    assert transcript.rounds() == [0]
+    assert len(transcript.by_sender("b1")) == 0
+    entry = transcript.append("Again", "host", 1, "defense")
+    assert entry.seq == 2
+    assert transcript.lines()[-1] == "Again"
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+from the_shill_game.game.votes import (
+    VoteTally,
+    VoteTargetIndex,
+    normalize_name,
+    tally_message,
+)
+
+
+def _agent(name, id, memecoin, symbol):
+    return SimpleNamespace(
+        character=SimpleNamespace(
+            name=name,
+            id=id,
+            memecoin=SimpleNamespace(name=memecoin, symbol=symbol),
+        )
+    )
+
+
+def test_normalize_name():
+    assert normalize_name("  Zoë   O'Brien! ") == "zoe o brien"
+
+
+def test_resolve_by_any_alias():
+    jamie = _agent("Jamie Lee", "a1", "Moon Dog", "MDOG")
+    shawn = _agent("Shawn Park", "b2", "Pepe Cash", "PEPE")
+    index = VoteTargetIndex([jamie, shawn])
+
+    assert index.resolve("jamie lee") is jamie
+    assert index.resolve("Jamie") is jamie
+    assert index.resolve("b2") is shawn
+    assert index.resolve("$PEPE") is shawn
+    assert index.resolve("Moon Dog") is jamie
+    assert index.resolve("I vote for @Shawn!") is shawn
+    assert index.resolve("Nobody") is None
+    # Names of two players in one answer are ambiguous
+    assert index.resolve("Jamie or Shawn") is None
+
+
+def test_shared_aliases_are_left_out():
+    first = _agent("Jamie Lee", "a1", "Moon Dog", "MOON")
+    second = _agent("Jamie Park", "b2", "Sun Cat", "MOON")
+    index = VoteTargetIndex([first, second])
+
+    assert index.resolve("Jamie") is None
+    assert index.resolve("MOON") is None
+    assert index.resolve("Jamie Park") is second
+
+
+def test_full_names_take_priority_over_other_aliases():
+    shawn = _agent("Shawn Park", "a1", "Moon Dog", "MDOG")
+    # A memecoin named after another player, and a first name that is an ID
+    impostor = _agent("a1 Smith", "b2", "Shawn Park", "SPRK")
+    index = VoteTargetIndex([shawn, impostor])
+
+    assert index.resolve("Shawn Park") is shawn
+    assert index.resolve("a1") is shawn
+    assert index.resolve("SPRK") is impostor
+    assert index.resolve("a1 Smith") is impostor
+
+
+def test_tally_counts_leaders_and_ties():
+    tally = VoteTally()
+    tally.add("v1", "a")
+    tally.add("v2", "b")
+    assert tally.leaders == ["a", "b"]
+    assert tally.tied
+
+    tally.add("v3", "b")
+    assert tally.counts == {"a": 1, "b": 2}
+    assert tally.leaders == ["b"]
+    assert not tally.tied
+    assert len(tally) == 3
+
+
+def test_tally_replaces_a_changed_ballot():
+    tally = VoteTally()
+    tally.add("v1", "a")
+    tally.add("v2", "a")
+    tally.add("v1", "b")
+    tally.add("v2", "c")
+    assert tally.counts == {"b": 1, "c": 1}
+    assert tally.max_votes == 1
+    assert tally.leaders == ["b", "c"]
+
+    tally.add("v2", "b")
+    assert tally.counts == {"b": 2}
+    assert tally.leaders == ["b"]
+    # The same ballot again changes nothing
+    tally.add("v2", "b")
+    assert tally.counts == {"b": 2}
+
+
+def test_tally_message_carries_only_the_changed_counts():
+    tally = VoteTally()
+    tally.add("v1", "a")
+    tally.add("v2", "b")
+    previous = tally.add("v1", "b")
+
+    message = tally_message(tally, "initial_voting", str.upper, 3, "v1", "b", previous)
+
+    assert previous == "a"
+    assert (message.voter, message.target) == ("V1", "B")
+    assert message.counts == {"B": 2, "A": 0}
+    assert message.leaders == ["B"]
+    assert not message.tied
+    assert (message.votes_cast, message.voters) == (2, 3)
@@ -0,0 +1,23 @@
+import json
+
+from the_shill_game.game.websocket import ReplayMessage, SystemMessage
+
+
+def test_replay_payload_embeds_recorded_frames():
+    frames = [
+        SystemMessage(type="system", content="[]", seq=1).model_dump_json(),
+        SystemMessage(type="system", content="hi", seq=2).model_dump_json(),
+    ]
+    message = ReplayMessage(type="replay", last_seq=2, truncated=True)
+
+    replay = json.loads(message.replay_payload(frames))
+
+    assert replay["type"] == "replay"
+    assert replay["last_seq"] == 2
+    assert replay["truncated"] is True
+    assert [frame["content"] for frame in replay["messages"]] == ["[]", "hi"]
+
+
+def test_replay_payload_without_frames():
+    message = ReplayMessage(type="replay", last_seq=0, truncated=False)
+    assert json.loads(message.replay_payload([]))["messages"] == []
@@ -57,8 +57,8 @@ const MessageBoard = () => {
   };
 
   const renderMessage = (message: Message) => {
-    // Skip rendering system messages
-    if (message.type === 'system') {
+    // Only agent messages are rendered, system messages and vote tallies are not
+    if (message.type !== 'agent') {
       return null;
     }
 